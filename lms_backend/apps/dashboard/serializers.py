@@ -2,6 +2,7 @@
 
 from rest_framework import serializers
 
+from apps.knowledge.view_counts import pending_views
 from apps.tasks.execution_status import AssignmentExecutionStatusSerializerMixin
 from apps.tasks.models import TaskAssignment
 from apps.tasks.progress import build_assignment_progress
@@ -13,10 +14,13 @@ class KnowledgeCardSerializer(serializers.Serializer):
     id = serializers.IntegerField(read_only=True)
     title = serializers.CharField(read_only=True)
     content_preview = serializers.CharField(read_only=True)
-    view_count = serializers.IntegerField(read_only=True)
+    view_count = serializers.SerializerMethodField()
     updated_at = serializers.DateTimeField(read_only=True)
     space_tag = serializers.SerializerMethodField()
 
+    def get_view_count(self, obj):
+        return obj.view_count + pending_views(obj.id)
+
     def get_space_tag(self, obj):
         space_tag = getattr(obj, 'space_tag', None)
         if not space_tag:
@@ -36,7 +36,7 @@ def get_monthly_tasks_count() -> int:
 def get_latest_knowledge(limit: int = 6) -> QuerySet:
     return Knowledge.objects.select_related(
         'created_by', 'updated_by', 'space_tag',
-    ).defer('related_links').order_by('-updated_at')[:limit]
+    ).defer('content', 'related_links').order_by('-updated_at')[:limit]
 
 
 def calculate_task_stats(assignments: QuerySet) -> Dict[str, Any]:
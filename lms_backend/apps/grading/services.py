@@ -183,7 +183,9 @@ class GradingService(BaseService):
         task = self._get_authorized_task(task_id, 'grading.view', '无权访问阅卷中心')
         task_quiz = self._get_task_quiz(task, task_quiz_id)
         relations = list(
-            task_quiz.quiz.quiz_questions.prefetch_related('question_options').order_by('order')
+            task_quiz.quiz.quiz_questions.select_related('snapshot')
+            .prefetch_related('snapshot__question_options')
+            .order_by('order')
         )
 
         objective_by_question = defaultdict(list)
@@ -230,7 +232,8 @@ class GradingService(BaseService):
         task = self._get_authorized_task(task_id, 'grading.view', '无权访问阅卷中心')
         task_quiz = self._get_task_quiz(task, task_quiz_id)
         relation = (
-            task_quiz.quiz.quiz_questions.prefetch_related('question_options')
+            task_quiz.quiz.quiz_questions.select_related('snapshot')
+            .prefetch_related('snapshot__question_options')
             .filter(id=question_id)
             .first()
         )
@@ -309,7 +312,7 @@ class GradingService(BaseService):
                 submission__task_assignment__assignee_id=student_id,
             )
             .select_related(
-                'question',
+                'question__snapshot',
                 'submission__quiz',
                 'submission__task_assignment__assignee',
             )
@@ -375,14 +378,9 @@ class GradingService(BaseService):
                 submission__task_quiz_id=task_quiz_id,
                 submission__status__in=resolved,
             )
-            .select_related('question')
-            .prefetch_related(
-                'question__question_options',
-                Prefetch(
-                    'answer_selections',
-                    queryset=AnswerSelection.objects.select_related('question_option'),
-                ),
-            )
+            .select_related('question__snapshot')
+            # user_answer / 判分走快照答案键缓存，只需选项 id
+            .prefetch_related('answer_selections')
             .annotate(latest_submission_id=Subquery(self._latest_submission_subquery(resolved)))
             .filter(submission_id=F('latest_submission_id'))
         )
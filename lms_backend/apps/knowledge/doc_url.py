@@ -3,6 +3,9 @@
 from typing import Optional
 from urllib.parse import parse_qs, urlparse
 
+# 与 Knowledge.external_doc_id 的 max_length 一致
+DOC_ID_MAX_LENGTH = 255
+
 
 def extract_doc_id(url: str) -> Optional[str]:
     """从文档链接 query.id 提取文档 ID。"""
@@ -12,3 +15,8 @@ def extract_doc_id(url: str) -> Optional[str]:
     values = parse_qs(urlparse(raw).query).get('id') or []
     doc_id = (values[0] if values else '').strip()
     return doc_id or None
+
+
+def doc_id_key(doc_id: Optional[str]) -> str:
+    """文档 ID → external_doc_id 列的存储值（无 ID 为空串）。"""
+    return (doc_id or '')[:DOC_ID_MAX_LENGTH]
@@ -1,20 +1,74 @@
-"""文档解析：DOCX/PPTX/PDF → HTML，及唯一解析接口。"""
+"""文档解析：DOCX/PPTX/PDF → HTML，及解析接口（异步任务见 parse_jobs）。
+
+PDF/PPTX 逐页解析：每页渲染出的块直接写入 `_HtmlBlockWriter`（写入时合并相邻同类列表），
+处理完即释放该页的版面缓存；支持进度回调和只解析前 N 页的预览。
+"""
 
 from __future__ import annotations
 
 import os
 import re
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, Iterable, Iterator
 
+from django.conf import settings
 from django.utils.html import escape
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 
 from apps.authorization.engine import enforce
 from core.exceptions import BusinessError, ErrorCodes
+from core.query_params import parse_int_query_param
 from core.responses import success_response
 
+from .parse_jobs import async_parse_enabled, build_parse_result, get_parse_job, submit_parse_job
+
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class _HtmlBlockWriter:
+    """逐块写出 HTML，块之间换行；相邻的同类列表（<ul>/<ol>）在写入时合并为一个。"""
+
+    LIST_TAGS = ('ul', 'ol')
+
+    def __init__(self):
+        self._parts: list[str] = []
+        self._open_list: str | None = None
+
+    def write(self, block: str) -> None:
+        tag = next(
+            (tag for tag in self.LIST_TAGS if block.startswith(f'<{tag}>') and block.endswith(f'</{tag}>')),
+            None,
+        )
+        if tag and tag == self._open_list:
+            self._parts.append(block[len(tag) + 2:-(len(tag) + 3)])
+            return
+        self._close_list()
+        if self._parts:
+            self._parts.append('\n')
+        if tag:
+            self._parts.append(block[:-(len(tag) + 3)])
+            self._open_list = tag
+        else:
+            self._parts.append(block)
+
+    def write_all(self, blocks: Iterable[str]) -> None:
+        for block in blocks:
+            self.write(block)
+
+    def getvalue(self) -> str:
+        self._close_list()
+        return ''.join(self._parts)
+
+    def _close_list(self) -> None:
+        if self._open_list:
+            self._parts.append(f'</{self._open_list}>')
+            self._open_list = None
+
 
 class DocumentParserService:
     """文档解析服务。"""
@@ -30,38 +84,55 @@ class DocumentParserService:
     DOCX_TITLE_STYLES = {'Title', '标题'}
     DOCX_SUBTITLE_STYLES = {'Subtitle', '副标题'}
 
-    def parse(self, file) -> tuple[str, str]:
+    def validate(self, file) -> str:
+        """校验大小与格式，返回小写扩展名。"""
         if file.size > self.MAX_FILE_SIZE:
             raise BusinessError(
                 code=ErrorCodes.VALIDATION_ERROR,
                 message=f'文件大小超过限制（最大 {self.MAX_FILE_SIZE // 1024 // 1024}MB）',
             )
 
-        filename = file.name
-        ext = os.path.splitext(filename)[1].lower()
+        ext = os.path.splitext(file.name)[1].lower()
         if ext not in self.SUPPORTED_EXTENSIONS:
             raise BusinessError(
                 code=ErrorCodes.VALIDATION_ERROR,
                 message=f'不支持的文件格式，仅支持 {", ".join(sorted(self.SUPPORTED_EXTENSIONS))}',
             )
+        return ext
 
+    def parse(self, file) -> tuple[str, str]:
+        ext = self.validate(file)
+        title, content = self.parse_content(file, ext)
+        return self.suggest_title(title, file.name), content
+
+    def parse_content(self, file, ext: str, progress: ProgressCallback | None = None) -> tuple[str | None, str]:
+        """按扩展名解析为 (文档内标题, HTML)；取不到标题时为 None，不依赖文件名，便于按内容缓存。
+
+        progress(已处理页数, 总页数)：PDF/PPTX 每处理完一页回调一次。
+        """
         if ext == '.docx':
             return self._parse_docx(file)
-        if ext == '.pptx':
-            return self._parse_pptx(file)
-        return self._parse_pdf(file)
+        title, content, _ = self._parse_pages(file, ext, progress=progress)
+        return title, content
+
+    def parse_preview(self, file, ext: str, max_pages: int) -> tuple[str | None, str, int]:
+        """只解析 PDF/PPTX 的前 max_pages 页，返回 (标题, HTML, 总页数)。"""
+        return self._parse_pages(file, ext, max_pages=max_pages)
+
+    def suggest_title(self, title: str | None, filename: str) -> str:
+        return title or self._extract_title_from_filename(filename)
 
-    def _parse_docx(self, file) -> tuple[str, str]:
+    def _parse_docx(self, file) -> tuple[str | None, str]:
         from docx import Document
 
         doc = Document(file)
-        html_parts = []
+        writer = _HtmlBlockWriter()
         title = None
 
         for para in doc.paragraphs:
             text = para.text.strip()
             if not text:
-                html_parts.append('<p><br></p>')
+                writer.write('<p><br></p>')
                 continue
             style_name = para.style.name if para.style else ''
             heading_level = self._resolve_docx_heading_level(para, text)
@@ -69,17 +140,15 @@ class DocumentParserService:
                 if title is None and heading_level == 1:
                     title = text
                 content_level = self._resolve_docx_content_heading_level(heading_level)
-                html_parts.append(f'<h{content_level}>{escape(text)}</h{content_level}>')
+                writer.write(f'<h{content_level}>{escape(text)}</h{content_level}>')
             elif style_name == 'List Bullet':
-                html_parts.append(f'<ul><li>{escape(text)}</li></ul>')
+                writer.write(f'<ul><li>{escape(text)}</li></ul>')
             elif style_name == 'List Number':
-                html_parts.append(f'<ol><li>{escape(text)}</li></ol>')
+                writer.write(f'<ol><li>{escape(text)}</li></ol>')
             else:
-                html_parts.extend(self._render_text_blocks(text))
+                writer.write_all(self._render_text_blocks(text))
 
-        content = '\n'.join(html_parts)
-        content = self._merge_consecutive_lists(content)
-        return title or self._extract_title_from_filename(file.name), content
+        return title, writer.getvalue()
 
     def _resolve_docx_heading_level(self, para, text: str) -> int | None:
         style_name = para.style.name if para.style else ''
@@ -142,62 +211,82 @@ class DocumentParserService:
             return int(raw_value) + 1
         return None
 
-    def _parse_pptx(self, file) -> tuple[str, str]:
-        from pptx import Presentation
-
-        prs = Presentation(file)
-        html_parts = []
+    def _parse_pages(
+        self,
+        file,
+        ext: str,
+        *,
+        max_pages: int | None = None,
+        progress: ProgressCallback | None = None,
+    ) -> tuple[str | None, str, int]:
+        """逐页解析 PDF/PPTX：每页的块直接写入输出，处理完即释放该页；返回 (标题, HTML, 总页数)。"""
+        open_pages = self._open_pptx_pages if ext == '.pptx' else self._open_pdf_pages
+        writer = _HtmlBlockWriter()
         title = None
+        with open_pages(file) as (page_count, pages):
+            limit = page_count if max_pages is None else min(page_count, max_pages)
+            for index, (page_title, blocks) in enumerate(islice(pages, limit), 1):
+                if index == 1 and page_title:
+                    title = page_title
+                writer.write_all(blocks)
+                if progress:
+                    progress(index, limit)
+        return title, writer.getvalue(), page_count
+
+    @contextmanager
+    def _open_pptx_pages(self, file) -> Iterator[tuple[int, Iterator[tuple[str | None, list[str]]]]]:
+        from pptx import Presentation
 
-        for i, slide in enumerate(prs.slides, 1):
-            slide_texts = []
-            slide_title = None
-            for shape in slide.shapes:
-                if hasattr(shape, 'text') and shape.text.strip():
-                    text = shape.text.strip()
-                    if slide_title is None:
-                        slide_title = text
-                    else:
-                        slide_texts.append(text)
-            if slide_title:
-                if title is None and i == 1:
-                    title = slide_title
-                html_parts.append(f'<h2>第 {i} 页：{escape(slide_title)}</h2>')
-                for text in slide_texts:
-                    for line in text.split('\n'):
-                        line = line.strip()
-                        if line:
-                            html_parts.extend(self._render_text_blocks(line))
-                        else:
-                            html_parts.append('<p><br></p>')
-
-        content = '\n'.join(html_parts)
-        content = self._merge_consecutive_lists(content)
-        return title or self._extract_title_from_filename(file.name), content
-
-    def _parse_pdf(self, file) -> tuple[str, str]:
+        slides = Presentation(file).slides
+        yield len(slides), (self._render_pptx_slide(i, slide) for i, slide in enumerate(slides, 1))
+
+    def _render_pptx_slide(self, index: int, slide) -> tuple[str | None, list[str]]:
+        """单页幻灯片 → (页标题, 块)；第一个有文字的形状作为页标题，没有标题的页不输出。"""
+        slide_texts = []
+        slide_title = None
+        for shape in slide.shapes:
+            if hasattr(shape, 'text') and shape.text.strip():
+                text = shape.text.strip()
+                if slide_title is None:
+                    slide_title = text
+                else:
+                    slide_texts.append(text)
+        if not slide_title:
+            return None, []
+
+        blocks = [f'<h2>第 {index} 页：{escape(slide_title)}</h2>']
+        for text in slide_texts:
+            blocks.extend(self._render_text_lines(text))
+        return slide_title, blocks
+
+    @contextmanager
+    def _open_pdf_pages(self, file) -> Iterator[tuple[int, Iterator[tuple[str | None, list[str]]]]]:
         import pdfplumber
 
-        html_parts = []
-        title = None
         with pdfplumber.open(file) as pdf:
-            for i, page in enumerate(pdf.pages, 1):
-                text = page.extract_text()
-                if text:
-                    text = text.strip()
-                    lines = text.split('\n')
-                    if title is None and i == 1 and lines:
-                        title = lines[0].strip()
-                    html_parts.append(f'<h2>第 {i} 页</h2>')
-                    for line in lines:
-                        line = line.strip()
-                        if line:
-                            html_parts.extend(self._render_text_blocks(line))
-                        else:
-                            html_parts.append('<p><br></p>')
-        content = '\n'.join(html_parts)
-        content = self._merge_consecutive_lists(content)
-        return title or self._extract_title_from_filename(file.name), content
+            yield len(pdf.pages), (self._render_pdf_page(i, page) for i, page in enumerate(pdf.pages, 1))
+
+    def _render_pdf_page(self, index: int, page) -> tuple[str | None, list[str]]:
+        """单页 PDF → (首行, 块)；取完文字立即释放该页缓存的版面对象。"""
+        try:
+            text = (page.extract_text() or '').strip()
+        finally:
+            # pdfplumber 0.10.3 起提供 close()，更早的版本只有 flush_cache()
+            release = getattr(page, 'close', None) or page.flush_cache
+            release()
+        if not text:
+            return None, []
+        return text.split('\n', 1)[0].strip(), [f'<h2>第 {index} 页</h2>', *self._render_text_lines(text)]
+
+    def _render_text_lines(self, text: str) -> list[str]:
+        blocks = []
+        for line in text.split('\n'):
+            line = line.strip()
+            if line:
+                blocks.extend(self._render_text_blocks(line))
+            else:
+                blocks.append('<p><br></p>')
+        return blocks
 
     def _render_text_blocks(self, text: str) -> list[str]:
         inline_list = self._split_inline_ordered_list(text)
@@ -231,11 +320,6 @@ class DocumentParserService:
 
         return (prefix, items) if items else None
 
-    def _merge_consecutive_lists(self, html: str) -> str:
-        html = re.sub(r'</ul>\s*<ul>', '', html)
-        html = re.sub(r'</ol>\s*<ol>', '', html)
-        return html
-
     def _extract_title_from_filename(self, filename: str) -> str:
         return os.path.splitext(filename)[0] or '未命名文档'
 
@@ -248,7 +332,16 @@ class ParseDocumentView(APIView):
 
     @extend_schema(
         summary='解析上传文档',
-        description='上传 DOCX/PPTX/PDF，解析为 HTML，供创建知识前预填。',
+        description=(
+            '上传 DOCX/PPTX/PDF，解析为 HTML，供创建知识前预填。'
+            '同一文件已解析过时直接返回 status=done 和结果；否则返回 status=pending 和 job_id，'
+            '由 GET parse-document/{job_id}/ 轮询。'
+            '带 preview_pages=N 时 PDF/PPTX 的 pending 响应附带前 N 页的 preview（含 page_count、truncated），'
+            'DOCX 不分页，忽略该参数。'
+        ),
+        parameters=[
+            OpenApiParameter(name='preview_pages', type=int, required=False, description='预览页数（PDF/PPTX）'),
+        ],
         tags=['知识管理'],
     )
     def post(self, request):
@@ -258,10 +351,33 @@ class ParseDocumentView(APIView):
         if not file:
             raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message='请上传文件')
 
-        suggested_title, content = DocumentParserService().parse(file)
-        ext = file.name.rsplit('.', 1)[-1].lower() if '.' in file.name else ''
-        return success_response({
-            'suggested_title': suggested_title,
-            'content': content,
-            'file_type': ext,
-        })
+        parser = DocumentParserService()
+        ext = parser.validate(file)
+        if async_parse_enabled():
+            preview_pages = parse_int_query_param(
+                request,
+                'preview_pages',
+                minimum=1,
+                maximum=settings.KNOWLEDGE_DOCUMENT_PARSE['PREVIEW_MAX_PAGES'],
+            )
+            return success_response(submit_parse_job(file, ext, preview_pages=preview_pages))
+        title, content = parser.parse_content(file, ext)
+        return success_response(build_parse_result(title, content, file.name, ext))
+
+
+class ParseDocumentJobView(APIView):
+    """GET /api/knowledge/parse-document/{job_id}/ — 轮询文档解析任务。"""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary='查询文档解析任务',
+        description=(
+            'status 为 pending / done / failed；pending 时附带 progress（{done, total} 页，可能为空），'
+            'done 时附带 suggested_title、content、file_type，failed 时附带 message。'
+        ),
+        tags=['知识管理'],
+    )
+    def get(self, request, job_id):
+        enforce('knowledge.create', request, error_message='无权解析文档')
+        return success_response(get_parse_job(job_id))
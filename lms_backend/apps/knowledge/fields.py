@@ -0,0 +1,55 @@
+"""知识正文压缩存储。
+
+任务发布每次内容变化都会新增一条知识快照，快照正文是完整 HTML 副本，`lms_knowledge_revision`
+随之膨胀。`CompressedTextField` 在写库时把超过 MIN_BYTES 的正文 zlib 压缩后以
+`COMPRESSED_PREFIX + base64` 存入原 TEXT 列，读出时透明解压，模型层和序列化拿到的始终是原文：
+
+- 只在压缩后更短时才压缩；明文恰好以前缀开头时总是压缩，读出时不会误判
+- 列类型不变，关闭 KNOWLEDGE_CONTENT_COMPRESSION 后新写入为明文，已压缩的行照常解压
+- 压缩后的列不能做 contains / regex 查询，只用于不参与检索的字段（知识快照正文）
+"""
+
+from __future__ import annotations
+
+import base64
+import zlib
+
+from django.conf import settings
+from django.db import models
+
+COMPRESSED_PREFIX = '\x1fzlib:'
+
+
+def _encode(raw: bytes, level: int) -> str:
+    return COMPRESSED_PREFIX + base64.b64encode(zlib.compress(raw, level)).decode('ascii')
+
+
+def compress_text(text: str) -> str:
+    """按配置压缩正文，返回写库值。"""
+    config = settings.KNOWLEDGE_CONTENT_COMPRESSION
+    raw = text.encode('utf-8')
+    if text.startswith(COMPRESSED_PREFIX):
+        return _encode(raw, config['LEVEL'])
+    if not config['ENABLED'] or len(raw) < config['MIN_BYTES']:
+        return text
+    encoded = _encode(raw, config['LEVEL'])
+    # 按字节比较：中文在 utf8mb4 下占 3 字节，base64 只有 ASCII
+    return encoded if len(encoded) < len(raw) else text
+
+
+def decompress_text(value: str) -> str:
+    """写库值 → 正文；明文原样返回。"""
+    if not value.startswith(COMPRESSED_PREFIX):
+        return value
+    return zlib.decompress(base64.b64decode(value[len(COMPRESSED_PREFIX):])).decode('utf-8')
+
+
+class CompressedTextField(models.TextField):
+    """大正文压缩存储的 TextField，读写透明。"""
+
+    def from_db_value(self, value, expression, connection):
+        return decompress_text(value) if value is not None else value
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        return compress_text(value) if value is not None else value
@@ -0,0 +1,306 @@
+"""知识批量导入的集合式落库。
+
+原来导入先把全部带链接的知识读进内存逐条提取文档 id，再逐行走 `_update_record` / `_create_record`，
+每行各自查标签、保存、刷新搜索索引，语句数随行数线性增长。这里：
+
+- 按 `Knowledge.external_doc_id`（落库的文档 id，带索引）分批 `IN` 查出匹配知识；表格内重复、
+  库中对应多条的行记为失败
+- 已匹配行一次加载当前字段和标签，在内存中判定 更新 / 不变；新增行直接构造
+- 标签、space 全部行一次校验；新增行批量插入，更新行按变更字段分组 bulk_update
+- 标签关系按差集批量删除和插入，最后对新增和索引内容有变化的知识一次性刷新搜索索引
+
+数据库不支持批量插入回填主键（MySQL）时，有文档 id 的新知识按 external_doc_id 回查主键，
+没有文档 id 的新知识逐条插入。
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.tags.resource_tags import (
+    ResourceTagPayload,
+    build_resource_update_plan,
+    load_valid_tag_ids,
+    pop_resource_tag_payload,
+    validate_space_tag_ids,
+)
+
+from .doc_url import doc_id_key, extract_doc_id
+from .models import Knowledge, build_content_preview
+from .search import refresh_knowledge_search_terms
+
+BATCH_SIZE = 500
+LOOKUP_CHUNK_SIZE = 1000
+# 参与搜索索引的字段，只改链接等其他字段时不重建索引
+INDEXED_FIELDS = {'title', 'content'}
+
+
+def load_doc_index(doc_ids: Iterable[str | None]) -> dict[str, list[tuple[int, str]]]:
+    """文档 id → [(knowledge_id, title), ...]，按 external_doc_id 分批 IN 查询。"""
+    keys = sorted({doc_id_key(doc_id) for doc_id in doc_ids if doc_id})
+    index: dict[str, list[tuple[int, str]]] = defaultdict(list)
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        rows = Knowledge.objects.filter(
+            external_doc_id__in=keys[start:start + LOOKUP_CHUNK_SIZE],
+        ).order_by('id').values_list('id', 'title', 'external_doc_id')
+        for knowledge_id, title, doc_id in rows:
+            index[doc_id].append((knowledge_id, title or ''))
+    return index
+
+
+def _knowledge_label(title: str = '', doc_id: str = '', *, fallback: str = '该知识') -> str:
+    """错误信息：标题 + 文档 id。"""
+    title = (title or '').strip()
+    label = (f'《{title}》' if title else '') + (f'文档id「{doc_id}」' if doc_id else '')
+    return label or fallback
+
+
+def row_failure(row_number: int, reason: str) -> dict:
+    return {'row_number': row_number, 'reason': reason}
+
+
+def match_doc_row(
+    *,
+    row_number: int,
+    title: str,
+    url: str,
+    doc_index: dict[str, list[tuple[int, str]]],
+    seen: dict[str, tuple[int, str]],
+    require_match: bool,
+):
+    """按文档 id 匹配一行 → (knowledge_id|None, doc_id|None, failure|None)。"""
+    doc_id = extract_doc_id(url)
+    label = _knowledge_label(title, doc_id or '')
+
+    if not doc_id:
+        if not require_match:
+            return None, None, None
+        prefix = _knowledge_label(title, fallback='')
+        reason = f'{prefix}文档链接缺少 id 参数' if prefix else '文档链接缺少 id 参数'
+        return None, None, row_failure(row_number, reason)
+
+    if doc_id in seen:
+        first_row, first_title = seen[doc_id]
+        return None, doc_id, row_failure(
+            row_number,
+            f'表格内{label}与第 {first_row} 行{_knowledge_label(first_title, doc_id)}重复',
+        )
+    seen[doc_id] = (row_number, title)
+
+    matches = doc_index.get(doc_id_key(doc_id), [])
+    if len(matches) > 1:
+        names = '、'.join(f'《{t}》' if (t or '').strip() else f'#{kid}' for kid, t in matches)
+        return None, doc_id, row_failure(row_number, f'{label}在库中对应多条知识：{names}')
+    if not matches:
+        if require_match:
+            return None, doc_id, row_failure(row_number, f'未找到{label}')
+        return None, doc_id, None
+    return matches[0][0], doc_id, None
+
+
+@dataclass
+class _ImportRow:
+    knowledge: Knowledge
+    tag_payload: ResourceTagPayload
+    changed_fields: dict = field(default_factory=dict)
+    space_changed: bool = False
+    tags_changed: bool = False
+    current_tag_ids: frozenset[int] = frozenset()
+
+
+def _load_current(knowledge_ids: list[int]) -> tuple[dict[int, Knowledge], dict[int, list[int]]]:
+    knowledge_map: dict[int, Knowledge] = {}
+    tag_ids: dict[int, list[int]] = defaultdict(list)
+    through = Knowledge.tags.through
+    for start in range(0, len(knowledge_ids), LOOKUP_CHUNK_SIZE):
+        chunk = knowledge_ids[start:start + LOOKUP_CHUNK_SIZE]
+        knowledge_map.update(Knowledge.objects.in_bulk(chunk))
+        for knowledge_id, tag_id in through.objects.filter(knowledge_id__in=chunk).values_list('knowledge_id', 'tag_id'):
+            tag_ids[knowledge_id].append(tag_id)
+    return knowledge_map, tag_ids
+
+
+def _plan_rows(matched: list[tuple[int | None, dict]]) -> tuple[list[_ImportRow], list[_ImportRow], int]:
+    """→ (新增, 更新, 不变数)。"""
+    valid_tag_ids = load_valid_tag_ids(
+        {tag_id for _, payload in matched for tag_id in payload.get('tag_ids') or []},
+        scope='knowledge',
+    )
+    knowledge_map, current_tag_ids = _load_current(
+        [knowledge_id for knowledge_id, _ in matched if knowledge_id is not None]
+    )
+    created: list[_ImportRow] = []
+    updated: list[_ImportRow] = []
+    unchanged = 0
+    for knowledge_id, payload in matched:
+        working = dict(payload)
+        if knowledge_id is None:
+            tag_payload = pop_resource_tag_payload(working, scope='knowledge', valid_tag_ids=valid_tag_ids)
+            created.append(_ImportRow(
+                knowledge=Knowledge(**working, space_tag_id=tag_payload.space_tag_id),
+                tag_payload=tag_payload,
+            ))
+            continue
+
+        knowledge = knowledge_map[knowledge_id]
+        plan = build_resource_update_plan(
+            knowledge,
+            working,
+            scope='knowledge',
+            current_tag_ids=current_tag_ids[knowledge_id],
+            valid_tag_ids=valid_tag_ids,
+        )
+        if not plan.has_changes:
+            unchanged += 1
+            continue
+        updated.append(_ImportRow(
+            knowledge=knowledge,
+            tag_payload=ResourceTagPayload(
+                space_tag_id=plan.space_tag_id,
+                tag_ids=plan.tag_ids,
+                space_tag_provided=plan.space_tag_provided,
+                tag_ids_provided=plan.tag_ids_provided,
+            ),
+            changed_fields=dict(plan.changed_fields),
+            space_changed=plan.space_changed,
+            tags_changed=plan.tags_changed,
+            current_tag_ids=frozenset(current_tag_ids[knowledge_id]),
+        ))
+    validate_space_tag_ids(
+        row.tag_payload.space_tag_id
+        for row in created + [row for row in updated if row.space_changed]
+        if row.tag_payload.space_tag_id is not None
+    )
+    return created, updated, unchanged
+
+
+def _insert_knowledge(rows: list[_ImportRow]) -> None:
+    knowledge_list = [row.knowledge for row in rows]
+    if connection.features.can_return_rows_from_bulk_insert:
+        Knowledge.objects.bulk_create(knowledge_list, batch_size=BATCH_SIZE)
+        return
+
+    # 本批新增行的文档 id 互不相同且库中不存在，可据此回查主键
+    with_doc_id = [knowledge for knowledge in knowledge_list if knowledge.external_doc_id]
+    last_id = Knowledge.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    Knowledge.objects.bulk_create(with_doc_id, batch_size=BATCH_SIZE)
+    ids: dict[str, int] = {}
+    doc_ids = [knowledge.external_doc_id for knowledge in with_doc_id]
+    for start in range(0, len(doc_ids), LOOKUP_CHUNK_SIZE):
+        ids.update(
+            Knowledge.objects.filter(
+                id__gt=last_id,
+                external_doc_id__in=doc_ids[start:start + LOOKUP_CHUNK_SIZE],
+            ).values_list('external_doc_id', 'id')
+        )
+    for knowledge in with_doc_id:
+        knowledge.pk = ids[knowledge.external_doc_id]
+    for knowledge in knowledge_list:
+        if not knowledge.external_doc_id:
+            knowledge.save(force_insert=True)
+
+
+def _apply_updates(rows: list[_ImportRow], *, actor) -> None:
+    now = timezone.now()
+    groups: dict[tuple[str, ...], list[Knowledge]] = defaultdict(list)
+    for row in rows:
+        knowledge = row.knowledge
+        changed_fields = dict(row.changed_fields)
+        if 'content' in changed_fields:
+            changed_fields['content_preview'] = build_content_preview(changed_fields['content'])
+        if 'external_doc_url' in changed_fields:
+            changed_fields['external_doc_id'] = doc_id_key(extract_doc_id(changed_fields['external_doc_url']))
+        if row.space_changed:
+            changed_fields['space_tag_id'] = row.tag_payload.space_tag_id
+        for key, value in changed_fields.items():
+            setattr(knowledge, key, value)
+        # bulk_update 不触发 auto_now，updated_at 需显式写入
+        knowledge.updated_by = actor
+        knowledge.updated_at = now
+        groups[tuple(sorted(changed_fields))].append(knowledge)
+
+    for fields, knowledge_list in groups.items():
+        update_fields = ['space_tag' if name == 'space_tag_id' else name for name in fields]
+        Knowledge.objects.bulk_update(
+            knowledge_list,
+            [*update_fields, 'updated_by', 'updated_at'],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def _apply_tags(created: list[_ImportRow], updated: list[_ImportRow]) -> None:
+    through = Knowledge.tags.through
+    removals = Q()
+    for row in updated:
+        removed = row.current_tag_ids - set(row.tag_payload.tag_ids)
+        if removed:
+            removals |= Q(knowledge_id=row.knowledge.id, tag_id__in=removed)
+    if removals:
+        through.objects.filter(removals).delete()
+
+    additions = [
+        through(knowledge_id=row.knowledge.id, tag_id=tag_id)
+        for row in created
+        for tag_id in row.tag_payload.tag_ids
+    ] + [
+        through(knowledge_id=row.knowledge.id, tag_id=tag_id)
+        for row in updated
+        if row.tags_changed
+        for tag_id in row.tag_payload.tag_ids
+        if tag_id not in row.current_tag_ids
+    ]
+    through.objects.bulk_create(additions, batch_size=BATCH_SIZE)
+
+
+def sync_imported_knowledge(matched: list[tuple[int | None, dict]], *, actor) -> dict:
+    """落库已匹配的导入行 [(knowledge_id|None, payload)]，返回 {created, updated, unchanged}。"""
+    created, updated, unchanged = _plan_rows(matched)
+
+    for row in created:
+        knowledge = row.knowledge
+        knowledge.created_by = actor
+        knowledge.updated_by = actor
+        knowledge.content_preview = build_content_preview(knowledge.content)
+        knowledge.external_doc_id = doc_id_key(extract_doc_id(knowledge.external_doc_url))
+    _insert_knowledge(created)
+    _apply_updates(updated, actor=actor)
+    _apply_tags(created, updated)
+    refresh_knowledge_search_terms([
+        *(row.knowledge.id for row in created),
+        *(
+            row.knowledge.id
+            for row in updated
+            if row.space_changed or row.tags_changed or INDEXED_FIELDS & row.changed_fields.keys()
+        ),
+    ])
+    return {'created': len(created), 'updated': len(updated), 'unchanged': unchanged}
+
+
+def import_knowledge_rows(rows: list[tuple[int, dict]], *, actor, seen: dict[str, tuple[int, str]]) -> dict:
+    """匹配并落库一批导入行 [(表格行号, payload)]；seen 跨批记录已出现的文档 id，用于表格内查重。
+
+    返回 {created, updated, unchanged, failures}。
+    """
+    doc_index = load_doc_index(extract_doc_id(str(payload.get('external_doc_url') or '')) for _, payload in rows)
+    matched: list[tuple[int | None, dict]] = []
+    failures: list[dict] = []
+    for row_number, payload in rows:
+        knowledge_id, _doc_id, failure = match_doc_row(
+            row_number=row_number,
+            title=str(payload.get('title') or ''),
+            url=str(payload.get('external_doc_url') or ''),
+            doc_index=doc_index,
+            seen=seen,
+            require_match=False,
+        )
+        if failure:
+            failures.append(failure)
+            continue
+        matched.append((knowledge_id, payload))
+    return {**sync_imported_knowledge(matched, actor=actor), 'failures': failures}
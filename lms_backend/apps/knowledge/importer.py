@@ -0,0 +1,201 @@
+"""知识文档表格导入（XLSX，服务端流式解析）。
+
+原来由前端解析整张表再把全部行作为 JSON `items` 提交，表格越大请求体和两端内存越大。这里：
+
+- openpyxl `read_only` 模式逐行读取第一张表，表头与前端模板一致：标题、文档链接、space、标签、
+  简洁执行步骤、相关链接（必须完全一致）
+- 每 CHUNK_SIZE 行校验一次，按文档 id 匹配并集合式落库（`import_sync`），每块单独提交
+- space、标签按名称匹配，导入前一次查出全部可用于知识的标签；不存在的名称记为该行失败
+- 表格内重复文档 id 跨块判定；返回汇总和逐行失败（最多 MAX_REPORTED_FAILURES 条）
+- 损坏、加密或扩展名为 .xlsx 的其他文件按参数错误返回，不抛到 500
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import zipfile
+from typing import Iterable, Iterator
+from xml.etree.ElementTree import ParseError
+
+from django.db import transaction
+from django.db.models import Q
+
+from apps.tags.models import Tag
+from core.exceptions import BusinessError, ErrorCodes
+
+from .import_sync import import_knowledge_rows, row_failure
+from .serializers import KnowledgeWriteSerializer
+
+SUPPORTED_EXTENSIONS = {'.xlsx'}
+MAX_FILE_SIZE = 20 * 1024 * 1024
+CHUNK_SIZE = 500
+MAX_REPORTED_FAILURES = 500
+
+HEADER_TO_FIELD = {
+    '标题': 'title',
+    '文档链接': 'url',
+    'space': 'space',
+    '标签': 'tags',
+    '简洁执行步骤': 'content',
+    '相关链接': 'related_links',
+}
+HEADER_HINT = f'表头必须为：{"、".join(HEADER_TO_FIELD)}'
+UNREADABLE_FILE_MESSAGE = '无法读取表格文件，请确认是未加密的 .xlsx 文件'
+NAME_SEPARATOR = re.compile(r'[,，]')
+LINE_BREAK = re.compile(r'\r\n|\r|\n')
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _split_names(text: str) -> list[str]:
+    return [name.strip() for name in NAME_SEPARATOR.split(text) if name.strip()]
+
+
+def _iter_xlsx(file) -> Iterator[tuple]:
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    # 非 zip、缺少工作簿部件、XML 损坏分别抛出以下异常；只读模式下工作表 XML 在逐行读取时才解析
+    unreadable = (InvalidFileException, zipfile.BadZipFile, KeyError, ValueError, ParseError)
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except unreadable as exc:
+        raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message=UNREADABLE_FILE_MESSAGE) from exc
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    except unreadable as exc:
+        raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message=UNREADABLE_FILE_MESSAGE) from exc
+    finally:
+        workbook.close()
+
+
+def iter_knowledge_rows(file, filename: str) -> Iterator[tuple[int, dict]]:
+    """逐行产出 (表格行号, {字段: 文本})，跳过空行。"""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message='不支持的文件格式，仅支持 .xlsx')
+    columns = None
+    for row_number, row in enumerate(_iter_xlsx(file), start=1):
+        if columns is None:
+            columns = {}
+            for index, cell in enumerate(row):
+                header = _cell_text(cell)
+                if not header:
+                    continue
+                if header not in HEADER_TO_FIELD:
+                    raise BusinessError(
+                        code=ErrorCodes.VALIDATION_ERROR,
+                        message=f'未知表头「{header}」。{HEADER_HINT}',
+                    )
+                columns[index] = HEADER_TO_FIELD[header]
+            if not columns:
+                raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message=HEADER_HINT)
+            continue
+        values = {column: _cell_text(row[index]) for index, column in columns.items() if index < len(row)}
+        if any(values.values()):
+            yield row_number, values
+    if columns is None:
+        raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message='表格为空')
+
+
+def _parse_related_links(text: str) -> list[dict]:
+    """相关链接：逗号分隔，单项 url 或 名称|url。"""
+    links = []
+    for part in _split_names(text):
+        title, sep, url = part.partition('|')
+        links.append({'title': title.strip(), 'url': url.strip()} if sep else {'title': '', 'url': part})
+    return links
+
+
+class _TagLookup:
+    """按名称解析 space 和知识标签；导入前一次性加载。"""
+
+    def __init__(self):
+        self.spaces: dict[str, int] = {}
+        self.tags: dict[str, int] = {}
+        for tag_id, name, tag_type in Tag.objects.filter(
+            Q(tag_type='SPACE') | Q(tag_type='TAG', allow_knowledge=True),
+        ).values_list('id', 'name', 'tag_type'):
+            (self.spaces if tag_type == 'SPACE' else self.tags)[name.strip()] = tag_id
+
+    def space_id(self, name: str) -> int | None:
+        if not name:
+            return None
+        if name not in self.spaces:
+            raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message=f'space「{name}」不存在')
+        return self.spaces[name]
+
+    def tag_ids(self, text: str) -> list[int]:
+        names = list(dict.fromkeys(_split_names(text)))
+        missing = next((name for name in names if name not in self.tags), None)
+        if missing:
+            raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message=f'标签「{missing}」不存在')
+        return [self.tags[name] for name in names]
+
+
+def build_knowledge_row_payload(values: dict, tag_lookup: _TagLookup) -> dict:
+    """表格行 → 经 KnowledgeWriteSerializer 校验的写入 payload。"""
+    if not (values.get('title') or values.get('url') or values.get('content')):
+        raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message='标题、文档链接、简洁执行步骤都为空')
+    serializer = KnowledgeWriteSerializer(data={
+        'title': values.get('title', ''),
+        'external_doc_url': values.get('url', ''),
+        'content': LINE_BREAK.sub('<br>', values.get('content', '')),
+        'related_links': _parse_related_links(values.get('related_links', '')),
+        'space_tag_id': tag_lookup.space_id(values.get('space', '')),
+        'tag_ids': tag_lookup.tag_ids(values.get('tags', '')),
+    })
+    if not serializer.is_valid():
+        field, errors = next(iter(serializer.errors.items()))
+        if isinstance(errors, list) and errors and isinstance(errors[0], dict):
+            # 相关链接逐项报错：取第一条非空项
+            errors = next(iter(next(item for item in errors if item).values()))
+        raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message=f'{field}：{errors[0]}')
+    return dict(serializer.validated_data)
+
+
+def import_knowledge(
+    rows: Iterable[tuple[int, dict]],
+    *,
+    actor,
+    chunk_size: int = CHUNK_SIZE,
+) -> dict:
+    """导入知识，返回 {total, created, updated, unchanged, failed, failures: [{row_number, reason}]}。"""
+    tag_lookup = _TagLookup()
+    seen: dict[str, tuple[int, str]] = {}
+    report = {'total': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'failures': []}
+    chunk: list[tuple[int, dict]] = []
+
+    def add_failures(failures: list[dict]):
+        report['failed'] += len(failures)
+        room = MAX_REPORTED_FAILURES - len(report['failures'])
+        report['failures'].extend(failures[:max(room, 0)])
+
+    def flush():
+        if chunk:
+            with transaction.atomic():
+                result = import_knowledge_rows(chunk, actor=actor, seen=seen)
+            for key in ('created', 'updated', 'unchanged'):
+                report[key] += result[key]
+            add_failures(result['failures'])
+        chunk.clear()
+
+    for row_number, values in rows:
+        report['total'] += 1
+        try:
+            chunk.append((row_number, build_knowledge_row_payload(values, tag_lookup)))
+        except BusinessError as exc:
+            add_failures([row_failure(row_number, exc.message)])
+            continue
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+    report['failures'].sort(key=lambda failure: failure['row_number'])
+    return report
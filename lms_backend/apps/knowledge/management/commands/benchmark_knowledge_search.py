@@ -0,0 +1,63 @@
+"""Compare knowledge search latency: inverted index vs. icontains/iregex scan."""
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.knowledge.models import Knowledge
+from apps.knowledge.search import apply_knowledge_search, knowledge_search_filter
+from apps.knowledge.selectors import parse_knowledge_search_terms
+
+
+class Command(BaseCommand):
+    help = '在当前知识库上对比倒排索引检索与 icontains/iregex 全表扫描的耗时和命中数（只读）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='+', help='搜索串，可传多个（串内空格分词）')
+        parser.add_argument('--repeat', type=int, default=5, help='每个搜索串重复次数，取中位数')
+        parser.add_argument('--page-size', type=int, default=20, help='每次取第一页的条数，与列表接口一致')
+
+    def _measure(self, build_queryset, repeat: int, page_size: int) -> tuple[float, int]:
+        timings = []
+        count = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset = build_queryset()
+            count = queryset.count()
+            list(queryset[:page_size])
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), count
+
+    def _scan_queryset(self, terms: list[str]):
+        queryset = Knowledge.objects.all()
+        for term in terms:
+            queryset = queryset.filter(knowledge_search_filter(term))
+        return queryset.order_by('-updated_at', '-id')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['page_size'] < 1:
+            raise CommandError('--repeat、--page-size 必须大于 0')
+
+        self.stdout.write(f"{'搜索串':<16}{'全表扫描(ms)':>16}{'倒排索引(ms)':>16}{'命中数':>12}")
+        for query in options['queries']:
+            terms = parse_knowledge_search_terms(query)
+            if not terms:
+                continue
+            scan_ms, scan_count = self._measure(
+                lambda: self._scan_queryset(terms),
+                options['repeat'],
+                options['page_size'],
+            )
+            index_ms, index_count = self._measure(
+                lambda: apply_knowledge_search(Knowledge.objects.all(), terms).order_by(
+                    '-search_rank', '-updated_at', '-id',
+                ),
+                options['repeat'],
+                options['page_size'],
+            )
+            line = f'{query:<16}{scan_ms:>16.1f}{index_ms:>16.1f}{index_count:>12}'
+            if scan_count != index_count:
+                self.stdout.write(self.style.WARNING(f'{line}  （全表扫描命中 {scan_count}，索引可能需要重建）'))
+            else:
+                self.stdout.write(line)
@@ -0,0 +1,15 @@
+"""Rebuild the knowledge center search inverted index."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.knowledge.search import rebuild_knowledge_search_index
+
+
+class Command(BaseCommand):
+    help = '全量重建知识中心搜索倒排索引（标题、正文纯文本、space 与标签名称的单字和字符二元组）'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_knowledge_search_index()
+        self.stdout.write(self.style.SUCCESS(f'已重建 {total} 篇知识的搜索索引'))
@@ -0,0 +1,90 @@
+"""知识搜索倒排索引表，并为已有知识回填。"""
+
+import re
+import unicodedata
+from html import unescape
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 200
+_SEPARATOR = re.compile(r'[\W_]+')
+_SCRIPT_PATTERN = re.compile(r'<(script|style)\b[^>]*>.*?</\1>', re.IGNORECASE | re.DOTALL)
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def _index_terms(text):
+    # 与 core.text_search.search_chars / search_terms 保持一致
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if unicodedata.category(char) != 'Mn')
+    terms = set()
+    for run in _SEPARATOR.split(unicodedata.normalize('NFKC', stripped).lower()):
+        terms.update(run)
+        terms.update(run[index:index + 2] for index in range(len(run) - 1))
+    return terms
+
+
+def _html_to_text(content):
+    # 与 apps.knowledge.search.html_to_text 保持一致
+    return unescape(_TAG_PATTERN.sub(' ', _SCRIPT_PATTERN.sub(' ', content or '')))
+
+
+def forwards_backfill_search_terms(apps, schema_editor):
+    Knowledge = apps.get_model('knowledge', 'Knowledge')
+    KnowledgeSearchTerm = apps.get_model('knowledge', 'KnowledgeSearchTerm')
+    Through = Knowledge.tags.through
+
+    last_id = 0
+    while True:
+        rows = list(
+            Knowledge.objects.filter(id__gt=last_id).order_by('id').values_list(
+                'id', 'title', 'content', 'space_tag__name',
+            )[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        tag_names = {knowledge_id: [] for knowledge_id, _, _, _ in rows}
+        for knowledge_id, name in Through.objects.filter(knowledge_id__in=list(tag_names)).values_list('knowledge_id', 'tag__name'):
+            tag_names[knowledge_id].append(name)
+        terms = []
+        for knowledge_id, title, content, space_name in rows:
+            weights = {}
+            tags_text = ' '.join([space_name or '', *tag_names[knowledge_id]])
+            for text, weight in ((title, 5), (tags_text, 3), (_html_to_text(content), 1)):
+                for term in _index_terms(text):
+                    weights[term] = weights.get(term, 0) + weight
+            terms.extend(
+                KnowledgeSearchTerm(knowledge_id=knowledge_id, term=term, weight=weight)
+                for term, weight in weights.items()
+            )
+        KnowledgeSearchTerm.objects.bulk_create(terms, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0004_knowledge_order_by_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KnowledgeSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=2, verbose_name='单字或二元组')),
+                ('weight', models.PositiveSmallIntegerField(default=1, verbose_name='权重')),
+                ('knowledge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='knowledge.knowledge', verbose_name='知识文档')),
+            ],
+            options={
+                'verbose_name': '知识搜索索引',
+                'verbose_name_plural': '知识搜索索引',
+                'db_table': 'lms_knowledge_search_term',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='knowledgesearchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'knowledge'), name='uniq_knowledge_search_term'),
+        ),
+        migrations.RunPython(forwards_backfill_search_terms, migrations.RunPython.noop),
+    ]
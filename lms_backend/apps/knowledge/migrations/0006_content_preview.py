@@ -0,0 +1,67 @@
+"""知识与知识快照的列表预览落库，并为已有数据回填。"""
+
+import re
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+PREVIEW_TRUNCATION_MARKER = '…'
+
+
+def _sanitize_steps_html(html):
+    # 与 apps.knowledge.models.sanitize_steps_html 保持一致
+    text = html or ''
+    text = re.sub(r'<(script|style)\b[^>]*>.*?</\1>', '', text, flags=re.IGNORECASE | re.DOTALL)
+    text = re.sub(r'</p>', '<br>', text, flags=re.IGNORECASE)
+    text = re.sub(r'<p[^>]*>', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'<div[^>]*>', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'</div>', '<br>', text, flags=re.IGNORECASE)
+    text = re.sub(r'<(?!/?(?:br|strong|b)\b)[^>]+>', '', text, flags=re.IGNORECASE)
+    text = re.sub(r'<br\b[^>]*>', '<br>', text, flags=re.IGNORECASE)
+    text = re.sub(r'<(?:strong|b)\b[^>]*>', '<strong>', text, flags=re.IGNORECASE)
+    text = re.sub(r'</(?:strong|b)>', '</strong>', text, flags=re.IGNORECASE)
+    text = re.sub(r'(?:<br\s*/?\s*>\s*)+$', '', text, flags=re.IGNORECASE)
+    return text.strip()
+
+
+def _build_content_preview(content, max_chars=500):
+    # 与 apps.knowledge.models.build_content_preview 保持一致
+    html = _sanitize_steps_html(content)
+    if len(html) <= max_chars:
+        return html
+    return _sanitize_steps_html(re.sub(r'<[^>]*$', '', html[:max_chars])) + PREVIEW_TRUNCATION_MARKER
+
+
+def forwards_backfill_preview(apps, schema_editor):
+    for model_name in ('Knowledge', 'KnowledgeRevision'):
+        model = apps.get_model('knowledge', model_name)
+        last_id = 0
+        while True:
+            rows = list(model.objects.filter(id__gt=last_id).order_by('id').only('id', 'content')[:BATCH_SIZE])
+            if not rows:
+                break
+            last_id = rows[-1].id
+            for row in rows:
+                row.content_preview = _build_content_preview(row.content)
+            model.objects.bulk_update(rows, ['content_preview'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0005_knowledge_search_term'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='knowledge',
+            name='content_preview',
+            field=models.TextField(blank=True, default='', verbose_name='列表预览'),
+        ),
+        migrations.AddField(
+            model_name='knowledgerevision',
+            name='content_preview',
+            field=models.TextField(blank=True, default='', verbose_name='列表预览'),
+        ),
+        migrations.RunPython(forwards_backfill_preview, migrations.RunPython.noop),
+    ]
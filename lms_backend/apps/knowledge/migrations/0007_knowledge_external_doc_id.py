@@ -0,0 +1,49 @@
+"""知识文档 id 落库并建索引，为已有数据按文档链接回填。"""
+
+from urllib.parse import parse_qs, urlparse
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def _extract_doc_id(url):
+    # 与 apps.knowledge.doc_url.extract_doc_id 保持一致
+    raw = (url or '').strip()
+    if not raw:
+        return None
+    values = parse_qs(urlparse(raw).query).get('id') or []
+    doc_id = (values[0] if values else '').strip()
+    return doc_id or None
+
+
+def forwards_backfill_doc_id(apps, schema_editor):
+    Knowledge = apps.get_model('knowledge', 'Knowledge')
+    last_id = 0
+    while True:
+        rows = list(
+            Knowledge.objects.filter(id__gt=last_id).exclude(external_doc_url='')
+            .order_by('id').only('id', 'external_doc_url')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+        for row in rows:
+            row.external_doc_id = (_extract_doc_id(row.external_doc_url) or '')[:255]
+        Knowledge.objects.bulk_update(rows, ['external_doc_id'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0006_content_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='knowledge',
+            name='external_doc_id',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255, verbose_name='文档 id'),
+        ),
+        migrations.RunPython(forwards_backfill_doc_id, migrations.RunPython.noop),
+    ]
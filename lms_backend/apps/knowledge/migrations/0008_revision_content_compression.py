@@ -0,0 +1,75 @@
+"""知识快照正文改为压缩存储，并压缩已有数据。"""
+
+import base64
+import zlib
+
+import apps.knowledge.fields
+from django.conf import settings
+from django.db import migrations
+
+BATCH_SIZE = 200
+COMPRESSED_PREFIX = '\x1fzlib:'
+
+
+def _compress_text(text, config):
+    # 与 apps.knowledge.fields.compress_text 保持一致
+    raw = text.encode('utf-8')
+    encoded = COMPRESSED_PREFIX + base64.b64encode(zlib.compress(raw, config['LEVEL'])).decode('ascii')
+    if text.startswith(COMPRESSED_PREFIX):
+        return encoded
+    if not config['ENABLED'] or len(raw) < config['MIN_BYTES']:
+        return text
+    return encoded if len(encoded) < len(raw) else text
+
+
+def _decompress_text(value):
+    # 与 apps.knowledge.fields.decompress_text 保持一致
+    if not value.startswith(COMPRESSED_PREFIX):
+        return value
+    return zlib.decompress(base64.b64decode(value[len(COMPRESSED_PREFIX):])).decode('utf-8')
+
+
+def _rewrite_content(apps, convert):
+    KnowledgeRevision = apps.get_model('knowledge', 'KnowledgeRevision')
+    last_id = 0
+    while True:
+        rows = list(
+            KnowledgeRevision.objects.filter(id__gt=last_id).order_by('id').only('id', 'content')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+        changed = []
+        for row in rows:
+            content = convert(row.content)
+            if content != row.content:
+                row.content = content
+                changed.append(row)
+        KnowledgeRevision.objects.bulk_update(changed, ['content'], batch_size=BATCH_SIZE)
+
+
+def forwards_compress_content(apps, schema_editor):
+    config = settings.KNOWLEDGE_CONTENT_COMPRESSION
+    if config['ENABLED']:
+        _rewrite_content(apps, lambda content: _compress_text(content, config))
+
+
+def backwards_decompress_content(apps, schema_editor):
+    _rewrite_content(apps, _decompress_text)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0007_knowledge_external_doc_id'),
+    ]
+
+    operations = [
+        # 先以 TextField 读写原始列值，再切换字段类型；回滚时顺序相反
+        migrations.RunPython(forwards_compress_content, backwards_decompress_content),
+        migrations.AlterField(
+            model_name='knowledgerevision',
+            name='content',
+            field=apps.knowledge.fields.CompressedTextField(blank=True, default='', verbose_name='步骤摘要'),
+        ),
+    ]
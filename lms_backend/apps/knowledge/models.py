@@ -7,6 +7,9 @@ from django.db import models
 from apps.tags.models import Tag
 from core.mixins import CreatorMixin, TimestampMixin
 
+from .doc_url import DOC_ID_MAX_LENGTH, doc_id_key, extract_doc_id
+from .fields import CompressedTextField
+
 
 def sanitize_steps_html(html: str) -> str:
     """清洗步骤摘要，仅保留裸 br / strong（剥掉全部属性，防 XSS）。"""
@@ -24,12 +27,16 @@ def sanitize_steps_html(html: str) -> str:
     return text.strip()
 
 
+PREVIEW_TRUNCATION_MARKER = '…'
+
+
 def build_content_preview(content: str, max_chars: int = 500) -> str:
-    """列表预览：轻量 HTML；超长硬截断后再洗一次（视觉截断交给前端 line-clamp）。"""
+    """列表预览：先洗成轻量 HTML，超长硬截断后再洗一次并追加截断标记（视觉截断交给前端 line-clamp）。"""
     html = sanitize_steps_html(content)
     if len(html) <= max_chars:
         return html
-    return sanitize_steps_html(html[:max_chars])
+    # 截断点可能落在标签中间，先去掉残缺的尾部标签
+    return sanitize_steps_html(re.sub(r'<[^>]*$', '', html[:max_chars])) + PREVIEW_TRUNCATION_MARKER
 
 
 class Knowledge(TimestampMixin, CreatorMixin, models.Model):
@@ -53,6 +60,8 @@ class Knowledge(TimestampMixin, CreatorMixin, models.Model):
         limit_choices_to={'tag_type': 'TAG'},
     )
     content = models.TextField(blank=True, default='', verbose_name='步骤摘要')
+    # 写入时由 build_content_preview 生成，列表只读该列、不加载 content
+    content_preview = models.TextField(blank=True, default='', verbose_name='列表预览')
     external_doc_url = models.URLField(
         max_length=500,
         blank=True,
@@ -60,6 +69,14 @@ class Knowledge(TimestampMixin, CreatorMixin, models.Model):
         verbose_name='文档链接',
         help_text='第三方文档查看链接，编辑时追加 mode=edit',
     )
+    # 由 external_doc_url 的 query.id 派生，save() 时自动维护；批量导入/删除按它匹配
+    external_doc_id = models.CharField(
+        max_length=DOC_ID_MAX_LENGTH,
+        blank=True,
+        default='',
+        db_index=True,
+        verbose_name='文档 id',
+    )
     updated_by = models.ForeignKey(
         'users.User',
         on_delete=models.SET_NULL,
@@ -85,16 +102,23 @@ class Knowledge(TimestampMixin, CreatorMixin, models.Model):
     def __str__(self):
         return self.title
 
-    def increment_view_count(self):
-        from django.db.models import F
+    def save(self, *args, **kwargs):
+        # bulk_create / bulk_update 不经过这里，调用方需自行设置 external_doc_id
+        self.external_doc_id = doc_id_key(extract_doc_id(self.external_doc_url))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'external_doc_url' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'external_doc_id'}
+        super().save(*args, **kwargs)
 
-        Knowledge.objects.filter(pk=self.pk).update(view_count=F('view_count') + 1)
-        self.refresh_from_db(fields=['view_count'])
-        return self.view_count
+    def increment_view_count(self):
+        """记录一次阅读，返回含本进程未落库增量的阅读次数（见 view_counts）。"""
+        from .view_counts import record_view
 
-    @property
-    def content_preview(self):
-        return build_content_preview(self.content)
+        pending = record_view(self.pk)
+        if pending is None:
+            self.refresh_from_db(fields=['view_count'])
+            return self.view_count
+        return self.view_count + pending
 
 
 class KnowledgeRevision(TimestampMixin, CreatorMixin, models.Model):
@@ -110,7 +134,9 @@ class KnowledgeRevision(TimestampMixin, CreatorMixin, models.Model):
     )
     revision_number = models.PositiveIntegerField(default=1, verbose_name='快照版本号')
     title = models.CharField(max_length=200, verbose_name='标题')
-    content = models.TextField(blank=True, default='', verbose_name='步骤摘要')
+    # 大正文压缩存储，读写透明（见 fields.CompressedTextField）
+    content = CompressedTextField(blank=True, default='', verbose_name='步骤摘要')
+    content_preview = models.TextField(blank=True, default='', verbose_name='列表预览')
     external_doc_url = models.URLField(
         max_length=500,
         blank=True,
@@ -137,6 +163,26 @@ class KnowledgeRevision(TimestampMixin, CreatorMixin, models.Model):
     def __str__(self):
         return f'{self.title} v{self.revision_number}'
 
-    @property
-    def content_preview(self):
-        return build_content_preview(self.content)
+
+class KnowledgeSearchTerm(models.Model):
+    """知识搜索倒排索引：标题、正文纯文本、space 与标签名称的单字和字符二元组 → 知识。"""
+
+    term = models.CharField(max_length=2, verbose_name='单字或二元组')
+    knowledge = models.ForeignKey(
+        Knowledge,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='知识文档',
+    )
+    weight = models.PositiveSmallIntegerField(default=1, verbose_name='权重')
+
+    class Meta:
+        db_table = 'lms_knowledge_search_term'
+        verbose_name = '知识搜索索引'
+        verbose_name_plural = '知识搜索索引'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'knowledge'],
+                name='uniq_knowledge_search_term',
+            ),
+        ]
@@ -0,0 +1,425 @@
+"""知识文档解析任务：有界进程池异步解析，按文件内容哈希缓存结果。
+
+python-docx / python-pptx / pdfplumber 都是纯 Python 的 CPU 密集解析，10MB 的 PDF 会占住请求 worker
+数秒并持有 GIL。上传接口改为：
+
+- 校验大小/格式后计算文件 sha256；结果缓存命中直接返回，同一文件重复上传不再解析
+- 未命中时把上传落到临时文件，提交到本进程的进程池（MAX_WORKERS 个子进程），立即返回 job_id；
+  同一内容正在解析时不再提交，而是登记一个跟随该任务的 job_id，建议标题仍按本次上传的文件名兜底
+- 前端轮询 `GET /api/knowledge/parse-document/<job_id>/`，得到 pending / done / failed
+- 单个任务在子进程内用 SIGALRM 限时（TIMEOUT_SECONDS）；子进程初始化时用 RLIMIT_AS 限制在 fork 时
+  基础上可新增的内存（MEMORY_LIMIT_MB）。超时或超内存只让该任务失败，子进程继续复用
+- 本进程排队加执行中的任务超过 MAX_PENDING 时拒绝新任务；子进程异常退出（BrokenProcessPool）时重建进程池
+- PDF/PPTX 逐页解析，子进程每隔 PROGRESS_INTERVAL_SECONDS 经队列回报进度，由本进程的线程写入缓存，
+  轮询 pending 时附带 progress（子进程不直接访问缓存连接）
+- 带 preview_pages 上传 PDF/PPTX 时先在请求内解析前 N 页作为 preview 随任务返回；文档不超过 N 页时预览即全文，
+  直接写入结果缓存并返回 done，不再提交任务。DOCX 不分页，预览等于请求内整篇解析，不给预览，照常走进程池
+
+缓存键：
+- `{prefix}:v{VERSION}:result:{sha256}{ext}`：{title, content}，title 为文档内标题，文件名兜底在返回时做
+- `{prefix}:job:{job_id}`：任务状态、文件名和最长等待截止时间；跟随任务另记 source_job_id，状态读被跟随的任务
+- `{prefix}:running:{sha256}{ext}`：进行中的任务 id，用于去重
+- `{prefix}:progress:{job_id}`：{done, total}，已处理页数
+
+进程池在各应用进程内懒创建，任务状态写在缓存里，轮询落到任何进程都能读到，因此必须使用多进程共享缓存
+（Redis/Memcached 等）；配置为 LocMemCache 时退回请求内同步解析，除非显式 ALLOW_LOCAL_CACHE。
+提交任务的进程中途退出时，任务超过最长等待时间后按失败返回，前端重新上传即可。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from core.exceptions import BusinessError, ErrorCodes
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+HASH_CHUNK_SIZE = 1024 * 1024
+PROGRESS_INTERVAL_SECONDS = 0.5
+PREVIEW_EXTENSIONS = {'.pdf', '.pptx'}
+
+_local_cache_warned = False
+_pool: ProcessPoolExecutor | None = None
+_pool_progress = None
+_pending_count = 0
+_lock = threading.Lock()
+# 子进程内：进度回报队列，由进程池 initializer 设置
+_worker_progress = None
+
+
+class _ParseTimeout(Exception):
+    pass
+
+
+def _config() -> dict:
+    return settings.KNOWLEDGE_DOCUMENT_PARSE
+
+
+def _cache():
+    return caches[_config()['CACHE_ALIAS']]
+
+
+def async_parse_enabled() -> bool:
+    global _local_cache_warned
+
+    config = _config()
+    if config['MAX_WORKERS'] <= 0:
+        return False
+    if isinstance(_cache(), LocMemCache) and not config['ALLOW_LOCAL_CACHE']:
+        if not _local_cache_warned:
+            logger.warning('文档异步解析需要多进程共享缓存，当前为 LocMemCache，已退回请求内同步解析')
+            _local_cache_warned = True
+        return False
+    return True
+
+
+def _result_key(content_key: str) -> str:
+    config = _config()
+    return f"{config['KEY_PREFIX']}:v{config['VERSION']}:result:{content_key}"
+
+
+def _job_key(job_id: str) -> str:
+    return f"{_config()['KEY_PREFIX']}:job:{job_id}"
+
+
+def _running_key(content_key: str) -> str:
+    return f"{_config()['KEY_PREFIX']}:running:{content_key}"
+
+
+def _progress_key(job_id: str) -> str:
+    return f"{_config()['KEY_PREFIX']}:progress:{job_id}"
+
+
+def _max_wait_seconds() -> int:
+    """排队上限内最坏的等待：每个子进程串行跑满 MAX_PENDING / MAX_WORKERS 轮超时任务。"""
+    config = _config()
+    rounds = -(-config['MAX_PENDING'] // config['MAX_WORKERS'])
+    return config['TIMEOUT_SECONDS'] * rounds + 30
+
+
+def file_digest(file) -> str:
+    digest = hashlib.sha256()
+    for chunk in file.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def build_parse_result(title: str | None, content: str, filename: str, ext: str) -> dict:
+    # document 的接口依赖本模块，这里延迟导入
+    from .document import DocumentParserService
+
+    return {
+        'status': DONE,
+        'suggested_title': DocumentParserService().suggest_title(title, filename),
+        'content': content,
+        'file_type': ext.lstrip('.'),
+    }
+
+
+# ---- 子进程 ----
+
+def _current_address_space() -> int | None:
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def _init_worker(memory_limit_mb: int, progress_queue) -> None:
+    """子进程初始化：忽略 Ctrl-C（由父进程统一退出），记下进度队列，并限制可新增的地址空间。"""
+    global _worker_progress
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_progress = progress_queue
+    if memory_limit_mb <= 0:
+        return
+    try:
+        import resource
+    except ImportError:  # 非 Unix 平台不限制
+        return
+    base = _current_address_space()
+    if base is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = base + memory_limit_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _raise_timeout(signum, frame):
+    raise _ParseTimeout()
+
+
+def _run_parse(job_id: str, path: str, ext: str, timeout_seconds: int) -> tuple[str, object]:
+    """子进程内执行：限时解析临时文件，返回 (DONE, {title, content}) 或 (FAILED, 原因)。"""
+    from .document import DocumentParserService
+
+    last_reported = 0.0
+
+    def report_progress(done: int, total: int) -> None:
+        nonlocal last_reported
+        now = time.monotonic()
+        if done < total and now - last_reported < PROGRESS_INTERVAL_SECONDS:
+            return
+        last_reported = now
+        _worker_progress.put((job_id, done, total))
+
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout_seconds)
+    try:
+        with open(path, 'rb') as file:
+            title, content = DocumentParserService().parse_content(file, ext, progress=report_progress)
+    except _ParseTimeout:
+        return FAILED, f'文档解析超时（超过 {timeout_seconds} 秒）'
+    except MemoryError:
+        return FAILED, '文档解析占用内存超出限制'
+    except Exception:
+        logger.exception('文档解析失败: %s', ext)
+        return FAILED, '文档解析失败，请确认文件未损坏或加密'
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    return DONE, {'title': title, 'content': content}
+
+
+# ---- 应用进程 ----
+
+def _drain_progress(progress_queue) -> None:
+    """本进程的线程：把子进程回报的进度写入缓存，读到 None 时退出。"""
+    cache = _cache()
+    while True:
+        item = progress_queue.get()
+        if item is None:
+            return
+        job_id, done, total = item
+        try:
+            cache.set(_progress_key(job_id), {'done': done, 'total': total}, timeout=_max_wait_seconds())
+        except Exception:
+            logger.exception('文档解析进度写入失败: %s', job_id)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool, _pool_progress
+    with _lock:
+        if _pool is None:
+            config = _config()
+            _pool_progress = multiprocessing.SimpleQueue()
+            _pool = ProcessPoolExecutor(
+                max_workers=config['MAX_WORKERS'],
+                initializer=_init_worker,
+                initargs=(config['MEMORY_LIMIT_MB'], _pool_progress),
+            )
+            threading.Thread(
+                target=_drain_progress,
+                args=(_pool_progress,),
+                name='knowledge-parse-progress',
+                daemon=True,
+            ).start()
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool, _pool_progress
+    with _lock:
+        if _pool is not pool:
+            return
+        _pool = None
+        _pool_progress.put(None)
+        _pool_progress = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _spool(file, ext: str) -> str:
+    """上传文件在请求结束后即被清理，先复制到子进程可读的临时文件。"""
+    with tempfile.NamedTemporaryFile(prefix='lms-parse-', suffix=ext, delete=False) as spooled:
+        for chunk in file.chunks(HASH_CHUNK_SIZE):
+            spooled.write(chunk)
+    return spooled.name
+
+
+def _submit(job_id: str, path: str, ext: str) -> tuple[ProcessPoolExecutor, Future]:
+    timeout_seconds = _config()['TIMEOUT_SECONDS']
+    pool = _get_pool()
+    try:
+        return pool, pool.submit(_run_parse, job_id, path, ext, timeout_seconds)
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        pool = _get_pool()
+        return pool, pool.submit(_run_parse, job_id, path, ext, timeout_seconds)
+
+
+def _finish_job(job_id: str, content_key: str, path: str, pool: ProcessPoolExecutor, future: Future) -> None:
+    """进程池回调（在进程池的管理线程执行）：写回结果和任务状态。"""
+    global _pending_count
+
+    with _lock:
+        _pending_count -= 1
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+    try:
+        status, result = future.result()
+    except BrokenProcessPool:
+        logger.error('文档解析子进程异常退出，重建进程池')
+        _discard_pool(pool)
+        status, result = FAILED, '文档解析进程异常退出，请重试'
+    except Exception:
+        logger.exception('文档解析任务失败: %s', job_id)
+        status, result = FAILED, '文档解析失败，请重试'
+
+    config = _config()
+    cache = _cache()
+    try:
+        if status == DONE:
+            cache.set(_result_key(content_key), result, timeout=config['TTL_SECONDS'])
+        job = cache.get(_job_key(job_id))
+        if job is not None:
+            job.update(status=status, message='' if status == DONE else result)
+            cache.set(_job_key(job_id), job, timeout=config['TTL_SECONDS'])
+        cache.delete_many([_running_key(content_key), _progress_key(job_id)])
+    except Exception:
+        logger.exception('文档解析结果写回失败: %s', job_id)
+
+
+def _build_preview(file, ext: str, max_pages: int) -> tuple[dict | None, dict | None]:
+    """请求内解析前 max_pages 页，返回 (preview, 可直接缓存的全文结果)；DOCX 或解析失败时不给预览，交给任务处理。"""
+    from .document import DocumentParserService
+
+    if ext not in PREVIEW_EXTENSIONS:
+        return None, None
+    try:
+        title, content, page_count = DocumentParserService().parse_preview(file, ext, max_pages)
+    except Exception:
+        logger.warning('文档预览解析失败: %s', file.name, exc_info=True)
+        return None, None
+    if page_count <= max_pages:
+        return None, {'title': title, 'content': content}
+    preview = build_parse_result(title, content, file.name, ext)
+    del preview['status']
+    preview.update(page_count=page_count, truncated=True)
+    return preview, None
+
+
+def submit_parse_job(file, ext: str, preview_pages: int | None = None) -> dict:
+    """上传文件（已通过 DocumentParserService.validate）：命中缓存时直接返回结果，否则返回待轮询的任务。
+
+    preview_pages 给定时，未命中缓存的 PDF/PPTX 任务附带前 N 页的 preview；文档不超过 N 页时直接返回 done。
+    """
+    global _pending_count
+
+    config = _config()
+    cache = _cache()
+    content_key = f'{file_digest(file)}{ext}'
+    cached = cache.get(_result_key(content_key))
+    if cached is not None:
+        return build_parse_result(cached['title'], cached['content'], file.name, ext)
+
+    preview = None
+    if preview_pages:
+        preview, complete = _build_preview(file, ext, preview_pages)
+        if complete is not None:
+            cache.set(_result_key(content_key), complete, timeout=config['TTL_SECONDS'])
+            return build_parse_result(complete['title'], complete['content'], file.name, ext)
+
+    running_job_id = cache.get(_running_key(content_key))
+    running_job = cache.get(_job_key(running_job_id)) if running_job_id else None
+    if running_job is not None:
+        return _pending_payload(_follow_job(running_job_id, running_job, file.name), preview)
+
+    with _lock:
+        if _pending_count >= config['MAX_PENDING']:
+            raise BusinessError(code=ErrorCodes.INVALID_OPERATION, message='文档解析任务繁忙，请稍后重试')
+        _pending_count += 1
+
+    job_id = uuid.uuid4().hex
+    max_wait = _max_wait_seconds()
+    path = None
+    try:
+        path = _spool(file, ext)
+        cache.set(_job_key(job_id), {
+            'status': PENDING,
+            'content_key': content_key,
+            'filename': file.name,
+            'ext': ext,
+            'deadline': time.time() + max_wait,
+        }, timeout=config['TTL_SECONDS'])
+        cache.set(_running_key(content_key), job_id, timeout=max_wait)
+        pool, future = _submit(job_id, path, ext)
+    except Exception:
+        with _lock:
+            _pending_count -= 1
+        if path:
+            os.unlink(path)
+        cache.delete(_running_key(content_key))
+        raise
+    future.add_done_callback(lambda done: _finish_job(job_id, content_key, path, pool, done))
+    return _pending_payload(job_id, preview)
+
+
+def _follow_job(source_job_id: str, source_job: dict, filename: str) -> str:
+    """同内容任务进行中：为本次上传登记跟随任务，结果按本次的文件名给出建议标题。"""
+    job_id = uuid.uuid4().hex
+    _cache().set(_job_key(job_id), {
+        'status': PENDING,
+        'content_key': source_job['content_key'],
+        'filename': filename,
+        'ext': source_job['ext'],
+        'deadline': source_job['deadline'],
+        'source_job_id': source_job_id,
+    }, timeout=_config()['TTL_SECONDS'])
+    return job_id
+
+
+def _pending_payload(job_id: str, preview: dict | None) -> dict:
+    payload = {'status': PENDING, 'job_id': job_id}
+    if preview is not None:
+        payload['preview'] = preview
+    return payload
+
+
+def get_parse_job(job_id: str) -> dict:
+    """轮询任务：pending 附带已处理页数 progress，done 返回解析结果，failed 附带原因。"""
+    cache = _cache()
+    job = cache.get(_job_key(job_id))
+    if job is None:
+        raise BusinessError(code=ErrorCodes.RESOURCE_NOT_FOUND, message='解析任务不存在或已过期')
+
+    # 跟随任务的状态和进度取自被跟随的任务，文件名用自己的
+    state_job_id = job.get('source_job_id', job_id)
+    state = cache.get(_job_key(state_job_id)) if state_job_id != job_id else job
+    if state is None:
+        state_job_id, state = job_id, job
+
+    if state['status'] == PENDING:
+        if time.time() <= state['deadline']:
+            return {'status': PENDING, 'job_id': job_id, 'progress': cache.get(_progress_key(state_job_id))}
+        return {'status': FAILED, 'job_id': job_id, 'message': '文档解析超时，请重新上传'}
+    if state['status'] == FAILED:
+        return {'status': FAILED, 'job_id': job_id, 'message': state['message']}
+
+    result = cache.get(_result_key(job['content_key']))
+    if result is None:
+        return {'status': FAILED, 'job_id': job_id, 'message': '解析结果已过期，请重新上传'}
+    return {'job_id': job_id, **build_parse_result(result['title'], result['content'], job['filename'], job['ext'])}
@@ -0,0 +1,151 @@
+"""知识中心搜索倒排索引。
+
+原来每个搜索词都对标题、正文、space、标签做 icontains，再对标题/正文追加 `a.*b.*c` 的 iregex
+有序模糊匹配，标签 join 又要整体 distinct，是知识中心最重的读。这里把标题、正文纯文本、space 名称
+和标签名称切成单字与字符二元组（`core.text_search`）写入 `KnowledgeSearchTerm`：
+
+- 搜索词之间为“且”；每个词取全部单字的倒排记录求交集作为候选（精确匹配和有序模糊匹配都要求
+  包含全部单字），再只在候选上核对原有的 icontains / iregex 条件
+- 相关度为命中二元组（单字词取单字）的权重和：标题 > space/标签 > 正文，同分按更新时间倒序
+- 搜索词全是标点（切不出单字）时退回原有条件
+
+维护时机：知识创建/更新（含批量导入）、标签改名/合并/删除；删除知识时级联删除。
+历史数据或漂移用 `python manage.py rebuild_knowledge_search_index` 重建。
+"""
+
+from __future__ import annotations
+
+import re
+from html import unescape
+from typing import Iterable
+
+from django.db.models import Count, Exists, IntegerField, OuterRef, Q, QuerySet, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from core.text_search import search_chars, search_terms
+
+from .models import Knowledge, KnowledgeSearchTerm
+
+BATCH_SIZE = 200
+TITLE_WEIGHT = 5
+TAG_WEIGHT = 3
+CONTENT_WEIGHT = 1
+
+_SCRIPT_PATTERN = re.compile(r'<(script|style)\b[^>]*>.*?</\1>', re.IGNORECASE | re.DOTALL)
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def html_to_text(content: str) -> str:
+    """正文 HTML → 纯文本，标签处断开，避免把标签名和属性写进索引。"""
+    return unescape(_TAG_PATTERN.sub(' ', _SCRIPT_PATTERN.sub(' ', content or '')))
+
+
+def _weighted_terms(title: str, content: str, tag_names: Iterable[str]) -> dict[str, int]:
+    weights: dict[str, int] = {}
+    for text, weight in (
+        (title, TITLE_WEIGHT),
+        (' '.join(tag_names), TAG_WEIGHT),
+        (html_to_text(content), CONTENT_WEIGHT),
+    ):
+        for term in search_chars(text) | search_terms(text):
+            weights[term] = weights.get(term, 0) + weight
+    return weights
+
+
+def _build_rows(knowledge_ids: list[int]) -> list[KnowledgeSearchTerm]:
+    tag_names: dict[int, list[str]] = {knowledge_id: [] for knowledge_id in knowledge_ids}
+    for knowledge_id, name in Knowledge.tags.through.objects.filter(
+        knowledge_id__in=knowledge_ids,
+    ).values_list('knowledge_id', 'tag__name'):
+        tag_names[knowledge_id].append(name)
+    return [
+        KnowledgeSearchTerm(knowledge_id=knowledge_id, term=term, weight=weight)
+        for knowledge_id, title, content, space_name in Knowledge.objects.filter(
+            id__in=knowledge_ids,
+        ).values_list('id', 'title', 'content', 'space_tag__name')
+        for term, weight in _weighted_terms(
+            title,
+            content,
+            [space_name or '', *tag_names[knowledge_id]],
+        ).items()
+    ]
+
+
+def refresh_knowledge_search_terms(knowledge_ids: Iterable[int]) -> None:
+    """按当前标题、正文、space 与标签名称重建这些知识的倒排记录。"""
+    knowledge_ids = sorted(set(knowledge_ids))
+    for start in range(0, len(knowledge_ids), BATCH_SIZE):
+        batch_ids = knowledge_ids[start:start + BATCH_SIZE]
+        KnowledgeSearchTerm.objects.filter(knowledge_id__in=batch_ids).delete()
+        # 折叠后仍可能有排序规则视为相等的词项，冲突时保留先写入的一条
+        KnowledgeSearchTerm.objects.bulk_create(_build_rows(batch_ids), batch_size=1000, ignore_conflicts=True)
+
+
+def rebuild_knowledge_search_index() -> int:
+    """全量重建倒排索引，返回知识数。"""
+    total = 0
+    last_id = 0
+    while True:
+        batch_ids = list(
+            Knowledge.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BATCH_SIZE]
+        )
+        if not batch_ids:
+            return total
+        last_id = batch_ids[-1]
+        refresh_knowledge_search_terms(batch_ids)
+        total += len(batch_ids)
+
+
+def tagged_knowledge_ids(tag_ids: Iterable[int]) -> list[int]:
+    """引用这些标签（作为 space 或普通标签）的知识 id，标签变更前调用。"""
+    tag_ids = list(tag_ids)
+    space_ids = Knowledge.objects.filter(space_tag_id__in=tag_ids).values_list('id', flat=True)
+    tag_item_ids = Knowledge.tags.through.objects.filter(tag_id__in=tag_ids).values_list('knowledge_id', flat=True)
+    return list({*space_ids, *tag_item_ids})
+
+
+def build_ordered_fuzzy_pattern(term: str) -> str:
+    return '.*'.join(re.escape(char) for char in term)
+
+
+def knowledge_search_filter(term: str) -> Q:
+    """单个搜索词的匹配条件：标题/正文/space/标签包含，或标题/正文按字有序包含（两字及以上）。"""
+    tag_match = Knowledge.tags.through.objects.filter(knowledge_id=OuterRef('pk'), tag__name__icontains=term)
+    exact_query = (
+        Q(title__icontains=term)
+        | Q(content__icontains=term)
+        | Q(space_tag__name__icontains=term)
+        | Q(Exists(tag_match))
+    )
+    if len(term) < 2:
+        return exact_query
+
+    fuzzy_pattern = build_ordered_fuzzy_pattern(term)
+    return exact_query | Q(title__iregex=fuzzy_pattern) | Q(content__iregex=fuzzy_pattern)
+
+
+def apply_knowledge_search(queryset: QuerySet, terms: list[str]) -> QuerySet:
+    """倒排索引检索：逐词按单字交集取候选并在候选上核对，标注相关度 search_rank。"""
+    rank_terms: set[str] = set()
+    for term in terms:
+        chars = search_chars(term)
+        if chars:
+            candidates = (
+                KnowledgeSearchTerm.objects.filter(term__in=chars)
+                .values('knowledge_id')
+                .annotate(matched=Count('term'))
+                .filter(matched=len(chars))
+            )
+            queryset = queryset.filter(id__in=candidates.values('knowledge_id'))
+            rank_terms |= search_terms(term) or chars
+        queryset = queryset.filter(knowledge_search_filter(term))
+
+    if not rank_terms:
+        return queryset.annotate(search_rank=Value(0))
+    rank = (
+        KnowledgeSearchTerm.objects.filter(knowledge_id=OuterRef('pk'), term__in=rank_terms)
+        .values('knowledge_id')
+        .annotate(rank=Sum('weight'))
+        .values('rank')[:1]
+    )
+    return queryset.annotate(search_rank=Coalesce(Subquery(rank, output_field=IntegerField()), 0))
@@ -4,9 +4,10 @@ from __future__ import annotations
 
 import re
 
-from django.db.models import Q, QuerySet
+from django.db.models import QuerySet
 
 from .models import Knowledge
+from .search import apply_knowledge_search
 
 
 SEARCH_SPLIT_PATTERN = re.compile(r'[\s,，;；、|/]+')
@@ -27,24 +28,6 @@ def parse_knowledge_search_terms(search: str | None) -> list[str]:
     return terms
 
 
-def build_ordered_fuzzy_pattern(term: str) -> str:
-    return '.*'.join(re.escape(char) for char in term)
-
-
-def build_knowledge_search_query(term: str) -> Q:
-    exact_query = (
-        Q(title__icontains=term)
-        | Q(content__icontains=term)
-        | Q(space_tag__name__icontains=term)
-        | Q(tags__name__icontains=term)
-    )
-    if len(term) < 2:
-        return exact_query
-
-    fuzzy_pattern = build_ordered_fuzzy_pattern(term)
-    return exact_query | Q(title__iregex=fuzzy_pattern) | Q(content__iregex=fuzzy_pattern)
-
-
 def knowledge_base_queryset() -> QuerySet:
     return Knowledge.objects.select_related(
         'created_by',
@@ -62,15 +45,17 @@ def get_knowledge_queryset(
     search: str | None = None,
     ordering: str = '-updated_at',
 ) -> QuerySet:
-    qs = knowledge_base_queryset()
+    # 列表只下发 content_preview，不加载完整正文
+    qs = knowledge_base_queryset().defer('content')
     if filters:
         if filters.get('space_tag_id') is not None:
             qs = qs.filter(space_tag_id=filters['space_tag_id'])
         if filters.get('tag_id'):
             qs = qs.filter(tags__id=filters['tag_id'])
-    for term in parse_knowledge_search_terms(search):
-        qs = qs.filter(build_knowledge_search_query(term))
+    search_terms = parse_knowledge_search_terms(search)
+    if search_terms:
+        qs = apply_knowledge_search(qs, search_terms)
     if ordering:
-        # -id：同秒更新时新建/后写入的仍靠前
-        qs = qs.order_by(ordering, '-id')
-    return qs.distinct()
+        # 搜索时先按相关度；-id：同秒更新时新建/后写入的仍靠前
+        qs = qs.order_by(*(['-search_rank'] if search_terms else []), ordering, '-id')
+    return qs
@@ -5,6 +5,7 @@ from rest_framework import serializers
 from apps.tags.serializers import TagSimpleSerializer
 
 from .models import Knowledge, sanitize_steps_html
+from .view_counts import pending_views
 
 
 def _get_metadata_source(obj):
@@ -95,7 +96,7 @@ class KnowledgeListSerializer(serializers.Serializer):
         source = _get_metadata_source(obj)
         if source is None:
             return None
-        return source.view_count
+        return source.view_count + pending_views(source.pk)
 
 
 class KnowledgeDetailSerializer(KnowledgeListSerializer):
@@ -149,11 +150,11 @@ class KnowledgeUpdateSerializer(serializers.ModelSerializer):
         return _normalize_knowledge_payload(attrs)
 
 
-class KnowledgeImportItemSerializer(KnowledgeCreateSerializer):
+class KnowledgeImportItemSerializer(KnowledgeWriteSerializer):
     row_number = serializers.IntegerField(min_value=1)
 
-    class Meta(KnowledgeCreateSerializer.Meta):
-        fields = [*KnowledgeCreateSerializer.Meta.fields, 'row_number']
+    class Meta(KnowledgeWriteSerializer.Meta):
+        fields = [*KnowledgeWriteSerializer.Meta.fields, 'row_number']
 
 
 class KnowledgeBulkImportSerializer(serializers.Serializer):
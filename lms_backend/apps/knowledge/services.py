@@ -4,34 +4,27 @@ from __future__ import annotations
 
 import hashlib
 import json
-from collections import defaultdict
 
 from apps.activity_logs.decorators import log_content_action
 from django.db import transaction
 
-from apps.tags.resource_sync import (
+from apps.authorization.engine import enforce
+from apps.tags.resource_tags import (
     apply_resource_tag_changes,
     build_resource_update_plan,
     pop_resource_tag_payload,
 )
 from core.base_service import BaseService
+from core.exceptions import BusinessError, ErrorCodes
 
-from .doc_url import extract_doc_id
-from .models import Knowledge, KnowledgeRevision
+from .doc_url import doc_id_key, extract_doc_id
+from .import_sync import import_knowledge_rows, load_doc_index, match_doc_row
+from .importer import import_knowledge, iter_knowledge_rows
+from .models import Knowledge, KnowledgeRevision, build_content_preview
+from .search import refresh_knowledge_search_terms
 from .selectors import get_knowledge_by_id
 
 
-def _knowledge_label(title: str = '', doc_id: str = '', *, fallback: str = '该知识') -> str:
-    """错误信息：标题 + 文档 id。"""
-    title = (title or '').strip()
-    label = (f'《{title}》' if title else '') + (f'文档id「{doc_id}」' if doc_id else '')
-    return label or fallback
-
-
-def _row_fail(row_number: int, reason: str) -> dict:
-    return {'row_number': row_number, 'reason': reason}
-
-
 def build_knowledge_revision_payload(knowledge: Knowledge) -> dict:
     return {
         'title': knowledge.title,
@@ -53,7 +46,7 @@ def build_knowledge_revision_hash(payload: dict) -> str:
 
 @transaction.atomic
 def ensure_knowledge_revision(knowledge: Knowledge, *, actor) -> KnowledgeRevision:
-    """生成任务引用快照；同内容复用，并对源知识行加锁避免版本号竞争。"""
+    """生成任务引用快照；同内容（含历史快照）复用，并对源知识行加锁避免版本号竞争。"""
     locked = (
         Knowledge.objects.select_for_update()
         .select_related('space_tag')
@@ -69,20 +62,20 @@ def ensure_knowledge_revision(knowledge: Knowledge, *, actor) -> KnowledgeRevisi
 
     payload = build_knowledge_revision_payload(locked)
     content_hash = build_knowledge_revision_hash(payload)
-    latest = (
-        KnowledgeRevision.objects.filter(source_knowledge_id=locked.pk)
-        .order_by('-revision_number')
-        .first()
-    )
-    if latest and latest.content_hash == content_hash:
-        return latest
-
-    next_revision_number = (latest.revision_number if latest else 0) + 1
+    revisions = KnowledgeRevision.objects.filter(source_knowledge_id=locked.pk).order_by('-revision_number')
+    # 改回历史内容时复用同哈希的旧快照，不再存一份相同正文
+    existing = revisions.filter(content_hash=content_hash).first()
+    if existing:
+        return existing
+
+    latest_number = revisions.values_list('revision_number', flat=True).first()
+    next_revision_number = (latest_number or 0) + 1
     return KnowledgeRevision.objects.create(
         source_knowledge=knowledge,
         revision_number=next_revision_number,
         title=payload['title'],
         content=payload['content'],
+        content_preview=build_content_preview(payload['content']),
         external_doc_url=payload['external_doc_url'],
         related_links=payload['related_links'],
         space_tag_name=payload['space_tag_name'],
@@ -101,18 +94,18 @@ class KnowledgeService(BaseService):
         return knowledge
 
     @transaction.atomic
-    @log_content_action('knowledge', 'create', '', group='知识文档', label='创建知识文档')
+    @log_content_action('knowledge', 'create', group='知识文档', label='创建知识文档')
     def create(self, data: dict) -> Knowledge:
         return self._create_record(data)
 
     @transaction.atomic
-    @log_content_action('knowledge', 'update', '', group='知识文档', label='更新知识文档')
+    @log_content_action('knowledge', 'update', group='知识文档', label='更新知识文档')
     def update(self, pk: int, data: dict) -> Knowledge:
         knowledge, _changed = self._update_record(pk, data)
         return knowledge
 
     @transaction.atomic
-    @log_content_action('knowledge', 'delete', '', group='知识文档', label='删除知识文档')
+    @log_content_action('knowledge', 'delete', group='知识文档', label='删除知识文档')
     def delete(self, pk: int) -> Knowledge:
         return self._delete_record(pk)
 
@@ -123,6 +116,7 @@ class KnowledgeService(BaseService):
         payload = dict(data)
         payload['created_by'] = self.user
         payload['updated_by'] = self.user
+        payload['content_preview'] = build_content_preview(payload.get('content', ''))
         tag_payload = pop_resource_tag_payload(payload, scope='knowledge')
         knowledge = Knowledge.objects.create(**payload)
         apply_resource_tag_changes(
@@ -132,6 +126,7 @@ class KnowledgeService(BaseService):
             space_tag_provided=tag_payload.space_tag_provided,
             tag_ids_provided=True,
         )
+        refresh_knowledge_search_terms([knowledge.id])
         return knowledge
 
     def _update_record(self, pk: int, data: dict) -> tuple:
@@ -146,6 +141,8 @@ class KnowledgeService(BaseService):
 
         changed_fields = dict(update_plan.changed_fields)
         changed_fields['updated_by'] = self.user
+        if 'content' in changed_fields:
+            changed_fields['content_preview'] = build_content_preview(changed_fields['content'])
         for key, value in changed_fields.items():
             setattr(knowledge, key, value)
         # update_fields 必须显式带上 updated_at，否则 auto_now 不生效
@@ -157,6 +154,7 @@ class KnowledgeService(BaseService):
             space_tag_provided=update_plan.space_changed,
             tag_ids_provided=update_plan.tags_changed,
         )
+        refresh_knowledge_search_terms([knowledge.id])
         return knowledge, True
 
     def _delete_record(self, pk: int) -> Knowledge:
@@ -171,111 +169,32 @@ class KnowledgeService(BaseService):
         ).delete()
         return knowledge
 
-    def _build_doc_index(self) -> dict[str, list[tuple[int, str]]]:
-        """文档 id → [(knowledge_id, title), ...]。"""
-        index: dict[str, list[tuple[int, str]]] = defaultdict(list)
-        rows = Knowledge.objects.exclude(external_doc_url='').values_list(
-            'id', 'title', 'external_doc_url',
-        )
-        for knowledge_id, title, url in rows:
-            doc_id = extract_doc_id(url)
-            if doc_id:
-                index[doc_id].append((knowledge_id, title or ''))
-        return index
-
-    def _match_doc_row(
-        self,
-        *,
-        row_number: int,
-        title: str,
-        url: str,
-        doc_index: dict[str, list[tuple[int, str]]],
-        seen: dict[str, tuple[int, str]],
-        require_match: bool,
-    ):
-        """按文档 id 匹配一行 → (knowledge_id|None, doc_id|None, failure|None)。"""
-        doc_id = extract_doc_id(url)
-        label = _knowledge_label(title, doc_id or '')
-
-        if not doc_id:
-            if not require_match:
-                return None, None, None
-            prefix = _knowledge_label(title, fallback='')
-            reason = f'{prefix}文档链接缺少 id 参数' if prefix else '文档链接缺少 id 参数'
-            return None, None, _row_fail(row_number, reason)
-
-        if doc_id in seen:
-            first_row, first_title = seen[doc_id]
-            return None, doc_id, _row_fail(
-                row_number,
-                f'表格内{label}与第 {first_row} 行{_knowledge_label(first_title, doc_id)}重复',
-            )
-        seen[doc_id] = (row_number, title)
-
-        matches = doc_index.get(doc_id, [])
-        if len(matches) > 1:
-            names = '、'.join(f'《{t}》' if (t or '').strip() else f'#{kid}' for kid, t in matches)
-            return None, doc_id, _row_fail(row_number, f'{label}在库中对应多条知识：{names}')
-        if not matches:
-            if require_match:
-                return None, doc_id, _row_fail(row_number, f'未找到{label}')
-            return None, doc_id, None
-        return matches[0][0], doc_id, None
-
     @transaction.atomic
-    @log_content_action('knowledge', 'import', '', group='知识文档', label='批量导入知识文档')
+    @log_content_action('knowledge', 'import', group='知识文档', label='批量导入知识文档')
     def bulk_import(self, items: list[dict]) -> dict:
         """按文档链接 query.id 批量 upsert。"""
-        doc_index = self._build_doc_index()
-        seen: dict[str, tuple[int, str]] = {}
-        created = updated = unchanged = 0
-        failures: list[dict] = []
-
-        for item in items:
-            row_number = item['row_number']
-            payload = {k: v for k, v in item.items() if k != 'row_number'}
-            knowledge_id, doc_id, failure = self._match_doc_row(
-                row_number=row_number,
-                title=str(payload.get('title') or ''),
-                url=str(payload.get('external_doc_url') or ''),
-                doc_index=doc_index,
-                seen=seen,
-                require_match=False,
-            )
-            if failure:
-                failures.append(failure)
-                continue
-            if knowledge_id is not None:
-                _knowledge, changed = self._update_record(knowledge_id, dict(payload))
-                if changed:
-                    updated += 1
-                else:
-                    unchanged += 1
-                continue
-
-            knowledge = self._create_record(dict(payload))
-            created += 1
-            if doc_id:
-                doc_index[doc_id] = [(knowledge.id, knowledge.title or '')]
+        rows = [
+            (item['row_number'], {k: v for k, v in item.items() if k != 'row_number'})
+            for item in items
+        ]
+        return import_knowledge_rows(rows, actor=self.user, seen={})
 
-        return {
-            'created': created,
-            'updated': updated,
-            'unchanged': unchanged,
-            'failures': failures,
-        }
+    @log_content_action('knowledge', 'import_file', group='知识文档', label='上传表格导入知识文档')
+    def import_file(self, file) -> dict:
+        """从 XLSX 流式导入，逐块提交，返回汇总和逐行失败。"""
+        return import_knowledge(iter_knowledge_rows(file, file.name), actor=self.user)
 
     @transaction.atomic
-    @log_content_action('knowledge', 'bulk_delete', '', group='知识文档', label='批量删除知识文档')
+    @log_content_action('knowledge', 'bulk_delete', group='知识文档', label='批量删除知识文档')
     def bulk_delete(self, items: list[dict]) -> dict:
         """按文档链接 query.id 批量删除。"""
-        doc_index = self._build_doc_index()
+        doc_index = load_doc_index(extract_doc_id(str(item.get('external_doc_url') or '')) for item in items)
         seen: dict[str, tuple[int, str]] = {}
         deleted = 0
         failures: list[dict] = []
 
         for item in items:
-            knowledge_id, doc_id, failure = self._match_doc_row(
+            knowledge_id, doc_id, failure = match_doc_row(
                 row_number=item['row_number'],
                 title=str(item.get('title') or ''),
                 url=str(item.get('external_doc_url') or ''),
@@ -287,7 +206,7 @@ class KnowledgeService(BaseService):
                 failures.append(failure)
                 continue
             self._delete_record(knowledge_id)
-            doc_index.pop(doc_id, None)
+            doc_index.pop(doc_id_key(doc_id), None)
             deleted += 1
 
         return {'deleted': deleted, 'failures': failures}
@@ -2,11 +2,12 @@
 
 from django.urls import path
 
-from .document import ParseDocumentView
+from .document import ParseDocumentJobView, ParseDocumentView
 from .views import (
     KnowledgeBulkDeleteView,
     KnowledgeBulkImportView,
     KnowledgeDetailView,
+    KnowledgeFileImportView,
     KnowledgeIncrementViewCountView,
     KnowledgeListCreateView,
     StudentTaskKnowledgeDetailView,
@@ -15,6 +16,9 @@ from .views import (
 urlpatterns = [
     path('', KnowledgeListCreateView.as_view(), name='knowledge-list-create'),
     path('import/', KnowledgeBulkImportView.as_view(), name='knowledge-bulk-import'),
+    path('import-file/', KnowledgeFileImportView.as_view(), name='knowledge-file-import'),
+    path('parse-document/', ParseDocumentView.as_view(), name='knowledge-parse-document'),
+    path('parse-document/<str:job_id>/', ParseDocumentJobView.as_view(), name='knowledge-parse-document-job'),
     path('bulk-delete/', KnowledgeBulkDeleteView.as_view(), name='knowledge-bulk-delete'),
     path('task/<int:task_knowledge_id>/', StudentTaskKnowledgeDetailView.as_view(), name='student-task-knowledge-detail'),
     path('<int:pk>/', KnowledgeDetailView.as_view(), name='knowledge-detail'),
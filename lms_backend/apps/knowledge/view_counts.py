@@ -0,0 +1,157 @@
+"""知识阅读次数合并写入。
+
+原来每次阅读都执行 `UPDATE ... view_count = view_count + 1` 再回读，热门文档的同一行被
+并发请求反复加锁。开启后阅读只在进程内计数（按知识 id 累加），由后台线程每隔
+FLUSH_INTERVAL_SECONDS 用 `UPDATE ... SET view_count = view_count + CASE id WHEN ... END`
+按批合并落库：
+
+- 返回和展示的阅读次数 = 库内值 + 本进程未落库的增量（其他进程的增量落库后可见）
+- 本进程未落库总数达到 MAX_PENDING 时在当前请求内立即落库
+- 进程正常退出时（atexit）落库；被强制杀死时最多丢失 MAX_PENDING 次或一个周期内的阅读
+- 落库失败时增量并回缓冲，下一轮重试
+
+fork 出的子进程（gunicorn 等预加载）按 pid 丢弃继承来的缓冲，后台线程在子进程首次计数时启动。
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Knowledge
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending: Counter[int] = Counter()
+_pending_total = 0
+_owner_pid: int | None = None
+_flush_thread: threading.Thread | None = None
+
+
+def _config() -> dict:
+    return settings.KNOWLEDGE_VIEW_COUNT_BUFFER
+
+
+def view_count_buffer_enabled() -> bool:
+    config = _config()
+    return config['ENABLED'] and config['FLUSH_INTERVAL_SECONDS'] > 0
+
+
+def _ensure_process_state() -> None:
+    """调用方持有 _lock。"""
+    global _owner_pid, _flush_thread, _pending_total
+
+    pid = os.getpid()
+    if _owner_pid == pid:
+        return
+    # fork 继承来的增量属于父进程，由父进程落库
+    _pending.clear()
+    _pending_total = 0
+    _owner_pid = pid
+    _flush_thread = threading.Thread(target=_flush_loop, name='knowledge-view-count-flush', daemon=True)
+    _flush_thread.start()
+
+
+def _take_pending() -> dict[int, int]:
+    global _pending_total
+
+    with _lock:
+        if _owner_pid != os.getpid() or not _pending:
+            return {}
+        pending = dict(_pending)
+        _pending.clear()
+        _pending_total = 0
+    return pending
+
+
+def _restore_pending(increments: dict[int, int]) -> None:
+    global _pending_total
+
+    with _lock:
+        if _owner_pid == os.getpid():
+            _pending.update(increments)
+            _pending_total += sum(increments.values())
+
+
+def _apply_increments(increments: dict[int, int]) -> None:
+    knowledge_ids = sorted(increments)
+    batch_size = _config()['FLUSH_BATCH_SIZE']
+    for start in range(0, len(knowledge_ids), batch_size):
+        batch_ids = knowledge_ids[start:start + batch_size]
+        Knowledge.objects.filter(id__in=batch_ids).update(
+            view_count=F('view_count') + Case(
+                *(When(id=knowledge_id, then=Value(increments[knowledge_id])) for knowledge_id in batch_ids),
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+        )
+
+
+def flush_view_counts() -> int:
+    """把本进程未落库的阅读次数写入数据库，返回落库的阅读次数。"""
+    increments = _take_pending()
+    if not increments:
+        return 0
+    try:
+        _apply_increments(increments)
+    except Exception:
+        _restore_pending(increments)
+        raise
+    return sum(increments.values())
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(_config()['FLUSH_INTERVAL_SECONDS'])
+        try:
+            flush_view_counts()
+        except Exception:
+            logger.exception('知识阅读次数落库失败，下一轮重试')
+        finally:
+            # 后台线程独占的数据库连接，不跨周期保持
+            connection.close()
+
+
+def _flush_at_exit() -> None:
+    try:
+        flush_view_counts()
+    except Exception:
+        logger.exception('进程退出时知识阅读次数落库失败')
+
+
+atexit.register(_flush_at_exit)
+
+
+def record_view(knowledge_id: int) -> int | None:
+    """记录一次阅读，返回本进程该知识未落库的增量；已直接写库时返回 None。"""
+    global _pending_total
+
+    if not view_count_buffer_enabled():
+        Knowledge.objects.filter(pk=knowledge_id).update(view_count=F('view_count') + 1)
+        return None
+    with _lock:
+        _ensure_process_state()
+        _pending[knowledge_id] += 1
+        _pending_total += 1
+        pending = _pending[knowledge_id]
+        should_flush = _pending_total >= _config()['MAX_PENDING']
+    if should_flush:
+        flush_view_counts()
+        return None
+    return pending
+
+
+def pending_views(knowledge_id: int) -> int:
+    """本进程该知识未落库的阅读次数。"""
+    if _owner_pid != os.getpid():
+        return 0
+    return _pending.get(knowledge_id, 0)
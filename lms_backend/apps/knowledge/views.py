@@ -5,13 +5,13 @@ from __future__ import annotations
 from django.utils import timezone
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
 from rest_framework import serializers as drf_serializers
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 
 from apps.authorization.engine import enforce
 from apps.knowledge.serializers import (
     KnowledgeBulkDeleteSerializer,
     KnowledgeBulkImportSerializer,
-    KnowledgeCreateSerializer,
     KnowledgeDetailSerializer,
     KnowledgeListSerializer,
     KnowledgeUpdateSerializer,
@@ -29,6 +29,7 @@ from core.responses import (
     success_response,
 )
 
+from .importer import MAX_FILE_SIZE as MAX_IMPORT_FILE_SIZE
 from .models import Knowledge
 from .selectors import get_knowledge_queryset
 from .serializers import (
@@ -169,6 +170,36 @@ class KnowledgeBulkImportView(BaseAPIView):
         return success_response(self.service.bulk_import(items=serializer.validated_data['items']))
 
 
+class KnowledgeFileImportView(BaseAPIView):
+    """POST /api/knowledge/import-file/ — 上传 XLSX 导入知识文档，服务端逐行解析。"""
+
+    parser_classes = [MultiPartParser]
+    permission_classes = [IsAuthenticated]
+    service_class = KnowledgeService
+
+    @extend_schema(
+        summary='上传表格导入知识文档',
+        description='上传 XLSX，按文档链接 id 逐块 upsert，返回汇总和逐行失败',
+        responses={
+            200: OpenApiResponse(description='导入报告'),
+            400: OpenApiResponse(description='文件格式错误'),
+            403: OpenApiResponse(description='无权限'),
+        },
+        tags=['知识管理'],
+    )
+    def post(self, request):
+        enforce('knowledge.create', request, error_message='无权导入知识文档')
+        file = request.FILES.get('file')
+        if not file:
+            raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message='请上传文件')
+        if file.size > MAX_IMPORT_FILE_SIZE:
+            raise BusinessError(
+                code=ErrorCodes.VALIDATION_ERROR,
+                message=f'文件大小超过限制（最大 {MAX_IMPORT_FILE_SIZE // 1024 // 1024}MB）',
+            )
+        return success_response(self.service.import_file(file))
+
+
 class KnowledgeBulkDeleteView(BaseAPIView):
     permission_classes = [IsAuthenticated]
     service_class = KnowledgeService
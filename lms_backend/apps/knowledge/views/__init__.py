@@ -1,20 +0,0 @@
-"""
-Knowledge views module.
-"""
-from .knowledge import (
-    KnowledgeBulkDeleteView,
-    KnowledgeBulkImportView,
-    KnowledgeDetailView,
-    KnowledgeIncrementViewCountView,
-    KnowledgeListCreateView,
-    StudentTaskKnowledgeDetailView,
-)
-
-__all__ = [
-    'KnowledgeListCreateView',
-    'KnowledgeBulkImportView',
-    'KnowledgeBulkDeleteView',
-    'KnowledgeDetailView',
-    'StudentTaskKnowledgeDetailView',
-    'KnowledgeIncrementViewCountView',
-]
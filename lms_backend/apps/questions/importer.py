@@ -0,0 +1,301 @@
+"""题库批量导入（XLSX / CSV）。
+
+逐行流式读取表格，每 batch_size 行校验一次并成批落库：
+
+- 表头：题型、题目、选项、答案、解析、分值、space、标签（也接受英文字段名）
+- 选项每行一个（或用 | 分隔），按顺序对应 A/B/C...；多选答案写 AC 或 A,C；判断题答案写 正确/错误
+- space、标签按名称匹配，导入前一次查出全部可用于题目的标签
+- 题目、选项、标签关系按批 bulk_create；某行出错只跳过该行，返回逐行错误报告
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from apps.quizzes.fingerprints import refresh_question_fingerprints
+from apps.tags.models import Tag
+from core.exceptions import BusinessError, ErrorCodes
+
+from .models import Question, QuestionOption
+from .payload import build_merged_question_payload, build_storage_payload, validate_question_payload
+from .question_like import QUESTION_TYPE_CHOICES, build_choice_option_key
+from .search import refresh_question_search_terms
+from .serializers import QuestionWriteSerializer
+from .similarity import refresh_question_simhash
+
+SUPPORTED_EXTENSIONS = {'.xlsx', '.csv'}
+MAX_FILE_SIZE = 20 * 1024 * 1024
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 500
+
+HEADER_ALIASES = {
+    '题型': 'question_type',
+    '题目类型': 'question_type',
+    '题目': 'content',
+    '题干': 'content',
+    '选项': 'options',
+    '答案': 'answer',
+    '解析': 'explanation',
+    '分值': 'score',
+    'space': 'space',
+    '标签': 'tags',
+}
+QUESTION_TYPE_ALIASES = {
+    **{label: code for code, label in QUESTION_TYPE_CHOICES},
+    **{code: code for code, _ in QUESTION_TYPE_CHOICES},
+    '单选': 'SINGLE_CHOICE',
+    '多选': 'MULTIPLE_CHOICE',
+    '判断': 'TRUE_FALSE',
+    '简答': 'SHORT_ANSWER',
+}
+TRUE_FALSE_ALIASES = {
+    'TRUE': 'TRUE', '正确': 'TRUE', '对': 'TRUE', '是': 'TRUE',
+    'FALSE': 'FALSE', '错误': 'FALSE', '错': 'FALSE', '否': 'FALSE',
+}
+OPTION_SEPARATOR = re.compile(r'\r?\n|\|')
+NAME_SEPARATOR = re.compile(r'[,，、|]')
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _normalize_header(value) -> str:
+    text = _cell_text(value)
+    return HEADER_ALIASES.get(text, HEADER_ALIASES.get(text.lower(), text.lower()))
+
+
+def _iter_xlsx(file) -> Iterator[list]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def _iter_csv(file) -> Iterator[list]:
+    stream = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.reader(stream)
+    finally:
+        stream.detach()
+
+
+def iter_question_rows(file, filename: str) -> Iterator[tuple[int, dict]]:
+    """逐行产出 (表格行号, {字段: 文本})，跳过空行。"""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise BusinessError(
+            code=ErrorCodes.VALIDATION_ERROR,
+            message=f'不支持的文件格式，仅支持 {", ".join(sorted(SUPPORTED_EXTENSIONS))}',
+        )
+    rows = _iter_xlsx(file) if ext == '.xlsx' else _iter_csv(file)
+    header = None
+    for row_number, row in enumerate(rows, start=1):
+        if header is None:
+            header = [_normalize_header(cell) for cell in row]
+            if 'content' not in header or 'question_type' not in header:
+                raise BusinessError(
+                    code=ErrorCodes.VALIDATION_ERROR,
+                    message='表头缺少 题型 或 题目 列',
+                )
+            continue
+        values = {key: _cell_text(cell) for key, cell in zip(header, row) if key}
+        if any(values.values()):
+            yield row_number, values
+
+
+def _split_names(text: str) -> list[str]:
+    return [name.strip() for name in NAME_SEPARATOR.split(text) if name.strip()]
+
+
+class _TagLookup:
+    """按名称解析 space 和题目标签；导入前一次性加载。"""
+
+    def __init__(self):
+        self.spaces: dict[str, int] = {}
+        self.tags: dict[str, int] = {}
+        for tag_id, name, tag_type in Tag.objects.filter(
+            Q(tag_type='SPACE') | Q(tag_type='TAG', allow_question=True),
+        ).values_list('id', 'name', 'tag_type'):
+            (self.spaces if tag_type == 'SPACE' else self.tags)[name] = tag_id
+
+    def space_id(self, name: str) -> int | None:
+        if not name:
+            return None
+        if name not in self.spaces:
+            raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message=f'space {name} 不存在')
+        return self.spaces[name]
+
+    def tag_ids(self, text: str) -> list[int]:
+        names = list(dict.fromkeys(_split_names(text)))
+        missing = [name for name in names if name not in self.tags]
+        if missing:
+            raise BusinessError(
+                code=ErrorCodes.VALIDATION_ERROR,
+                message=f'题目标签 {"、".join(missing)} 不存在',
+            )
+        return [self.tags[name] for name in names]
+
+
+def _parse_answer(question_type: str, text: str):
+    if question_type == 'MULTIPLE_CHOICE':
+        keys = _split_names(text) if NAME_SEPARATOR.search(text) else list(text.replace(' ', ''))
+        return [key.upper() for key in keys]
+    if question_type == 'SINGLE_CHOICE':
+        return text.upper()
+    if question_type == 'TRUE_FALSE':
+        return TRUE_FALSE_ALIASES.get(text.upper(), text)
+    return text
+
+
+def build_question_row_payload(values: dict) -> dict:
+    """表格行 → 与 QuestionWriteSerializer 相同结构的写入 payload（不含标签）。"""
+    question_type = QUESTION_TYPE_ALIASES.get(values.get('question_type', ''))
+    if question_type is None:
+        raise BusinessError(
+            code=ErrorCodes.VALIDATION_ERROR,
+            message=f'题型 {values.get("question_type", "")} 无效',
+        )
+    if not values.get('content'):
+        raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message='题目内容不能为空')
+
+    option_texts = [text.strip() for text in OPTION_SEPARATOR.split(values.get('options', '')) if text.strip()]
+    if question_type == 'TRUE_FALSE':
+        options = []
+    else:
+        options = [
+            {'key': build_choice_option_key(index), 'value': text}
+            for index, text in enumerate(option_texts)
+        ]
+    payload = {
+        'content': values['content'],
+        'question_type': question_type,
+        'options': options,
+        'answer': _parse_answer(question_type, values.get('answer', '')),
+        'explanation': values.get('explanation', ''),
+    }
+    if values.get('score'):
+        payload['score'] = values['score']
+    return payload
+
+
+@dataclass
+class _PreparedRow:
+    question: Question
+    option_defs: list[dict]
+    tag_ids: list[int]
+
+
+def _validated_payload(payload: dict) -> dict:
+    serializer = QuestionWriteSerializer(data=payload)
+    if not serializer.is_valid():
+        field, errors = next(iter(serializer.errors.items()))
+        raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message=f'{field}：{errors[0]}')
+    return dict(serializer.validated_data)
+
+
+def _prepare_row(values: dict, tag_lookup: _TagLookup, actor) -> _PreparedRow:
+    payload = _validated_payload(build_question_row_payload(values))
+    validate_question_payload(payload)
+    model_fields, option_defs = build_storage_payload(build_merged_question_payload(payload))
+    question = Question(
+        **model_fields,
+        space_tag_id=tag_lookup.space_id(values.get('space', '')),
+        created_by=actor,
+        updated_by=actor,
+    )
+    return _PreparedRow(question, option_defs, tag_lookup.tag_ids(values.get('tags', '')))
+
+
+def _bulk_insert_with_ids(questions: list[Question]) -> None:
+    """MySQL 批量插入不回填主键：写入一次性标记，按主键区间回查 id，标记随后刷新指纹时覆盖。"""
+    batch_token = uuid.uuid4().hex
+    for index, question in enumerate(questions):
+        question.content_fingerprint = f'import:{batch_token}:{index}'
+    last_id = Question.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    Question.objects.bulk_create(questions, batch_size=BATCH_SIZE)
+    ids = dict(
+        Question.objects.filter(
+            id__gt=last_id,
+            content_fingerprint__in=[question.content_fingerprint for question in questions],
+        ).values_list('content_fingerprint', 'id')
+    )
+    for question in questions:
+        question.pk = ids[question.content_fingerprint]
+
+
+@transaction.atomic
+def _write_batch(prepared: list[_PreparedRow]) -> None:
+    questions = [row.question for row in prepared]
+    if connection.features.can_return_rows_from_bulk_insert:
+        Question.objects.bulk_create(questions, batch_size=BATCH_SIZE)
+    else:
+        _bulk_insert_with_ids(questions)
+
+    QuestionOption.objects.bulk_create(
+        [
+            QuestionOption(question_id=row.question.pk, **option_def)
+            for row in prepared
+            for option_def in row.option_defs
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    through = Question.tags.through
+    through.objects.bulk_create(
+        [through(question_id=row.question.pk, tag_id=tag_id) for row in prepared for tag_id in row.tag_ids],
+        batch_size=BATCH_SIZE,
+    )
+    question_ids = [question.pk for question in questions]
+    refresh_question_fingerprints(question_ids)
+    refresh_question_search_terms(question_ids)
+    refresh_question_simhash(question_ids)
+
+
+def import_questions(
+    rows: Iterable[tuple[int, dict]],
+    *,
+    actor,
+    dry_run: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """导入题目，返回 {total, created, failed, errors: [{row, message}]}；dry_run 只校验。"""
+    tag_lookup = _TagLookup()
+    report = {'total': 0, 'created': 0, 'failed': 0, 'errors': []}
+    batch: list[_PreparedRow] = []
+
+    def flush():
+        if batch and not dry_run:
+            _write_batch(batch)
+        report['created'] += len(batch)
+        batch.clear()
+
+    for row_number, values in rows:
+        report['total'] += 1
+        try:
+            batch.append(_prepare_row(values, tag_lookup, actor))
+        except BusinessError as exc:
+            report['failed'] += 1
+            if len(report['errors']) < MAX_REPORTED_ERRORS:
+                report['errors'].append({'row': row_number, 'message': exc.message})
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+    return report
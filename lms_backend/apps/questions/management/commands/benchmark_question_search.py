@@ -0,0 +1,51 @@
+"""Compare question search latency: inverted index vs. icontains scan."""
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.questions.models import Question
+from apps.questions.search import apply_question_search, icontains_search_filter
+
+
+class Command(BaseCommand):
+    help = '在当前题库上对比倒排索引检索与 icontains 全表扫描的耗时和命中数（只读）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='+', help='搜索词，可传多个')
+        parser.add_argument('--repeat', type=int, default=5, help='每个搜索词重复次数，取中位数')
+        parser.add_argument('--page-size', type=int, default=20, help='每次取第一页的条数，与列表接口一致')
+
+    def _measure(self, build_queryset, repeat: int, page_size: int) -> tuple[float, int]:
+        timings = []
+        count = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset = build_queryset()
+            count = queryset.count()
+            list(queryset[:page_size])
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), count
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or options['page_size'] < 1:
+            raise CommandError('--repeat、--page-size 必须大于 0')
+
+        self.stdout.write(f"{'搜索词':<16}{'icontains(ms)':>16}{'倒排索引(ms)':>16}{'命中数':>12}")
+        for query in options['queries']:
+            scan_ms, scan_count = self._measure(
+                lambda: Question.objects.filter(icontains_search_filter(query)).order_by('-created_at'),
+                options['repeat'],
+                options['page_size'],
+            )
+            index_ms, index_count = self._measure(
+                lambda: apply_question_search(Question.objects.all(), query).order_by('-search_rank', '-created_at'),
+                options['repeat'],
+                options['page_size'],
+            )
+            line = f'{query:<16}{scan_ms:>16.1f}{index_ms:>16.1f}{index_count:>12}'
+            if scan_count != index_count:
+                self.stdout.write(self.style.WARNING(f'{line}  （icontains 命中 {scan_count}，索引可能需要重建）'))
+            else:
+                self.stdout.write(line)
@@ -0,0 +1,43 @@
+"""Bulk import questions from an XLSX/CSV file."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.questions.importer import import_questions, iter_question_rows
+from apps.users.models import User
+from core.exceptions import BusinessError
+
+
+class Command(BaseCommand):
+    help = '从 XLSX/CSV 批量导入题目到题库，出错的行跳过并打印，--dry-run 只校验不写入'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='XLSX 或 CSV 文件路径')
+        parser.add_argument('--employee-id', required=True, help='记为创建者的用户工号')
+        parser.add_argument('--dry-run', action='store_true', help='只校验不写入')
+        parser.add_argument('--batch-size', type=int, default=500, help='每批写入的题目数')
+        parser.add_argument('--limit', type=int, default=20, help='最多打印多少条出错行')
+
+    def handle(self, *args, **options):
+        actor = User.objects.filter(employee_id=options['employee_id']).first()
+        if actor is None:
+            raise CommandError(f"工号 {options['employee_id']} 不存在")
+
+        try:
+            with open(options['path'], 'rb') as file:
+                report = import_questions(
+                    iter_question_rows(file, options['path']),
+                    actor=actor,
+                    dry_run=options['dry_run'],
+                    batch_size=options['batch_size'],
+                )
+        except BusinessError as exc:
+            raise CommandError(exc.message)
+
+        for error in report['errors'][:options['limit']]:
+            self.stdout.write(f"第 {error['row']} 行：{error['message']}")
+
+        summary = f"共 {report['total']} 行，{'可导入' if options['dry_run'] else '已导入'} {report['created']} 题，出错 {report['failed']} 行"
+        if report['failed']:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,15 @@
+"""Rebuild the question bank search inverted index."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.questions.search import rebuild_question_search_index
+
+
+class Command(BaseCommand):
+    help = '全量重建题库搜索倒排索引（题干、参考答案、标签名称的字符二元组）'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_question_search_index()
+        self.stdout.write(self.style.SUCCESS(f'已重建 {total} 道题目的搜索索引'))
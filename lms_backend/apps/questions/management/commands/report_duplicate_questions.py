@@ -0,0 +1,41 @@
+"""Report near-duplicate questions using the SimHash band index."""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.questions.models import Question
+from apps.questions.similarity import DEFAULT_MAX_DISTANCE, iter_duplicate_groups, rebuild_question_simhash
+
+
+class Command(BaseCommand):
+    help = '按 SimHash 分段索引输出题库近似重复题分组，--rebuild 先全量重算（上线后用于回填历史数据）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='先全量重算题目 SimHash')
+        parser.add_argument('--distance', type=int, default=DEFAULT_MAX_DISTANCE, help=f'汉明距离阈值（0~{DEFAULT_MAX_DISTANCE}）')
+        parser.add_argument('--limit', type=int, default=20, help='最多打印多少组')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['distance'] <= DEFAULT_MAX_DISTANCE:
+            raise CommandError(f'--distance 须在 0~{DEFAULT_MAX_DISTANCE} 之间，超过后分段索引无法保证召回')
+        if options['rebuild']:
+            with transaction.atomic():
+                total = rebuild_question_simhash()
+            self.stdout.write(f'已重算 {total} 道题目的 SimHash')
+
+        groups = list(iter_duplicate_groups(max_distance=options['distance']))
+        previews = dict(
+            Question.objects.filter(
+                id__in=[question_id for group in groups[:options['limit']] for question_id in group],
+            ).values_list('id', 'content')
+        )
+        for group in groups[:options['limit']]:
+            self.stdout.write(f'{len(group)} 道近似题：')
+            for question_id in group:
+                self.stdout.write(f'  题目 {question_id}：{previews[question_id][:40]}')
+
+        if groups:
+            duplicates = sum(len(group) - 1 for group in groups)
+            self.stdout.write(self.style.WARNING(f'近似重复 {len(groups)} 组，可合并 {duplicates} 道题'))
+        else:
+            self.stdout.write(self.style.SUCCESS('未发现近似重复题'))
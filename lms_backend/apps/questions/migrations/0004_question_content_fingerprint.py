@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0003_remove_created_from_quiz'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='content_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='内容指纹'),
+        ),
+    ]
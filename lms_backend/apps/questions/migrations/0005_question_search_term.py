@@ -0,0 +1,78 @@
+"""题目搜索倒排索引表，并为已有题目回填。"""
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+_SEPARATOR = re.compile(r'[\W_]+')
+
+
+def _search_terms(text):
+    # 与 apps.questions.search.search_terms 保持一致
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if unicodedata.category(char) != 'Mn')
+    terms = set()
+    for run in _SEPARATOR.split(unicodedata.normalize('NFKC', stripped).lower()):
+        terms.update(run[index:index + 2] for index in range(len(run) - 1))
+    return terms
+
+
+def forwards_backfill_search_terms(apps, schema_editor):
+    Question = apps.get_model('questions', 'Question')
+    QuestionSearchTerm = apps.get_model('questions', 'QuestionSearchTerm')
+    Through = Question.tags.through
+
+    last_id = 0
+    while True:
+        questions = list(
+            Question.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'content', 'reference_answer')[:BATCH_SIZE]
+        )
+        if not questions:
+            break
+        last_id = questions[-1][0]
+        tag_names = {question_id: [] for question_id, _, _ in questions}
+        for question_id, name in Through.objects.filter(question_id__in=list(tag_names)).values_list('question_id', 'tag__name'):
+            tag_names[question_id].append(name)
+        rows = []
+        for question_id, content, reference_answer in questions:
+            weights = {}
+            for text, weight in ((content, 3), (' '.join(tag_names[question_id]), 2), (reference_answer, 1)):
+                for term in _search_terms(text):
+                    weights[term] = weights.get(term, 0) + weight
+            rows.extend(
+                QuestionSearchTerm(question_id=question_id, term=term, weight=weight)
+                for term, weight in weights.items()
+            )
+        QuestionSearchTerm.objects.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0004_question_content_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=2, verbose_name='二元组')),
+                ('weight', models.PositiveSmallIntegerField(default=1, verbose_name='权重')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='questions.question', verbose_name='题目')),
+            ],
+            options={
+                'verbose_name': '题目搜索索引',
+                'verbose_name_plural': '题目搜索索引',
+                'db_table': 'lms_question_search_term',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='questionsearchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'question'), name='uniq_question_search_term'),
+        ),
+        migrations.RunPython(forwards_backfill_search_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0005_question_search_term'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='simhash',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='内容 SimHash'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='simhash_band_0',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True, verbose_name='SimHash 分段 0'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='simhash_band_1',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True, verbose_name='SimHash 分段 1'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='simhash_band_2',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True, verbose_name='SimHash 分段 2'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='simhash_band_3',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True, verbose_name='SimHash 分段 3'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='simhash_band_4',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True, verbose_name='SimHash 分段 4'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='simhash_band_5',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True, verbose_name='SimHash 分段 5'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='simhash_band_6',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True, verbose_name='SimHash 分段 6'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='simhash_band_7',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True, verbose_name='SimHash 分段 7'),
+        ),
+    ]
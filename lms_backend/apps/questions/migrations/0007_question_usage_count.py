@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def forwards_backfill_usage_count(apps, schema_editor):
+    Question = apps.get_model('questions', 'Question')
+    QuizQuestion = apps.get_model('quizzes', 'QuizQuestion')
+
+    usage_counts = (
+        QuizQuestion.objects.values('question_id')
+        .annotate(usage_count=Count('id'))
+        .values_list('question_id', 'usage_count')
+    )
+    questions = [
+        Question(id=question_id, stats_usage_count=usage_count)
+        for question_id, usage_count in usage_counts
+    ]
+    Question.objects.bulk_update(questions, ['stats_usage_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0006_question_simhash'),
+        ('quizzes', '0006_quiz_stats_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='stats_usage_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, verbose_name='被试卷引用次数'),
+        ),
+        migrations.RunPython(forwards_backfill_usage_count, migrations.RunPython.noop),
+    ]
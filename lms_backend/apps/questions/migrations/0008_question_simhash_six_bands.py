@@ -0,0 +1,70 @@
+"""SimHash 分段由 8 段 8 位改为 6 段（11/11/11/11/10/10 位），按已存 SimHash 重排分段。"""
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+HASH_BITS = 64
+
+
+def _to_unsigned(value):
+    # 与 apps.questions.similarity 保持一致
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+def _bands(value, widths):
+    # 与 apps.questions.similarity._bands 保持一致
+    bands = []
+    offset = 0
+    for width in widths:
+        bands.append(value >> offset & ((1 << width) - 1))
+        offset += width
+    return bands
+
+
+def _rewrite_bands(apps, widths):
+    Question = apps.get_model('questions', 'Question')
+    fields = [f'simhash_band_{index}' for index in range(len(widths))]
+    last_id = 0
+    while True:
+        rows = list(
+            Question.objects.filter(id__gt=last_id, simhash__isnull=False)
+            .order_by('id')
+            .values_list('id', 'simhash')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        questions = []
+        for question_id, simhash in rows:
+            question = Question(id=question_id)
+            for field, band in zip(fields, _bands(_to_unsigned(simhash), widths)):
+                setattr(question, field, band)
+            questions.append(question)
+        Question.objects.bulk_update(questions, fields, batch_size=BATCH_SIZE)
+
+
+def forwards_six_bands(apps, schema_editor):
+    _rewrite_bands(apps, (11, 11, 11, 11, 10, 10))
+
+
+def backwards_eight_bands(apps, schema_editor):
+    _rewrite_bands(apps, (8,) * 8)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('questions', '0007_question_usage_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards_six_bands, backwards_eight_bands),
+        migrations.RemoveField(
+            model_name='question',
+            name='simhash_band_6',
+        ),
+        migrations.RemoveField(
+            model_name='question',
+            name='simhash_band_7',
+        ),
+    ]
@@ -41,6 +41,16 @@ class Question(TimestampMixin, CreatorMixin, QuestionContentMixin, models.Model)
         verbose_name='题目标签',
         limit_choices_to={'tag_type': 'TAG'},
     )
+    content_fingerprint = models.CharField(max_length=64, blank=True, default='', verbose_name='内容指纹')
+    simhash = models.BigIntegerField(null=True, blank=True, verbose_name='内容 SimHash')
+    simhash_band_0 = models.PositiveSmallIntegerField(null=True, blank=True, db_index=True, verbose_name='SimHash 分段 0')
+    simhash_band_1 = models.PositiveSmallIntegerField(null=True, blank=True, db_index=True, verbose_name='SimHash 分段 1')
+    simhash_band_2 = models.PositiveSmallIntegerField(null=True, blank=True, db_index=True, verbose_name='SimHash 分段 2')
+    simhash_band_3 = models.PositiveSmallIntegerField(null=True, blank=True, db_index=True, verbose_name='SimHash 分段 3')
+    simhash_band_4 = models.PositiveSmallIntegerField(null=True, blank=True, db_index=True, verbose_name='SimHash 分段 4')
+    simhash_band_5 = models.PositiveSmallIntegerField(null=True, blank=True, db_index=True, verbose_name='SimHash 分段 5')
+    # 列表统计列，由 apps.quizzes.stats 在写路径上维护
+    stats_usage_count = models.PositiveIntegerField(default=0, db_index=True, verbose_name='被试卷引用次数')
 
     class Meta:
         db_table = 'lms_question'
@@ -77,3 +87,27 @@ class QuestionOption(TimestampMixin, QuestionOptionContentMixin, models.Model):
 
     def __str__(self):
         return f'Q{self.question_id}#{self.sort_order}'
+
+
+class QuestionSearchTerm(models.Model):
+    """题目搜索倒排索引：题干、参考答案、标签名称的字符二元组 → 题目。"""
+
+    term = models.CharField(max_length=2, verbose_name='二元组')
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='题目',
+    )
+    weight = models.PositiveSmallIntegerField(default=1, verbose_name='权重')
+
+    class Meta:
+        db_table = 'lms_question_search_term'
+        verbose_name = '题目搜索索引'
+        verbose_name_plural = '题目搜索索引'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'question'],
+                name='uniq_question_search_term',
+            ),
+        ]
@@ -26,6 +26,13 @@ def build_choice_option_key(index: int) -> str:
     return ''.join(reversed(chars))
 
 
+def build_option_keys(question_type: str, option_count: int) -> list[str]:
+    """按题型生成选项展示键：判断题固定 TRUE/FALSE，选择题 A/B/C...。"""
+    if question_type == 'TRUE_FALSE':
+        return ['TRUE', 'FALSE']
+    return [build_choice_option_key(index) for index in range(option_count)]
+
+
 class QuestionContentMixin(models.Model):
     """题目内容共用字段与行为。"""
 
@@ -78,10 +85,7 @@ class QuestionContentMixin(models.Model):
         if self.question_type == 'SHORT_ANSWER':
             return []
 
-        if self.question_type == 'TRUE_FALSE':
-            keys = ['TRUE', 'FALSE']
-        else:
-            keys = [build_choice_option_key(index) for index in range(len(options))]
+        keys = build_option_keys(self.question_type, len(options))
 
         return [
             {
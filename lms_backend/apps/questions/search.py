@@ -0,0 +1,103 @@
+"""题库搜索倒排索引。
+
+原来的搜索是 `content__icontains`，每次输入都要全表扫描长文本。这里把题干、参考答案和标签名称
+切成字符二元组（`core.text_search`，中文按字、英文数字按字母，标点空白处断开）写入 `QuestionSearchTerm`：
+
+- 查询串同样切成二元组，按二元组取倒排记录求交集（题目需包含全部二元组），权重和作为相关度
+- 候选集再用 icontains 精确核对，避免二元组分散命中的误报；核对只作用在候选行上
+- 查询串不足两个字符（切不出二元组）时退回 icontains
+
+维护时机与题目指纹相同：题目创建/更新、试卷编辑器改题、批量导入、标签改名/合并/删除。
+历史数据或漂移用 `python manage.py rebuild_question_search_index` 重建。
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.db.models import Count, Exists, IntegerField, OuterRef, Q, QuerySet, Subquery, Sum, Value
+
+from core.text_search import search_terms
+
+from .models import Question, QuestionSearchTerm
+
+BATCH_SIZE = 500
+CONTENT_WEIGHT = 3
+TAG_WEIGHT = 2
+ANSWER_WEIGHT = 1
+
+
+def _weighted_terms(content: str, reference_answer: str, tag_names: Iterable[str]) -> dict[str, int]:
+    weights: dict[str, int] = {}
+    for text, weight in (
+        (content, CONTENT_WEIGHT),
+        (' '.join(tag_names), TAG_WEIGHT),
+        (reference_answer, ANSWER_WEIGHT),
+    ):
+        for term in search_terms(text):
+            weights[term] = weights.get(term, 0) + weight
+    return weights
+
+
+def _build_rows(question_ids: list[int]) -> list[QuestionSearchTerm]:
+    tag_names: dict[int, list[str]] = {question_id: [] for question_id in question_ids}
+    for question_id, name in Question.tags.through.objects.filter(
+        question_id__in=question_ids,
+    ).values_list('question_id', 'tag__name'):
+        tag_names[question_id].append(name)
+    return [
+        QuestionSearchTerm(question_id=question_id, term=term, weight=weight)
+        for question_id, content, reference_answer in Question.objects.filter(
+            id__in=question_ids,
+        ).values_list('id', 'content', 'reference_answer')
+        for term, weight in _weighted_terms(content, reference_answer, tag_names[question_id]).items()
+    ]
+
+
+def refresh_question_search_terms(question_ids: Iterable[int]) -> None:
+    """按当前题干、参考答案和标签名称重建这些题目的倒排记录。"""
+    question_ids = sorted(set(question_ids))
+    for start in range(0, len(question_ids), BATCH_SIZE):
+        batch_ids = question_ids[start:start + BATCH_SIZE]
+        QuestionSearchTerm.objects.filter(question_id__in=batch_ids).delete()
+        # 折叠后仍可能有排序规则视为相等的二元组，冲突时保留先写入的一条
+        QuestionSearchTerm.objects.bulk_create(_build_rows(batch_ids), batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def rebuild_question_search_index() -> int:
+    """全量重建倒排索引，返回题目数。"""
+    total = 0
+    last_id = 0
+    while True:
+        batch_ids = list(
+            Question.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BATCH_SIZE]
+        )
+        if not batch_ids:
+            return total
+        last_id = batch_ids[-1]
+        refresh_question_search_terms(batch_ids)
+        total += len(batch_ids)
+
+
+def icontains_search_filter(search: str) -> Q:
+    tag_match = Question.tags.through.objects.filter(question_id=OuterRef('pk'), tag__name__icontains=search)
+    return Q(content__icontains=search) | Q(reference_answer__icontains=search) | Q(Exists(tag_match))
+
+
+def apply_question_search(queryset: QuerySet, search: str) -> QuerySet:
+    """倒排索引检索：求全部二元组交集得到候选并标注相关度 search_rank，再在候选上精确核对。"""
+    terms = search_terms(search)
+    if not terms:
+        return queryset.filter(icontains_search_filter(search)).annotate(search_rank=Value(0))
+    postings = (
+        QuestionSearchTerm.objects.filter(term__in=terms)
+        .values('question_id')
+        .annotate(matched=Count('term'), rank=Sum('weight'))
+        .filter(matched=len(terms))
+    )
+    rank = postings.filter(question_id=OuterRef('pk')).values('rank')[:1]
+    return (
+        queryset.filter(id__in=postings.values('question_id'))
+        .filter(icontains_search_filter(search))
+        .annotate(search_rank=Subquery(rank, output_field=IntegerField()))
+    )
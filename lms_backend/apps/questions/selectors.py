@@ -1,8 +1,9 @@
 """Question selectors."""
 
-from django.db.models import Count, Prefetch, QuerySet
+from django.db.models import Prefetch, QuerySet
 
 from .models import Question, QuestionOption
+from .search import apply_question_search
 
 
 def question_base_queryset() -> QuerySet:
@@ -16,8 +17,6 @@ def question_base_queryset() -> QuerySet:
             queryset=QuestionOption.objects.order_by('sort_order', 'id'),
         ),
         'tags',
-    ).annotate(
-        usage_count=Count('quiz_relations', distinct=True),
     )
 
 
@@ -35,6 +34,8 @@ def apply_question_filters(
             qs = qs.filter(space_tag_id=filters['space_tag_id'])
         if filters.get('tag_id') is not None:
             qs = qs.filter(tags__id=filters['tag_id'])
+        if filters.get('unused'):
+            qs = qs.filter(stats_usage_count=0)
     if search:
-        qs = qs.filter(content__icontains=search)
+        qs = apply_question_search(qs, search)
     return qs.distinct()
@@ -15,7 +15,7 @@ class QuestionSerializer(serializers.ModelSerializer):
     answer = serializers.JSONField(read_only=True)
     space_tag = TagSimpleSerializer(read_only=True)
     tags = TagSimpleSerializer(many=True, read_only=True)
-    usage_count = serializers.SerializerMethodField()
+    usage_count = serializers.IntegerField(source='stats_usage_count', read_only=True)
     is_referenced = serializers.SerializerMethodField()
 
     class Meta:
@@ -39,14 +39,8 @@ class QuestionSerializer(serializers.ModelSerializer):
             'updated_at',
         ]
 
-    def get_usage_count(self, obj) -> int:
-        annotated_value = getattr(obj, 'usage_count', None)
-        if annotated_value is not None:
-            return annotated_value
-        return obj.quiz_relations.count()
-
     def get_is_referenced(self, obj) -> bool:
-        return self.get_usage_count(obj) > 0
+        return obj.stats_usage_count > 0
 
 
 class QuestionWriteSerializer(serializers.Serializer):
@@ -60,3 +54,18 @@ class QuestionWriteSerializer(serializers.Serializer):
     space_tag_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
     tag_ids = serializers.ListField(child=serializers.IntegerField(), write_only=True, required=False)
     score = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+
+
+class QuestionDuplicateQuerySerializer(serializers.Serializer):
+    """创建/编辑前查近似重复题的请求体。"""
+
+    content = serializers.CharField()
+    options = serializers.ListField(child=serializers.DictField(), required=False)
+    exclude_id = serializers.IntegerField(required=False)
+
+
+class QuestionDuplicateSerializer(QuestionSerializer):
+    distance = serializers.IntegerField(read_only=True)
+
+    class Meta(QuestionSerializer.Meta):
+        fields = [*QuestionSerializer.Meta.fields, 'distance']
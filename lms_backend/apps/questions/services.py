@@ -4,12 +4,15 @@ from django.db import transaction
 
 from apps.activity_logs.decorators import log_content_action
 from apps.authorization.engine import enforce, scope_filter
+from apps.quizzes.fingerprints import refresh_question_fingerprints
+from apps.quizzes.stats import quiz_ids_for_questions, refresh_quiz_stats
 from apps.tags.resource_tags import (
     apply_resource_tag_changes,
     pop_resource_tag_payload,
 )
 from core.base_service import BaseService
 
+from .importer import import_questions, iter_question_rows
 from .models import Question
 from .payload import (
     build_merged_question_payload,
@@ -19,10 +22,12 @@ from .payload import (
     sync_question_options,
     validate_question_payload,
 )
+from .search import refresh_question_search_terms
 from .selectors import (
     apply_question_filters,
     question_base_queryset,
 )
+from .similarity import find_similar_questions, refresh_question_simhash
 
 
 def _format_score(value) -> str:
@@ -104,7 +109,8 @@ class QuestionService(BaseService):
         queryset = scope_filter('question.view', self.request, base_queryset=question_base_queryset())
         queryset = apply_question_filters(queryset, filters or {}, search)
         if ordering:
-            queryset = queryset.order_by(ordering)
+            # 搜索结果先按相关度排序
+            queryset = queryset.order_by('-search_rank', ordering) if search else queryset.order_by(ordering)
         return queryset
 
     @transaction.atomic
@@ -135,6 +141,9 @@ class QuestionService(BaseService):
             space_tag_provided=True,
             tag_ids_provided=True,
         )
+        refresh_question_fingerprints([question.id])
+        refresh_question_search_terms([question.id])
+        refresh_question_simhash([question.id])
         return question
 
     @transaction.atomic
@@ -175,10 +184,13 @@ class QuestionService(BaseService):
             return question
 
         if model_changed:
+            score_changed = model_fields['score'] != current_model_fields(question)['score']
             for key, value in model_fields.items():
                 setattr(question, key, value)
             question.updated_by = self.user
             question.save(update_fields=[*model_fields.keys(), 'updated_by'])
+            if score_changed:
+                refresh_quiz_stats(quiz_ids_for_questions([question.id]))
 
         if options_changed:
             sync_question_options(question, option_defs)
@@ -190,6 +202,9 @@ class QuestionService(BaseService):
             space_tag_provided=space_changed,
             tag_ids_provided=tags_changed,
         )
+        refresh_question_fingerprints([question.id])
+        refresh_question_search_terms([question.id])
+        refresh_question_simhash([question.id])
         return question
 
     @transaction.atomic
@@ -205,3 +220,24 @@ class QuestionService(BaseService):
         enforce('question.delete', self.request, resource=question, error_message='无权删除此题目')
         question.delete()
         return question
+
+    def find_duplicates(self, content: str, options: list[dict] = None, exclude_id: int = None) -> list[Question]:
+        """按 SimHash 查当前用户可见范围内的近似重复题，结果带 distance（汉明距离）。"""
+        queryset = scope_filter('question.view', self.request, base_queryset=question_base_queryset())
+        matches = find_similar_questions(
+            queryset,
+            content,
+            [str(option.get('value', '')) for option in options or []],
+            exclude_id=exclude_id,
+        )
+        for question, distance in matches:
+            question.distance = distance
+        return [question for question, _ in matches]
+
+    def import_file(self, file, *, dry_run: bool = False) -> dict:
+        """从 XLSX/CSV 批量导入题目，逐批提交，返回逐行错误报告。"""
+        return import_questions(
+            iter_question_rows(file, file.name),
+            actor=self.user,
+            dry_run=dry_run,
+        )
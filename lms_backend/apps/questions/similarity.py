@@ -0,0 +1,193 @@
+"""题库近似重复题检测（SimHash）。
+
+写时复制和重复导入会让题库里堆积内容几乎一样的题目，两两比较是 O(n²)。这里为每道题维护
+64 位 SimHash（题干字符二元组 + 选项文本，经 `normalize_search_text` 折叠），并拆成 6 段
+（4 段 11 位、2 段 10 位）分别建索引，相当于 6 张把不同分段轮换到键位的置换表：汉明距离不超过 5
+的两道题至少有一段完全相同（抽屉原理），所以查近似题只需按 6 个分段等值查出候选（每段 1024~2048 个桶，
+约为全库的 0.4%），再取 id 与 SimHash 算精确距离。改一个词或换一个选项通常在 3~5 位，
+无关题目在 20 位以上。
+
+单个桶的题目数超过 MAX_BUCKET_SIZE 时（大量模板化题干），全库报告跳过该桶，单题查重最多取
+MAX_CANDIDATES 个最新候选，避免退化为全表比较；同一对近似题通常还会在其他分段相遇。
+
+- 创建前查重：`find_similar_questions(content, options)`，供 `POST /api/questions/duplicates/` 使用
+- 全库去重报告：`iter_duplicate_groups()`，按分段分桶只比较同桶题目，供 `report_duplicate_questions` 命令使用
+- 维护时机：题目创建/更新、试卷编辑器改题、批量导入；历史数据用 `report_duplicate_questions --rebuild` 回填
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import Counter
+from typing import Iterable, Iterator
+
+from django.db.models import Count, Q
+
+from core.text_search import normalize_search_text, search_terms
+
+from .models import Question, QuestionOption
+
+BATCH_SIZE = 500
+HASH_BITS = 64
+BAND_WIDTHS = (11, 11, 11, 11, 10, 10)
+BAND_COUNT = len(BAND_WIDTHS)
+BAND_OFFSETS = tuple(sum(BAND_WIDTHS[:index]) for index in range(BAND_COUNT))
+# 分段数减一：距离再大就可能每段都有差异，索引无法保证召回
+DEFAULT_MAX_DISTANCE = BAND_COUNT - 1
+MAX_BUCKET_SIZE = 1000
+MAX_CANDIDATES = 5000
+OPTION_WEIGHT = 2
+BAND_FIELDS = [f'simhash_band_{index}' for index in range(BAND_COUNT)]
+SIMHASH_FIELDS = ['simhash', *BAND_FIELDS]
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def compute_simhash(content: str, option_texts: Iterable[str] = ()) -> int:
+    """题干二元组与选项文本（不计顺序）加权合成 64 位无符号 SimHash。"""
+    features = Counter(search_terms(content))
+    for text in option_texts:
+        option = normalize_search_text(text).strip()
+        if option:
+            features[f'option:{option}'] += OPTION_WEIGHT
+    if not features:
+        return 0
+    vector = [0] * HASH_BITS
+    for feature, weight in features.items():
+        value = _feature_hash(feature)
+        for bit in range(HASH_BITS):
+            vector[bit] += weight if value >> bit & 1 else -weight
+    return sum(1 << bit for bit in range(HASH_BITS) if vector[bit] > 0)
+
+
+def hamming_distance(left: int, right: int) -> int:
+    return bin(left ^ right).count('1')
+
+
+def _to_signed(value: int) -> int:
+    # BigIntegerField 为有符号 64 位
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+def _bands(value: int) -> list[int]:
+    return [value >> offset & ((1 << width) - 1) for offset, width in zip(BAND_OFFSETS, BAND_WIDTHS)]
+
+
+def _option_texts(question_ids: list[int]) -> dict[int, list[str]]:
+    texts: dict[int, list[str]] = {question_id: [] for question_id in question_ids}
+    for question_id, content in QuestionOption.objects.filter(
+        question_id__in=question_ids,
+    ).values_list('question_id', 'content'):
+        texts[question_id].append(content)
+    return texts
+
+
+def refresh_question_simhash(question_ids: Iterable[int]) -> None:
+    """按当前题干与选项重算这些题目的 SimHash 与分段。"""
+    question_ids = sorted(set(question_ids))
+    for start in range(0, len(question_ids), BATCH_SIZE):
+        batch_ids = question_ids[start:start + BATCH_SIZE]
+        options = _option_texts(batch_ids)
+        questions = []
+        for question_id, content in Question.objects.filter(id__in=batch_ids).values_list('id', 'content'):
+            value = compute_simhash(content, options[question_id])
+            # 无可比内容（空题干且无选项）时留空，避免全部落进同一个桶
+            question = Question(id=question_id, simhash=_to_signed(value) if value else None)
+            for field, band in zip(BAND_FIELDS, _bands(value) if value else [None] * BAND_COUNT):
+                setattr(question, field, band)
+            questions.append(question)
+        Question.objects.bulk_update(questions, SIMHASH_FIELDS, batch_size=BATCH_SIZE)
+
+
+def rebuild_question_simhash() -> int:
+    """全量重算 SimHash，返回题目数。"""
+    total = 0
+    last_id = 0
+    while True:
+        batch_ids = list(
+            Question.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BATCH_SIZE]
+        )
+        if not batch_ids:
+            return total
+        last_id = batch_ids[-1]
+        refresh_question_simhash(batch_ids)
+        total += len(batch_ids)
+
+
+def find_similar_questions(
+    queryset,
+    content: str,
+    option_texts: Iterable[str] = (),
+    *,
+    max_distance: int = DEFAULT_MAX_DISTANCE,
+    exclude_id: int | None = None,
+    limit: int = 10,
+) -> list[tuple[Question, int]]:
+    """在 queryset 范围内查近似题，返回按距离升序的 (题目, 汉明距离)。"""
+    value = compute_simhash(content, option_texts)
+    if not value:
+        return []
+    band_filter = Q()
+    for field, band in zip(BAND_FIELDS, _bands(value)):
+        band_filter |= Q(**{field: band})
+    candidates = queryset.filter(band_filter)
+    if exclude_id is not None:
+        candidates = candidates.exclude(id=exclude_id)
+    # 先只取 id 和 SimHash 算距离，命中的少数题目再整行加载
+    distances = {
+        question_id: distance
+        for question_id, simhash in candidates.order_by('-id').values_list('id', 'simhash')[:MAX_CANDIDATES]
+        if (distance := hamming_distance(value, _to_unsigned(simhash))) <= max_distance
+    }
+    matched_ids = sorted(distances, key=lambda question_id: (distances[question_id], -question_id))[:limit]
+    questions = queryset.in_bulk(matched_ids)
+    return [(questions[question_id], distances[question_id]) for question_id in matched_ids]
+
+
+def iter_duplicate_groups(*, max_distance: int = DEFAULT_MAX_DISTANCE) -> Iterator[list[int]]:
+    """全库近似重复题分组（题目 id 升序），只比较至少一个分段相同的题目，跳过超大桶。"""
+    parent: dict[int, int] = {}
+
+    def find(question_id: int) -> int:
+        while parent.setdefault(question_id, question_id) != question_id:
+            parent[question_id] = parent[parent[question_id]]
+            question_id = parent[question_id]
+        return question_id
+
+    def union_bucket(bucket: list[tuple[int, int]]) -> None:
+        for index, (left_id, left_hash) in enumerate(bucket):
+            for right_id, right_hash in bucket[index + 1:]:
+                if hamming_distance(left_hash, right_hash) <= max_distance:
+                    parent[find(left_id)] = find(right_id)
+
+    for field in BAND_FIELDS:
+        shared_bands = (
+            Question.objects.filter(**{f'{field}__isnull': False})
+            .values(field)
+            .annotate(size=Count('id'))
+            .filter(size__gt=1, size__lte=MAX_BUCKET_SIZE)
+            .values_list(field, flat=True)
+        )
+        bucket: list[tuple[int, int]] = []
+        current_band = None
+        for question_id, band, simhash in Question.objects.filter(
+            **{f'{field}__in': shared_bands},
+        ).order_by(field, 'id').values_list('id', field, 'simhash').iterator(chunk_size=2000):
+            if band != current_band:
+                union_bucket(bucket)
+                bucket, current_band = [], band
+            bucket.append((question_id, _to_unsigned(simhash)))
+        union_bucket(bucket)
+
+    groups: dict[int, list[int]] = {}
+    for question_id in parent:
+        groups.setdefault(find(question_id), []).append(question_id)
+    for members in sorted(groups.values(), key=min):
+        if len(members) > 1:
+            yield sorted(members)
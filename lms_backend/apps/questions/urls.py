@@ -5,11 +5,15 @@ from django.urls import path
 
 from .views import (
     QuestionDetailView,
+    QuestionDuplicateView,
+    QuestionImportView,
     QuestionListCreateView,
 )
 
 urlpatterns = [
     # Question CRUD
     path('', QuestionListCreateView.as_view(), name='question-list-create'),
+    path('duplicates/', QuestionDuplicateView.as_view(), name='question-duplicates'),
+    path('import/', QuestionImportView.as_view(), name='question-import'),
     path('<int:pk>/', QuestionDetailView.as_view(), name='question-detail'),
 ]
@@ -1,15 +1,23 @@
 """题目视图。"""
 
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 
 from apps.authorization.engine import enforce
 from core.base_view import BaseAPIView
 from core.pagination import StandardResultsSetPagination
-from core.query_params import parse_int_query_param
+from core.exceptions import BusinessError, ErrorCodes
+from core.query_params import parse_bool_query_param, parse_int_query_param
 from core.responses import created_response, no_content_response, success_response
 
-from .serializers import QuestionSerializer, QuestionWriteSerializer
+from .importer import MAX_FILE_SIZE
+from .serializers import (
+    QuestionDuplicateQuerySerializer,
+    QuestionDuplicateSerializer,
+    QuestionSerializer,
+    QuestionWriteSerializer,
+)
 from .services import QuestionService
 
 
@@ -27,6 +35,7 @@ class QuestionListCreateView(BaseAPIView):
             OpenApiParameter(name='search', type=str, description='搜索题目内容'),
             OpenApiParameter(name='created_by', type=int, description='创建者ID'),
             OpenApiParameter(name='space_tag_id', type=int, description='space ID'),
+            OpenApiParameter(name='unused', type=bool, description='只看未被试卷引用的题目'),
             OpenApiParameter(name='page', type=int, description='页码'),
             OpenApiParameter(name='page_size', type=int, description='每页数量'),
         ],
@@ -47,6 +56,8 @@ class QuestionListCreateView(BaseAPIView):
         tag_id = parse_int_query_param(request=request, name='tag_id', minimum=1)
         if tag_id is not None:
             filters['tag_id'] = tag_id
+        if parse_bool_query_param(request, 'unused', default=False):
+            filters['unused'] = True
         search = request.query_params.get('search')
 
         queryset = self.service.get_queryset(
@@ -127,3 +138,61 @@ class QuestionDetailView(BaseAPIView):
     def delete(self, request, pk):
         self.service.delete(pk=pk)
         return no_content_response()
+
+
+class QuestionDuplicateView(BaseAPIView):
+    """POST /api/questions/duplicates/ — 创建/编辑前查近似重复题。"""
+
+    permission_classes = [IsAuthenticated]
+    service_class = QuestionService
+
+    @extend_schema(
+        summary='查找近似重复题目',
+        description='按题干和选项的 SimHash 查找可见范围内的近似重复题目，按相似度排序',
+        request=QuestionDuplicateQuerySerializer,
+        responses={200: QuestionDuplicateSerializer(many=True)},
+        tags=['题库管理'],
+    )
+    def post(self, request):
+        enforce('question.view', request, error_message='无权查看题目列表')
+        serializer = QuestionDuplicateQuerySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        questions = self.service.find_duplicates(**serializer.validated_data)
+        return success_response(QuestionDuplicateSerializer(questions, many=True).data)
+
+
+class QuestionImportView(BaseAPIView):
+    """POST /api/questions/import/ — 上传 XLSX/CSV 批量导入题目。"""
+
+    parser_classes = [MultiPartParser]
+    permission_classes = [IsAuthenticated]
+    service_class = QuestionService
+
+    @extend_schema(
+        summary='批量导入题目',
+        description='上传 XLSX/CSV 批量导入题目，返回逐行错误报告；dry_run=true 时只校验不写入',
+        parameters=[
+            OpenApiParameter(name='dry_run', type=bool, description='只校验不写入'),
+        ],
+        responses={
+            200: OpenApiResponse(description='导入报告'),
+            400: OpenApiResponse(description='文件格式错误'),
+            403: OpenApiResponse(description='无权限'),
+        },
+        tags=['题库管理'],
+    )
+    def post(self, request):
+        enforce('question.create', request, error_message='无权导入题目')
+        file = request.FILES.get('file')
+        if not file:
+            raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message='请上传文件')
+        if file.size > MAX_FILE_SIZE:
+            raise BusinessError(
+                code=ErrorCodes.VALIDATION_ERROR,
+                message=f'文件大小超过限制（最大 {MAX_FILE_SIZE // 1024 // 1024}MB）',
+            )
+        report = self.service.import_file(
+            file,
+            dry_run=parse_bool_query_param(request, 'dry_run', default=False),
+        )
+        return success_response(report)
@@ -0,0 +1,262 @@
+"""试卷快照答案键。
+
+快照题目创建后不再变化，判分只需要「选项 id ↔ 展示 key」、正确答案和分值。
+这里把它们预编译成不可变的 `QuestionAnswerKey`，并按 revision id 缓存在进程内 LRU，
+保存答案、判分、答卷序列化和阅卷分析不再逐题重建选项描述。
+判分规则与 `QuestionContentMixin.check_answer` 保持一致。
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional
+
+from django.conf import settings
+
+from apps.questions.question_like import build_option_keys
+
+from .models import QuizRevisionQuestion
+
+
+@dataclass(frozen=True)
+class QuestionAnswerKey:
+    question_id: int
+    question_type: str
+    score: Decimal
+    #: 选项 id → 展示 key，按快照选项顺序排列
+    option_id_keys: Mapping[int, str]
+    #: 展示 key → 选项 id
+    option_key_ids: Mapping[str, int]
+    correct_keys: frozenset
+    #: 多选为 key 元组，简答为参考答案，其余为单个 key（无正确选项时为空串）
+    correct_answer: Any
+
+    @property
+    def is_subjective(self) -> bool:
+        return self.question_type == 'SHORT_ANSWER'
+
+    @property
+    def answer(self):
+        """`QuestionContentMixin.answer` 的等值结果；多选每次返回新列表，调用方可自由修改。"""
+        if self.question_type == 'MULTIPLE_CHOICE':
+            return list(self.correct_answer)
+        return self.correct_answer
+
+    def resolve_user_answer(self, option_ids: Iterable[int]):
+        """把已选选项 id 还原成 `Answer.user_answer` 的取值。"""
+        selected = set(option_ids)
+        selected_keys = [
+            key
+            for option_id, key in self.option_id_keys.items()
+            if option_id in selected
+        ]
+        if not selected_keys:
+            return None
+        if self.question_type == 'MULTIPLE_CHOICE':
+            return selected_keys
+        return selected_keys[0]
+
+    def check(self, user_answer) -> tuple[Optional[bool], Decimal]:
+        if self.is_subjective:
+            return None, Decimal('0')
+
+        if self.question_type in ('SINGLE_CHOICE', 'TRUE_FALSE'):
+            is_correct = user_answer == self.correct_answer
+        elif self.question_type == 'MULTIPLE_CHOICE':
+            if isinstance(user_answer, list):
+                is_correct = set(user_answer) == self.correct_keys
+            else:
+                is_correct = False
+        else:
+            is_correct = False
+        return is_correct, self.score if is_correct else Decimal('0')
+
+
+def _build_answer_key(
+    *,
+    question_id: int,
+    question_type: str,
+    score,
+    reference_answer: str,
+    options: list[tuple[int, bool]],
+) -> QuestionAnswerKey:
+    """options 为按 (sort_order, id) 排好序的 (option_id, is_correct)。"""
+    if question_type == 'SHORT_ANSWER':
+        options = []
+    keys = build_option_keys(question_type, len(options))
+    option_id_keys = {option_id: keys[index] for index, (option_id, _) in enumerate(options)}
+    correct_keys = [keys[index] for index, (_, is_correct) in enumerate(options) if is_correct]
+    if question_type == 'SHORT_ANSWER':
+        correct_answer = reference_answer
+    elif question_type == 'MULTIPLE_CHOICE':
+        correct_answer = tuple(correct_keys)
+    else:
+        correct_answer = correct_keys[0] if correct_keys else ''
+    return QuestionAnswerKey(
+        question_id=question_id,
+        question_type=question_type,
+        score=Decimal(str(score)),
+        option_id_keys=MappingProxyType(option_id_keys),
+        option_key_ids=MappingProxyType({key: option_id for option_id, key in option_id_keys.items()}),
+        correct_keys=frozenset(correct_keys),
+        correct_answer=correct_answer,
+    )
+
+
+def compile_answer_key(question) -> QuestionAnswerKey:
+    """从单道快照题目（可已预加载选项）编译答案键。"""
+    return _build_answer_key(
+        question_id=question.id,
+        question_type=question.question_type,
+        score=question.score,
+        reference_answer=question.reference_answer,
+        options=[(option.id, option.is_correct) for option in question._ordered_options()],
+    )
+
+
+def load_revision_answer_keys(revision_id: int) -> Mapping[int, QuestionAnswerKey]:
+    """单条 LEFT JOIN 查询加载一份试卷快照的全部答案键，按快照题目 id 索引。"""
+    rows = QuizRevisionQuestion.objects.filter(quiz_id=revision_id).order_by(
+        'id',
+        'snapshot__question_options__sort_order',
+        'snapshot__question_options__id',
+    ).values_list(
+        'id',
+        'question_type',
+        'score',
+        'snapshot__reference_answer',
+        'snapshot__question_options__id',
+        'snapshot__question_options__is_correct',
+    )
+    questions: dict[int, dict] = {}
+    for question_id, question_type, score, reference_answer, option_id, is_correct in rows:
+        entry = questions.setdefault(
+            question_id,
+            {
+                'question_id': question_id,
+                'question_type': question_type,
+                'score': score,
+                'reference_answer': reference_answer,
+                'options': [],
+            },
+        )
+        if option_id is not None:
+            entry['options'].append((option_id, is_correct))
+    return MappingProxyType({
+        question_id: _build_answer_key(**entry)
+        for question_id, entry in questions.items()
+    })
+
+
+def _estimate_size(value, seen: set[int] | None = None) -> int:
+    """粗略估算对象图占用字节数，用于缓存容量记账。"""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, (Mapping, MappingProxyType)):
+        size += sum(
+            _estimate_size(key, seen) + _estimate_size(item, seen)
+            for key, item in value.items()
+        )
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_estimate_size(item, seen) for item in value)
+    elif is_dataclass(value):
+        size += sum(_estimate_size(getattr(value, field.name), seen) for field in fields(value))
+    return size
+
+
+class AnswerKeyCache:
+    """按 revision id 缓存答案键的进程内 LRU。
+
+    快照不可变，条目无需过期；按条目数和估算字节数两道上限淘汰最久未用的快照。
+    """
+
+    def __init__(self, *, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[int, tuple[Mapping[int, QuestionAnswerKey], int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, revision_id: int) -> Mapping[int, QuestionAnswerKey]:
+        with self._lock:
+            cached = self._entries.get(revision_id)
+            if cached is not None:
+                self._entries.move_to_end(revision_id)
+                self._hits += 1
+                return cached[0]
+            self._misses += 1
+
+        # 查询放在锁外，避免慢查询阻塞其他 revision 的命中
+        answer_keys = load_revision_answer_keys(revision_id)
+        size = _estimate_size(answer_keys)
+        if not answer_keys:
+            # 空结果可能是 revision 尚未写完题目或已删除，不缓存
+            return answer_keys
+        with self._lock:
+            if revision_id not in self._entries:
+                self._entries[revision_id] = (answer_keys, size)
+                self._bytes += size
+                self._evict()
+        return answer_keys
+
+    def invalidate(self, revision_id: int) -> None:
+        with self._lock:
+            cached = self._entries.pop(revision_id, None)
+            if cached is not None:
+                self._bytes -= cached[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else None,
+            }
+
+    def _evict(self) -> None:
+        # 至少保留刚写入的一条，单份超大试卷也能命中
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self._evictions += 1
+
+
+answer_key_cache = AnswerKeyCache(
+    max_entries=settings.QUIZ_ANSWER_KEY_CACHE['MAX_ENTRIES'],
+    max_bytes=settings.QUIZ_ANSWER_KEY_CACHE['MAX_BYTES'],
+)
+
+
+def get_revision_answer_keys(revision_id: int) -> Mapping[int, QuestionAnswerKey]:
+    return answer_key_cache.get(revision_id)
+
+
+def get_question_answer_key(question) -> Optional[QuestionAnswerKey]:
+    """取快照题目的答案键；未落库的题目返回 None，由调用方回退到模型计算。"""
+    if question.pk is None or question.quiz_id is None:
+        return None
+    return get_revision_answer_keys(question.quiz_id).get(question.pk)
@@ -0,0 +1,194 @@
+"""题目/试卷内容指纹。
+
+`ensure_quiz_revision` 原本每次都要加载整卷题目、选项和标签来生成 payload 再算哈希。
+这里在写入路径上维护两级指纹，发布任务时只需比较 `Quiz.content_fingerprint`
+与最新快照记录的 `QuizRevision.source_fingerprint`：
+
+- 题目指纹：快照行中除 order 外的全部字段（内容、选项、space/标签名称）
+- 试卷指纹：试卷基础字段 + 按顺序排列的 (order, 题目 id, 题目指纹)
+
+维护时机：题目创建/更新、试卷保存、标签改名/改类型/合并/删除。题目指纹变化会级联刷新
+包含它的试卷。指纹为空表示未知（历史数据或有题目未计算），此时退回全量 payload 比较；
+历史数据用 `python manage.py check_content_fingerprints --repair` 回填。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Iterable
+
+from apps.questions.models import Question
+
+from .models import Quiz, QuizQuestion
+
+BATCH_SIZE = 500
+
+
+def content_digest(payload) -> str:
+    normalized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def build_question_snapshot_row(question: Question) -> dict:
+    """题库题对应的快照行（不含 order），需预加载 space_tag / question_options / tags。"""
+    return {
+        'source_question_id': question.id,
+        'content': question.content,
+        'question_type': question.question_type,
+        'reference_answer': question.reference_answer,
+        'explanation': question.explanation,
+        'score': str(question.score),
+        'space_tag_name': question.space_tag.name if question.space_tag_id else '',
+        'tags_json': [
+            {'id': tag.id, 'name': tag.name, 'tag_type': tag.tag_type}
+            for tag in sorted(question.tags.all(), key=lambda tag: tag.id)
+        ],
+        'options': [
+            {
+                'sort_order': option.sort_order,
+                'content': option.content,
+                'is_correct': option.is_correct,
+            }
+            for option in question._ordered_options()
+        ],
+    }
+
+
+def build_quiz_base_payload(quiz: Quiz) -> dict:
+    return {
+        'title': quiz.title,
+        'quiz_type': quiz.quiz_type,
+        'duration': quiz.duration,
+        'pass_score': str(quiz.pass_score) if quiz.pass_score is not None else None,
+    }
+
+
+def compute_question_fingerprint(question: Question) -> str:
+    return content_digest(build_question_snapshot_row(question))
+
+
+def compute_quiz_fingerprint(quiz: Quiz, entries: list[tuple[int, int, str]]) -> str:
+    """entries 为按顺序排列的 (order, 题目 id, 题目指纹)；任一题目指纹未知时返回空串。"""
+    if any(not question_fingerprint for _, _, question_fingerprint in entries):
+        return ''
+    return content_digest({
+        **build_quiz_base_payload(quiz),
+        'questions': [list(entry) for entry in entries],
+    })
+
+
+def _question_queryset():
+    return Question.objects.select_related('space_tag').prefetch_related('question_options', 'tags')
+
+
+def _iter_question_batches(question_ids: Iterable[int] | None = None):
+    queryset = _question_queryset().order_by('id')
+    if question_ids is not None:
+        queryset = queryset.filter(id__in=list(question_ids))
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            return
+        last_id = batch[-1].id
+        yield batch
+
+
+def _quiz_entries(quiz_ids: Iterable[int], overrides: dict[int, str] | None = None) -> dict[int, list]:
+    overrides = overrides or {}
+    entries: dict[int, list] = {quiz_id: [] for quiz_id in quiz_ids}
+    rows = QuizQuestion.objects.filter(quiz_id__in=list(entries)).order_by(
+        'quiz_id', 'order', 'id',
+    ).values_list('quiz_id', 'order', 'question_id', 'question__content_fingerprint')
+    for quiz_id, order, question_id, question_fingerprint in rows:
+        entries[quiz_id].append((order, question_id, overrides.get(question_id, question_fingerprint)))
+    return entries
+
+
+def _quiz_queryset():
+    return Quiz.objects.only('id', 'title', 'quiz_type', 'duration', 'pass_score', 'content_fingerprint')
+
+
+def refresh_quiz_fingerprints(quiz_ids: Iterable[int]) -> set[int]:
+    """按当前题目指纹重算试卷指纹，返回指纹有变化的试卷 id。"""
+    quiz_ids = set(quiz_ids)
+    if not quiz_ids:
+        return set()
+    entries = _quiz_entries(quiz_ids)
+    changed = []
+    for quiz in _quiz_queryset().filter(id__in=quiz_ids):
+        fingerprint = compute_quiz_fingerprint(quiz, entries[quiz.id])
+        if quiz.content_fingerprint != fingerprint:
+            quiz.content_fingerprint = fingerprint
+            changed.append(quiz)
+    Quiz.objects.bulk_update(changed, ['content_fingerprint'], batch_size=BATCH_SIZE)
+    return {quiz.id for quiz in changed}
+
+
+def refresh_question_fingerprints(question_ids: Iterable[int]) -> set[int]:
+    """重算题目指纹并级联刷新包含这些题目的试卷，返回指纹有变化的题目 id。"""
+    question_ids = set(question_ids)
+    if not question_ids:
+        return set()
+    changed = []
+    for batch in _iter_question_batches(question_ids):
+        for question in batch:
+            fingerprint = compute_question_fingerprint(question)
+            if question.content_fingerprint != fingerprint:
+                question.content_fingerprint = fingerprint
+                changed.append(question)
+    if not changed:
+        return set()
+    changed_ids = {question.id for question in changed}
+    Question.objects.bulk_update(changed, ['content_fingerprint'], batch_size=BATCH_SIZE)
+    refresh_quiz_fingerprints(
+        QuizQuestion.objects.filter(question_id__in=changed_ids).values_list('quiz_id', flat=True).distinct()
+    )
+    return changed_ids
+
+
+def tagged_question_ids(tag_ids: Iterable[int]) -> list[int]:
+    """引用这些标签（作为 space 或普通标签）的题目 id，标签变更前调用。"""
+    tag_ids = list(tag_ids)
+    space_ids = Question.objects.filter(space_tag_id__in=tag_ids).values_list('id', flat=True)
+    tag_item_ids = Question.tags.through.objects.filter(tag_id__in=tag_ids).values_list('question_id', flat=True)
+    return list({*space_ids, *tag_item_ids})
+
+
+def verify_content_fingerprints(*, repair: bool = False) -> dict:
+    """全量重算题目与试卷指纹，返回 (id, 库内值, 全量值) 列表；repair=True 时修正（也用于回填）。"""
+    question_overrides: dict[int, str] = {}
+    question_drift = []
+    for batch in _iter_question_batches():
+        for question in batch:
+            fingerprint = compute_question_fingerprint(question)
+            if question.content_fingerprint != fingerprint:
+                question_drift.append((question.id, question.content_fingerprint, fingerprint))
+                question_overrides[question.id] = fingerprint
+    if repair:
+        Question.objects.bulk_update(
+            [Question(id=question_id, content_fingerprint=fingerprint) for question_id, _, fingerprint in question_drift],
+            ['content_fingerprint'],
+            batch_size=BATCH_SIZE,
+        )
+
+    quiz_drift = []
+    last_id = 0
+    while True:
+        quizzes = list(_quiz_queryset().filter(id__gt=last_id).order_by('id')[:BATCH_SIZE])
+        if not quizzes:
+            break
+        last_id = quizzes[-1].id
+        entries = _quiz_entries([quiz.id for quiz in quizzes], question_overrides)
+        for quiz in quizzes:
+            fingerprint = compute_quiz_fingerprint(quiz, entries[quiz.id])
+            if quiz.content_fingerprint != fingerprint:
+                quiz_drift.append((quiz.id, quiz.content_fingerprint, fingerprint))
+    if repair:
+        Quiz.objects.bulk_update(
+            [Quiz(id=quiz_id, content_fingerprint=fingerprint) for quiz_id, _, fingerprint in quiz_drift],
+            ['content_fingerprint'],
+            batch_size=BATCH_SIZE,
+        )
+    return {'questions': question_drift, 'quizzes': quiz_drift}
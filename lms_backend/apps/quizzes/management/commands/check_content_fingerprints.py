@@ -0,0 +1,31 @@
+"""Verify (and backfill) maintained question/quiz content fingerprints."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.quizzes.fingerprints import verify_content_fingerprints
+
+
+class Command(BaseCommand):
+    help = '全量重算题目与试卷内容指纹并与库内值核对，--repair 时修正（上线后用于回填历史数据）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='修正不一致的指纹')
+        parser.add_argument('--limit', type=int, default=20, help='每类最多打印多少条不一致记录')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            result = verify_content_fingerprints(repair=options['repair'])
+
+        for question_id, stored, expected in result['questions'][:options['limit']]:
+            self.stdout.write(f'题目 {question_id}：库内 {stored or "(空)"}，应为 {expected}')
+        for quiz_id, stored, expected in result['quizzes'][:options['limit']]:
+            self.stdout.write(f'试卷 {quiz_id}：库内 {stored or "(空)"}，应为 {expected or "(空)"}')
+
+        summary = f"题目不一致 {len(result['questions'])} 条，试卷不一致 {len(result['quizzes'])} 条"
+        if not result['questions'] and not result['quizzes']:
+            self.stdout.write(self.style.SUCCESS('内容指纹一致'))
+        elif options['repair']:
+            self.stdout.write(self.style.SUCCESS(f'{summary}，已修正'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{summary}，加 --repair 修正'))
@@ -0,0 +1,38 @@
+"""Rebuild denormalized quiz and question list statistics."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.quizzes.stats import rebuild_question_usage_counts, rebuild_quiz_stats
+
+
+class Command(BaseCommand):
+    help = '全量重算试卷题目数、总分、被任务引用次数与题目被试卷引用次数统计列，--dry-run 只核对不写入'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='只打印不一致记录，不写入')
+        parser.add_argument('--limit', type=int, default=20, help='最多打印多少条不一致记录')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = rebuild_quiz_stats(dry_run=options['dry_run'])
+            question_drift = rebuild_question_usage_counts(dry_run=options['dry_run'])
+
+        for quiz_id, stored, expected in drift[:options['limit']]:
+            self.stdout.write(
+                f'试卷 {quiz_id}：题目数/总分/引用次数 库内 {stored[0]}/{stored[1]}/{stored[2]}，'
+                f'应为 {expected[0]}/{expected[1]}/{expected[2]}'
+            )
+        for question_id, stored, expected in question_drift[:options['limit']]:
+            self.stdout.write(f'题目 {question_id}：被引用次数 库内 {stored}，应为 {expected}')
+
+        self._report('试卷统计', drift, options['dry_run'])
+        self._report('题目引用次数', question_drift, options['dry_run'])
+
+    def _report(self, label: str, drift: list, dry_run: bool) -> None:
+        if not drift:
+            self.stdout.write(self.style.SUCCESS(f'{label}一致'))
+        elif dry_run:
+            self.stdout.write(self.style.WARNING(f'{label}不一致 {len(drift)} 条，去掉 --dry-run 重建'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{label}不一致 {len(drift)} 条，已重建'))
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0003_quizquestion_relation_only'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='content_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='内容指纹'),
+        ),
+        migrations.AddField(
+            model_name='quizrevision',
+            name='source_fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='来源试卷指纹'),
+        ),
+    ]
@@ -0,0 +1,166 @@
+"""试卷快照题目内容按哈希去重到 QuestionSnapshot，QuizRevisionQuestion 只保留顺序/题型/分值。
+
+QuizRevisionQuestion 的 id 不变，Answer 引用不受影响；重复内容的快照选项并入保留行，
+AnswerSelection 按 sort_order 改指向保留的选项后再删除重复选项。
+执行前需先落库作答草稿（flush_answer_drafts），草稿缓存里的选项 id 会失效。
+"""
+
+import hashlib
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 500
+
+
+def _snapshot_hash(question, options) -> str:
+    # 与 apps.quizzes.snapshots.build_snapshot_hash 保持一致
+    payload = {
+        'question_type': question.question_type,
+        'content': question.content,
+        'reference_answer': question.reference_answer,
+        'explanation': question.explanation,
+        'space_tag_name': question.space_tag_name,
+        'tags_json': question.tags_json,
+        'options': [[option.sort_order, option.content, option.is_correct] for option in options],
+    }
+    normalized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def forwards_dedup_snapshots(apps, schema_editor):
+    QuizRevisionQuestion = apps.get_model('quizzes', 'QuizRevisionQuestion')
+    QuizRevisionQuestionOption = apps.get_model('quizzes', 'QuizRevisionQuestionOption')
+    QuestionSnapshot = apps.get_model('quizzes', 'QuestionSnapshot')
+    AnswerSelection = apps.get_model('submissions', 'AnswerSelection')
+
+    # 内容哈希 → (snapshot id, {sort_order: 保留的选项 id})
+    canonical: dict[str, tuple[int, dict[int, int]]] = {}
+    last_id = 0
+    while True:
+        questions = list(QuizRevisionQuestion.objects.filter(id__gt=last_id).order_by('id')[:BATCH_SIZE])
+        if not questions:
+            break
+        last_id = questions[-1].id
+        options_by_question: dict[int, list] = {question.id: [] for question in questions}
+        for option in QuizRevisionQuestionOption.objects.filter(
+            question_id__in=list(options_by_question),
+        ).order_by('sort_order', 'id'):
+            options_by_question[option.question_id].append(option)
+
+        for question in questions:
+            options = options_by_question[question.id]
+            content_hash = _snapshot_hash(question, options)
+            if content_hash not in canonical:
+                snapshot = QuestionSnapshot.objects.create(
+                    content_hash=content_hash,
+                    content=question.content,
+                    reference_answer=question.reference_answer,
+                    explanation=question.explanation,
+                    space_tag_name=question.space_tag_name,
+                    tags_json=question.tags_json,
+                )
+                QuizRevisionQuestionOption.objects.filter(question_id=question.id).update(snapshot_id=snapshot.id)
+                canonical[content_hash] = (snapshot.id, {option.sort_order: option.id for option in options})
+            else:
+                snapshot_id, kept_options = canonical[content_hash]
+                for option in options:
+                    AnswerSelection.objects.filter(question_option_id=option.id).update(
+                        question_option_id=kept_options[option.sort_order],
+                    )
+                QuizRevisionQuestionOption.objects.filter(question_id=question.id).delete()
+                snapshot = QuestionSnapshot(id=snapshot_id)
+            question.snapshot_id = snapshot.id
+        QuizRevisionQuestion.objects.bulk_update(questions, ['snapshot'])
+
+
+def noop_reverse(apps, schema_editor):
+    raise migrations.IrreversibleError('试卷快照题目内容去重不可逆')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0004_content_fingerprint'),
+        ('submissions', '0007_remove_submission_remaining_seconds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('content_hash', models.CharField(max_length=64, unique=True, verbose_name='内容哈希')),
+                ('content', models.TextField(default='', verbose_name='题目内容')),
+                ('reference_answer', models.TextField(blank=True, default='', verbose_name='参考答案')),
+                ('explanation', models.TextField(blank=True, default='', verbose_name='解析')),
+                ('space_tag_name', models.CharField(blank=True, default='', max_length=100, verbose_name='space 名称')),
+                ('tags_json', models.JSONField(blank=True, default=list, verbose_name='标签快照')),
+            ],
+            options={
+                'verbose_name': '题目快照内容',
+                'verbose_name_plural': '题目快照内容',
+                'db_table': 'lms_question_snapshot',
+            },
+        ),
+        migrations.AddField(
+            model_name='quizrevisionquestion',
+            name='snapshot',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='revision_questions', to='quizzes.questionsnapshot', verbose_name='题目快照内容'),
+        ),
+        migrations.AddField(
+            model_name='quizrevisionquestionoption',
+            name='snapshot',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='question_options', to='quizzes.questionsnapshot', verbose_name='题目快照内容'),
+        ),
+        migrations.RunPython(forwards_dedup_snapshots, noop_reverse),
+        migrations.RemoveConstraint(
+            model_name='quizrevisionquestionoption',
+            name='uniq_quiz_revision_question_option_order',
+        ),
+        migrations.RemoveField(
+            model_name='quizrevisionquestionoption',
+            name='question',
+        ),
+        migrations.AlterField(
+            model_name='quizrevisionquestionoption',
+            name='snapshot',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_options', to='quizzes.questionsnapshot', verbose_name='题目快照内容'),
+        ),
+        migrations.AlterModelOptions(
+            name='quizrevisionquestionoption',
+            options={'ordering': ['snapshot_id', 'sort_order', 'id'], 'verbose_name': '试卷快照题目选项', 'verbose_name_plural': '试卷快照题目选项'},
+        ),
+        migrations.AddConstraint(
+            model_name='quizrevisionquestionoption',
+            constraint=models.UniqueConstraint(fields=('snapshot', 'sort_order'), name='uniq_question_snapshot_option_order'),
+        ),
+        migrations.AlterField(
+            model_name='quizrevisionquestion',
+            name='snapshot',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='revision_questions', to='quizzes.questionsnapshot', verbose_name='题目快照内容'),
+        ),
+        migrations.RemoveField(
+            model_name='quizrevisionquestion',
+            name='content',
+        ),
+        migrations.RemoveField(
+            model_name='quizrevisionquestion',
+            name='explanation',
+        ),
+        migrations.RemoveField(
+            model_name='quizrevisionquestion',
+            name='reference_answer',
+        ),
+        migrations.RemoveField(
+            model_name='quizrevisionquestion',
+            name='space_tag_name',
+        ),
+        migrations.RemoveField(
+            model_name='quizrevisionquestion',
+            name='tags_json',
+        ),
+    ]
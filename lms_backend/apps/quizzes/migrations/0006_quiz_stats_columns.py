@@ -0,0 +1,60 @@
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def forwards_backfill_stats(apps, schema_editor):
+    Quiz = apps.get_model('quizzes', 'Quiz')
+    QuizQuestion = apps.get_model('quizzes', 'QuizQuestion')
+    TaskQuiz = apps.get_model('tasks', 'TaskQuiz')
+
+    question_stats = {
+        row['quiz_id']: row
+        for row in QuizQuestion.objects.values('quiz_id').annotate(
+            question_count=Count('id'),
+            total_score=Sum('question__score'),
+        )
+    }
+    usage_counts = dict(
+        TaskQuiz.objects.filter(source_quiz_id__isnull=False)
+        .values('source_quiz_id')
+        .annotate(usage_count=Count('task_id', distinct=True))
+        .values_list('source_quiz_id', 'usage_count')
+    )
+    quizzes = list(Quiz.objects.only('id'))
+    for quiz in quizzes:
+        row = question_stats.get(quiz.id) or {}
+        quiz.stats_question_count = row.get('question_count', 0)
+        quiz.stats_total_score = row.get('total_score') or 0
+        quiz.stats_usage_count = usage_counts.get(quiz.id, 0)
+    Quiz.objects.bulk_update(
+        quizzes,
+        ['stats_question_count', 'stats_total_score', 'stats_usage_count'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0005_question_snapshot_dedup'),
+        ('tasks', '0005_remove_task_created_role_student'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='stats_question_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='题目数'),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='stats_total_score',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='总分'),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='stats_usage_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='被任务引用次数'),
+        ),
+        migrations.RunPython(forwards_backfill_stats, migrations.RunPython.noop),
+    ]
@@ -107,6 +107,11 @@ class Quiz(TimestampMixin, CreatorMixin, QuizDefinitionMixin, models.Model):
         related_name='quiz_updated',
         verbose_name='最后更新者',
     )
+    content_fingerprint = models.CharField(max_length=64, blank=True, default='', verbose_name='内容指纹')
+    # 列表统计列，由 apps.quizzes.stats 在写路径上维护
+    stats_question_count = models.PositiveIntegerField(default=0, verbose_name='题目数')
+    stats_total_score = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name='总分')
+    stats_usage_count = models.PositiveIntegerField(default=0, verbose_name='被任务引用次数')
 
     class Meta:
         db_table = 'lms_quiz'
@@ -161,6 +166,7 @@ class QuizRevision(TimestampMixin, CreatorMixin, QuizDefinitionMixin, models.Mod
     )
     revision_number = models.PositiveIntegerField(default=1, verbose_name='快照版本号')
     structure_hash = models.CharField(max_length=64, db_index=True, verbose_name='结构哈希')
+    source_fingerprint = models.CharField(max_length=64, blank=True, default='', verbose_name='来源试卷指纹')
 
     class Meta:
         db_table = 'lms_quiz_revision'
@@ -178,8 +184,42 @@ class QuizRevision(TimestampMixin, CreatorMixin, QuizDefinitionMixin, models.Mod
         return f'{self.title} v{self.revision_number}'
 
 
+class QuestionSnapshot(TimestampMixin, models.Model):
+    """按内容哈希去重的题目快照内容，多份试卷快照共用同一行。
+
+    哈希覆盖题型、题干、参考答案、解析、space/标签快照和选项；分值、顺序留在 QuizRevisionQuestion。
+    """
+
+    content_hash = models.CharField(max_length=64, unique=True, verbose_name='内容哈希')
+    content = models.TextField(default='', verbose_name='题目内容')
+    reference_answer = models.TextField(blank=True, default='', verbose_name='参考答案')
+    explanation = models.TextField(blank=True, default='', verbose_name='解析')
+    space_tag_name = models.CharField(max_length=100, blank=True, default='', verbose_name='space 名称')
+    tags_json = models.JSONField(verbose_name='标签快照', default=list, blank=True)
+
+    class Meta:
+        db_table = 'lms_question_snapshot'
+        verbose_name = '题目快照内容'
+        verbose_name_plural = '题目快照内容'
+
+    def __str__(self):
+        return f'QS{self.id} {self.content_hash[:12]}'
+
+    def ordered_options(self):
+        cached = getattr(self, '_prefetched_objects_cache', {})
+        if 'question_options' in cached:
+            return sorted(
+                cached['question_options'],
+                key=lambda option: (option.sort_order, option.id),
+            )
+        return list(self.question_options.order_by('sort_order', 'id'))
+
+
 class QuizRevisionQuestion(TimestampMixin, QuestionContentMixin, models.Model):
-    """执行态题目快照。"""
+    """执行态题目快照：顺序、题型、分值，内容与选项引用去重后的 QuestionSnapshot。
+
+    Answer 仍引用本表，题干等内容字段改为读取 snapshot 的只读属性。
+    """
 
     QUESTION_TYPE_CHOICES = QUESTION_TYPE_CHOICES
 
@@ -197,9 +237,13 @@ class QuizRevisionQuestion(TimestampMixin, QuestionContentMixin, models.Model):
         related_name='quiz_revision_entries',
         verbose_name='来源题库题',
     )
+    snapshot = models.ForeignKey(
+        QuestionSnapshot,
+        on_delete=models.PROTECT,
+        related_name='revision_questions',
+        verbose_name='题目快照内容',
+    )
     order = models.PositiveIntegerField(default=1, verbose_name='顺序')
-    space_tag_name = models.CharField(max_length=100, blank=True, default='', verbose_name='space 名称')
-    tags_json = models.JSONField(verbose_name='标签快照', default=list, blank=True)
 
     class Meta:
         db_table = 'lms_quiz_revision_question'
@@ -216,28 +260,77 @@ class QuizRevisionQuestion(TimestampMixin, QuestionContentMixin, models.Model):
     def __str__(self):
         return f'{self.quiz.title} v{self.quiz.revision_number} - Q{self.order}'
 
+    def _snapshot_value(self, name: str, default=''):
+        if self.snapshot_id is None:
+            return default
+        return getattr(self.snapshot, name)
+
+    @property
+    def content(self):
+        return self._snapshot_value('content')
+
+    @property
+    def reference_answer(self):
+        return self._snapshot_value('reference_answer')
+
+    @property
+    def explanation(self):
+        return self._snapshot_value('explanation')
+
+    @property
+    def space_tag_name(self):
+        return self._snapshot_value('space_tag_name')
+
+    @property
+    def tags_json(self):
+        return self._snapshot_value('tags_json', [])
+
+    def _ordered_options(self):
+        if self.snapshot_id is None:
+            return []
+        return self.snapshot.ordered_options()
+
+    def get_answer_key(self):
+        """快照不可变：优先读按 revision 缓存的答案键，未落库时返回 None。"""
+        from .answer_keys import get_question_answer_key
+
+        return get_question_answer_key(self)
+
+    @property
+    def answer(self):
+        answer_key = self.get_answer_key()
+        if answer_key is None:
+            return super().answer
+        return answer_key.answer
+
+    def get_option_id_key_map(self) -> dict[int, str]:
+        answer_key = self.get_answer_key()
+        if answer_key is None:
+            return super().get_option_id_key_map()
+        return dict(answer_key.option_id_keys)
+
 
 class QuizRevisionQuestionOption(TimestampMixin, QuestionOptionContentMixin, models.Model):
-    """执行态题目快照选项。"""
+    """执行态题目快照选项，随 QuestionSnapshot 共用。"""
 
-    question = models.ForeignKey(
-        QuizRevisionQuestion,
+    snapshot = models.ForeignKey(
+        QuestionSnapshot,
         on_delete=models.CASCADE,
         related_name='question_options',
-        verbose_name='试卷快照题目',
+        verbose_name='题目快照内容',
     )
 
     class Meta:
         db_table = 'lms_quiz_revision_question_option'
         verbose_name = '试卷快照题目选项'
         verbose_name_plural = '试卷快照题目选项'
-        ordering = ['question_id', 'sort_order', 'id']
+        ordering = ['snapshot_id', 'sort_order', 'id']
         constraints = [
             models.UniqueConstraint(
-                fields=['question', 'sort_order'],
-                name='uniq_quiz_revision_question_option_order',
+                fields=['snapshot', 'sort_order'],
+                name='uniq_question_snapshot_option_order',
             ),
         ]
 
     def __str__(self):
-        return f'QRQ{self.question_id}#{self.sort_order}'
+        return f'QS{self.snapshot_id}#{self.sort_order}'
@@ -0,0 +1,401 @@
+"""试卷编辑器题目同步的批量差异计算。
+
+保存试卷时一次性加载本卷已绑定题目（含选项、标签）、新引用的题库题、标签和跨卷引用数，
+在内存中逐项判定复用 / 写时复制 / 原地更新，再按类别批量落库：
+
+- 新题：插入题目，批量写选项和标签
+- 原地更新：批量更新题目字段与 space，变化的选项整体重建，标签按差集增删
+- 试卷关系：批量删除移出的题目，换序的关系先挪到临时 order，再批量更新绑定与顺序、插入新增关系
+
+语句数与题量无关；数据库不支持批量插入回填主键（MySQL）时，新题逐条插入。
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from django.db import connection
+from django.db.models import Count, Q, QuerySet
+
+from apps.questions.models import Question, QuestionOption
+from apps.questions.payload import (
+    build_merged_question_payload,
+    build_storage_payload,
+    current_model_fields,
+    current_option_definitions,
+    validate_question_payload,
+)
+from apps.questions.search import refresh_question_search_terms
+from apps.questions.similarity import refresh_question_simhash
+from apps.tags.resource_tags import (
+    ResourceTagPayload,
+    load_valid_tag_ids,
+    pop_resource_tag_payload,
+    validate_space_tag_ids,
+)
+from core.exceptions import BusinessError, ErrorCodes
+
+from .fingerprints import refresh_question_fingerprints, refresh_quiz_fingerprints
+from .models import Quiz, QuizQuestion
+from .stats import refresh_question_usage_counts, refresh_quiz_stats
+
+BATCH_SIZE = 500
+TEMP_ORDER_BASE = 1_000_000
+
+ACTION_REUSE = 'reuse'
+ACTION_CREATE = 'create'
+ACTION_UPDATE = 'update'
+
+
+@dataclass
+class QuestionSyncItem:
+    """一道题的同步决策；question 为本卷最终绑定的题目（新题插入前无 id）。"""
+
+    relation: QuizQuestion | None
+    question: Question
+    order: int
+    action: str
+    option_defs: list[dict]
+    model_fields: dict = field(default_factory=dict)
+    tag_payload: ResourceTagPayload | None = None
+    content_changed: bool = False
+    options_changed: bool = False
+    space_changed: bool = False
+    tags_changed: bool = False
+    current_tag_ids: frozenset[int] = frozenset()
+
+
+def _with_question_content(queryset: QuerySet) -> QuerySet:
+    return queryset.select_related('space_tag').prefetch_related('question_options', 'tags')
+
+
+def _load_sources(payloads: list[dict], source_queryset: QuerySet) -> dict[int, Question]:
+    source_ids = {
+        item.get('source_question_id')
+        for item in payloads
+        if item.get('id') is None and item.get('source_question_id') is not None
+    }
+    if not source_ids:
+        return {}
+    return {
+        question.id: question
+        for question in _with_question_content(source_queryset).filter(pk__in=source_ids)
+    }
+
+
+def _usage_counts(question_ids: set[int]) -> Counter:
+    if not question_ids:
+        return Counter()
+    return Counter(dict(
+        QuizQuestion.objects.filter(question_id__in=question_ids)
+        .values('question_id')
+        .annotate(usage_count=Count('id'))
+        .values_list('question_id', 'usage_count')
+    ))
+
+
+def plan_quiz_questions(
+    quiz: Quiz,
+    question_payloads: list[dict[str, Any]],
+    *,
+    source_queryset: QuerySet,
+) -> tuple[list[QuestionSyncItem], list[int]]:
+    """计算同步决策，返回 (按新顺序排列的决策, 需移出的关系 id)；不写库。
+
+    source_queryset 为当前用户可见的题库题范围，用于解析新加入题目的 source_question_id。
+    """
+    relations = {
+        relation.id: relation
+        for relation in quiz.quiz_questions.select_related('question__space_tag').prefetch_related(
+            'question__question_options',
+            'question__tags',
+        )
+    }
+    payloads = [dict(raw_item) for raw_item in question_payloads]
+    sources = _load_sources(payloads, source_queryset)
+    usage_counts = _usage_counts(
+        {relation.question_id for relation in relations.values()} | set(sources)
+    )
+    # 未传 tag_ids 时沿用来源题标签，同样需要校验
+    base_questions = [relation.question for relation in relations.values()] + list(sources.values())
+    valid_tag_ids = load_valid_tag_ids(
+        {tag_id for item in payloads for tag_id in (item.get('tag_ids') or [])}
+        | {tag.id for question in base_questions for tag in question.tags.all()},
+        scope='question',
+    )
+
+    items: list[QuestionSyncItem] = []
+    bound_ids: set[int] = set()
+    for order, item in enumerate(payloads, start=1):
+        relation = None
+        relation_id = item.get('id')
+        if relation_id is not None:
+            relation = relations.get(relation_id)
+            if relation is None:
+                raise BusinessError(
+                    code=ErrorCodes.INVALID_INPUT,
+                    message=f'试卷题目 {relation_id} 不存在或不属于当前试卷',
+                )
+        # 已有关系以当前绑定题为准，避免 COW 后客户端仍带旧 source_question_id
+        base_question = relation.question if relation is not None else None
+        source_question_id = item.get('source_question_id')
+        if relation is None and source_question_id is not None:
+            base_question = sources.get(source_question_id)
+            if base_question is None:
+                raise BusinessError(
+                    code=ErrorCodes.RESOURCE_NOT_FOUND,
+                    message=f'题目 {source_question_id} 不存在',
+                )
+
+        sync_item = _plan_item(item, relation, base_question, order, valid_tag_ids)
+        if sync_item.action == ACTION_UPDATE:
+            # 被其他试卷引用，或本次保存里已有别的题位绑定它：改为写时复制
+            other_usage = usage_counts[base_question.id] - (1 if relation is not None else 0)
+            if other_usage > 0 or base_question.id in bound_ids:
+                sync_item = _copy_on_write(sync_item)
+        if sync_item.action != ACTION_CREATE:
+            bound_ids.add(sync_item.question.id)
+        items.append(sync_item)
+
+    keep_ids = {sync_item.relation.id for sync_item in items if sync_item.relation is not None}
+    stale_ids = [relation_id for relation_id in relations if relation_id not in keep_ids]
+    return items, stale_ids
+
+
+def _plan_item(
+    item: dict[str, Any],
+    relation: QuizQuestion | None,
+    base_question: Question | None,
+    order: int,
+    valid_tag_ids: set[int],
+) -> QuestionSyncItem:
+    validate_question_payload(item, source=base_question)
+    current_tag_ids = [tag.id for tag in base_question.tags.all()] if base_question else []
+    working = dict(item)
+    tag_payload = pop_resource_tag_payload(
+        working,
+        scope='question',
+        default_space_tag_id=base_question.space_tag_id if base_question else None,
+        default_tag_ids=current_tag_ids,
+        valid_tag_ids=valid_tag_ids,
+    )
+    model_fields, option_defs = build_storage_payload(
+        build_merged_question_payload(working, source=base_question)
+    )
+    if base_question is None:
+        return _new_question_item(relation, order, model_fields, option_defs, tag_payload)
+
+    fields_changed = model_fields != current_model_fields(base_question)
+    options_changed = option_defs != current_option_definitions(base_question)
+    space_changed = tag_payload.space_tag_id != base_question.space_tag_id
+    tags_changed = set(tag_payload.tag_ids) != set(current_tag_ids)
+    if not (fields_changed or options_changed or space_changed or tags_changed):
+        return QuestionSyncItem(
+            relation=relation,
+            question=base_question,
+            order=order,
+            action=ACTION_REUSE,
+            option_defs=option_defs,
+        )
+
+    # 目标字段落库时才写到题目上，判定为写时复制时源题保持不变
+    return QuestionSyncItem(
+        relation=relation,
+        question=base_question,
+        order=order,
+        action=ACTION_UPDATE,
+        option_defs=option_defs,
+        model_fields=model_fields,
+        tag_payload=tag_payload,
+        content_changed=fields_changed,
+        options_changed=options_changed,
+        space_changed=space_changed,
+        tags_changed=tags_changed,
+        current_tag_ids=frozenset(current_tag_ids),
+    )
+
+
+def _new_question_item(relation, order, model_fields, option_defs, tag_payload) -> QuestionSyncItem:
+    return QuestionSyncItem(
+        relation=relation,
+        question=Question(**model_fields, space_tag_id=tag_payload.space_tag_id),
+        order=order,
+        action=ACTION_CREATE,
+        option_defs=option_defs,
+        model_fields=model_fields,
+        tag_payload=tag_payload,
+    )
+
+
+def _copy_on_write(sync_item: QuestionSyncItem) -> QuestionSyncItem:
+    return _new_question_item(
+        sync_item.relation,
+        sync_item.order,
+        sync_item.model_fields,
+        sync_item.option_defs,
+        sync_item.tag_payload,
+    )
+
+
+def _insert_questions(questions: list[Question]) -> None:
+    if not questions:
+        return
+    if connection.features.can_return_rows_from_bulk_insert:
+        Question.objects.bulk_create(questions, batch_size=BATCH_SIZE)
+        return
+    for question in questions:
+        question.save(force_insert=True)
+
+
+def _apply_questions(items: list[QuestionSyncItem], *, actor) -> list[int]:
+    """写入新题与原地更新，返回内容可能变化的题目 id。"""
+    created = [sync_item for sync_item in items if sync_item.action == ACTION_CREATE]
+    updated = [sync_item for sync_item in items if sync_item.action == ACTION_UPDATE]
+    validate_space_tag_ids(
+        [
+            sync_item.tag_payload.space_tag_id
+            for sync_item in created + [sync_item for sync_item in updated if sync_item.space_changed]
+            if sync_item.tag_payload.space_tag_id is not None
+        ]
+    )
+
+    for sync_item in created:
+        sync_item.question.created_by = actor
+        sync_item.question.updated_by = actor
+    _insert_questions([sync_item.question for sync_item in created])
+
+    content_updates = [sync_item for sync_item in updated if sync_item.content_changed]
+    for sync_item in content_updates:
+        for key, value in sync_item.model_fields.items():
+            setattr(sync_item.question, key, value)
+        sync_item.question.updated_by = actor
+    if content_updates:
+        Question.objects.bulk_update(
+            [sync_item.question for sync_item in content_updates],
+            [*content_updates[0].model_fields.keys(), 'updated_by'],
+            batch_size=BATCH_SIZE,
+        )
+    space_updates = [sync_item for sync_item in updated if sync_item.space_changed]
+    for sync_item in space_updates:
+        sync_item.question.space_tag_id = sync_item.tag_payload.space_tag_id
+    if space_updates:
+        Question.objects.bulk_update(
+            [sync_item.question for sync_item in space_updates],
+            ['space_tag'],
+            batch_size=BATCH_SIZE,
+        )
+
+    _apply_options(created + [sync_item for sync_item in updated if sync_item.options_changed])
+    _apply_tags(created, [sync_item for sync_item in updated if sync_item.tags_changed])
+    return [sync_item.question.id for sync_item in created + updated]
+
+
+def _apply_options(items: list[QuestionSyncItem]) -> None:
+    """选项整体重建（与 sync_question_options 语义一致）。"""
+    if not items:
+        return
+    QuestionOption.objects.filter(question_id__in=[sync_item.question.id for sync_item in items]).delete()
+    QuestionOption.objects.bulk_create(
+        [
+            QuestionOption(
+                question_id=sync_item.question.id,
+                sort_order=option_def['sort_order'],
+                content=option_def['content'],
+                is_correct=option_def['is_correct'],
+            )
+            for sync_item in items
+            for option_def in sync_item.option_defs
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    for sync_item in items:
+        getattr(sync_item.question, '_prefetched_objects_cache', {}).pop('question_options', None)
+
+
+def _apply_tags(created: list[QuestionSyncItem], updated: list[QuestionSyncItem]) -> None:
+    through = Question.tags.through
+    removals = Q()
+    for sync_item in updated:
+        removed = sync_item.current_tag_ids - set(sync_item.tag_payload.tag_ids)
+        if removed:
+            removals |= Q(question_id=sync_item.question.id, tag_id__in=removed)
+    if removals:
+        through.objects.filter(removals).delete()
+
+    additions = [
+        through(question_id=sync_item.question.id, tag_id=tag_id)
+        for sync_item in created
+        for tag_id in sync_item.tag_payload.tag_ids
+    ] + [
+        through(question_id=sync_item.question.id, tag_id=tag_id)
+        for sync_item in updated
+        for tag_id in sync_item.tag_payload.tag_ids
+        if tag_id not in sync_item.current_tag_ids
+    ]
+    through.objects.bulk_create(additions, batch_size=BATCH_SIZE)
+    for sync_item in created + updated:
+        getattr(sync_item.question, '_prefetched_objects_cache', {}).pop('tags', None)
+
+
+def _apply_relations(quiz: Quiz, items: list[QuestionSyncItem], stale_ids: list[int]) -> set[int]:
+    """写入试卷关系，返回引用次数有变化的题目 id。"""
+    usage_changed_ids: set[int] = set()
+    if stale_ids:
+        stale_relations = QuizQuestion.objects.filter(id__in=stale_ids)
+        usage_changed_ids.update(stale_relations.values_list('question_id', flat=True))
+        stale_relations.delete()
+
+    # 换序的关系先整体挪到临时 order，避免 (quiz, order) 唯一约束冲突
+    moved = [
+        sync_item.relation
+        for sync_item in items
+        if sync_item.relation is not None and sync_item.relation.order != sync_item.order
+    ]
+    for index, relation in enumerate(moved):
+        relation.order = TEMP_ORDER_BASE + index
+    if moved:
+        QuizQuestion.objects.bulk_update(moved, ['order'], batch_size=BATCH_SIZE)
+
+    changed = []
+    for sync_item in items:
+        relation = sync_item.relation
+        if relation is None:
+            continue
+        if relation.question_id != sync_item.question.id or relation.order != sync_item.order:
+            if relation.question_id != sync_item.question.id:
+                usage_changed_ids.update((relation.question_id, sync_item.question.id))
+            relation.question = sync_item.question
+            relation.order = sync_item.order
+            changed.append(relation)
+    if changed:
+        QuizQuestion.objects.bulk_update(changed, ['question', 'order'], batch_size=BATCH_SIZE)
+
+    created = [
+        QuizQuestion(quiz=quiz, question=sync_item.question, order=sync_item.order)
+        for sync_item in items
+        if sync_item.relation is None
+    ]
+    QuizQuestion.objects.bulk_create(created, batch_size=BATCH_SIZE)
+    usage_changed_ids.update(relation.question_id for relation in created)
+    return usage_changed_ids
+
+
+def sync_quiz_questions(
+    quiz: Quiz,
+    question_payloads: list[dict[str, Any]],
+    *,
+    actor,
+    source_queryset: QuerySet,
+) -> None:
+    """按编辑器提交的题目列表同步试卷题目，并刷新指纹与统计列。"""
+    items, stale_ids = plan_quiz_questions(quiz, question_payloads, source_queryset=source_queryset)
+    touched_ids = _apply_questions(items, actor=actor)
+    usage_changed_ids = _apply_relations(quiz, items, stale_ids)
+    refresh_question_fingerprints(touched_ids)
+    refresh_question_search_terms(touched_ids)
+    refresh_question_simhash(touched_ids)
+    refresh_quiz_fingerprints([quiz.id])
+    refresh_quiz_stats([quiz.id])
+    refresh_question_usage_counts(usage_changed_ids)
@@ -0,0 +1,120 @@
+"""试卷快照题目内容去重写入。
+
+题干、参考答案、解析、标签快照和选项按内容哈希存成 `QuestionSnapshot`，
+新 revision 只为每道题写一行 `QuizRevisionQuestion`（顺序、题型、分值、snapshot 引用）。
+只改了一道题的练习卷再次发布时，其余题目直接复用已有快照内容。
+
+写入语句数与题量无关：查已有哈希、补写缺失快照及其选项、写 revision 题目行。
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .fingerprints import content_digest
+from .models import QuestionSnapshot, QuizRevision, QuizRevisionQuestion, QuizRevisionQuestionOption
+
+BATCH_SIZE = 500
+
+
+def build_snapshot_hash(row: dict) -> str:
+    """快照内容哈希；row 为 revision payload 中的题目行。迁移 0005 内联了同一算法。"""
+    return content_digest({
+        'question_type': row['question_type'],
+        'content': row['content'],
+        'reference_answer': row['reference_answer'],
+        'explanation': row['explanation'],
+        'space_tag_name': row['space_tag_name'],
+        'tags_json': row['tags_json'],
+        'options': [
+            [option['sort_order'], option['content'], option['is_correct']]
+            for option in row['options']
+        ],
+    })
+
+
+def _ensure_snapshots(rows_by_hash: dict[str, dict]) -> dict[str, int]:
+    """返回内容哈希 → QuestionSnapshot id，缺失的批量补写。"""
+    snapshot_ids = dict(
+        QuestionSnapshot.objects.filter(content_hash__in=list(rows_by_hash)).values_list('content_hash', 'id')
+    )
+    missing = [content_hash for content_hash in rows_by_hash if content_hash not in snapshot_ids]
+    if not missing:
+        return snapshot_ids
+
+    # 并发发布同一份新内容时由 content_hash 唯一约束兜底，选项同理按 (snapshot, sort_order) 去重
+    QuestionSnapshot.objects.bulk_create(
+        [
+            QuestionSnapshot(
+                content_hash=content_hash,
+                content=rows_by_hash[content_hash]['content'],
+                reference_answer=rows_by_hash[content_hash]['reference_answer'],
+                explanation=rows_by_hash[content_hash]['explanation'],
+                space_tag_name=rows_by_hash[content_hash]['space_tag_name'],
+                tags_json=rows_by_hash[content_hash]['tags_json'],
+            )
+            for content_hash in missing
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    # 加锁读：REPEATABLE READ 下也能读到并发事务刚提交的同哈希行
+    created_ids = dict(
+        QuestionSnapshot.objects.select_for_update()
+        .filter(content_hash__in=missing)
+        .values_list('content_hash', 'id')
+    )
+    QuizRevisionQuestionOption.objects.bulk_create(
+        [
+            QuizRevisionQuestionOption(
+                snapshot_id=created_ids[content_hash],
+                sort_order=option['sort_order'],
+                content=option['content'],
+                is_correct=option['is_correct'],
+            )
+            for content_hash in missing
+            for option in rows_by_hash[content_hash]['options']
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    snapshot_ids.update(created_ids)
+    return snapshot_ids
+
+
+@transaction.atomic
+def write_revision_questions(revision: QuizRevision, question_rows: list[dict]) -> None:
+    """为新 revision 写入题目行，内容按哈希复用或补写 QuestionSnapshot。"""
+    if not question_rows:
+        return
+    hashes = [build_snapshot_hash(row) for row in question_rows]
+    snapshot_ids = _ensure_snapshots(dict(zip(hashes, question_rows)))
+    QuizRevisionQuestion.objects.bulk_create(
+        [
+            QuizRevisionQuestion(
+                quiz=revision,
+                question_id=row['source_question_id'],
+                snapshot_id=snapshot_ids[content_hash],
+                question_type=row['question_type'],
+                score=row['score'],
+                order=row['order'],
+            )
+            for row, content_hash in zip(question_rows, hashes)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def purge_orphan_snapshots(snapshot_ids: Iterable[int]) -> int:
+    """删除已无 revision 引用的快照内容（选项级联删除），返回删除的快照数。"""
+    snapshot_ids = list(snapshot_ids)
+    if not snapshot_ids:
+        return 0
+    # 引用判定与删除用同一条件，不先查出 id 再删
+    _, deleted = QuestionSnapshot.objects.filter(id__in=snapshot_ids).filter(
+        ~Exists(QuizRevisionQuestion.objects.filter(snapshot_id=OuterRef('pk'))),
+    ).delete()
+    return deleted.get(QuestionSnapshot._meta.label, 0)
@@ -0,0 +1,195 @@
+"""试卷列表与题库列表统计列维护。
+
+试卷列表和任务编辑器的资源选择器需要题目数、总分和被任务引用次数，原先每行三个关联子查询。
+这里把它们落在 `Quiz.stats_*` 列上，由写路径按受影响的试卷 id 成组重算：
+
+- 试卷题目变化：`question_sync.sync_quiz_questions`
+- 题库题分值变化：`QuestionService.update`
+- 任务绑定变化：`TaskService` 创建/更新/删除任务、删除用户业务数据
+
+题库列表的被试卷引用次数同理落在 `Question.stats_usage_count`，由试卷题目同步、删除试卷和
+删除用户业务数据按受影响的题目 id 重算；“未被引用”筛选直接走该列索引。
+
+写路径只登记受影响的 id，在事务提交后用一条带关联子查询的 UPDATE 重算：写事务内的快照读
+看不到并发事务的改动，事务内 COUNT 再回写会把对方的变化覆盖成旧值。
+
+历史数据或漂移用 `python manage.py rebuild_quiz_stats` 全量重建。
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.questions.models import Question
+
+from .models import Quiz, QuizQuestion
+
+BATCH_SIZE = 500
+STATS_FIELDS = ['stats_question_count', 'stats_total_score', 'stats_usage_count']
+
+
+def _compute_stats(quiz_ids: list[int]) -> dict[int, tuple[int, Decimal, int]]:
+    from apps.tasks.models import TaskQuiz
+
+    question_stats = {
+        row['quiz_id']: row
+        for row in QuizQuestion.objects.filter(quiz_id__in=quiz_ids)
+        .values('quiz_id')
+        .annotate(question_count=Count('id'), total_score=Sum('question__score'))
+    }
+    usage_counts = dict(
+        TaskQuiz.objects.filter(source_quiz_id__in=quiz_ids)
+        .values('source_quiz_id')
+        .annotate(usage_count=Count('task_id', distinct=True))
+        .values_list('source_quiz_id', 'usage_count')
+    )
+    stats = {}
+    for quiz_id in quiz_ids:
+        row = question_stats.get(quiz_id) or {}
+        stats[quiz_id] = (
+            row.get('question_count', 0),
+            row.get('total_score') or Decimal('0'),
+            usage_counts.get(quiz_id, 0),
+        )
+    return stats
+
+
+def _stored_stats(quiz: Quiz) -> tuple[int, Decimal, int]:
+    return quiz.stats_question_count, quiz.stats_total_score, quiz.stats_usage_count
+
+
+def _apply_stats(quizzes: list[Quiz], stats: dict[int, tuple[int, Decimal, int]]) -> list[Quiz]:
+    changed = []
+    for quiz in quizzes:
+        expected = stats[quiz.id]
+        if _stored_stats(quiz) != expected:
+            quiz.stats_question_count, quiz.stats_total_score, quiz.stats_usage_count = expected
+            changed.append(quiz)
+    return changed
+
+
+def _aggregate_subquery(queryset, group_field: str, aggregate, output_field, default):
+    """按 OuterRef('pk') 分组聚合的标量子查询，无行时取 default。"""
+    rows = queryset.filter(**{group_field: OuterRef('pk')}).order_by().values(group_field)
+    return Coalesce(
+        Subquery(rows.annotate(value=aggregate).values('value'), output_field=output_field),
+        Value(default, output_field=output_field),
+    )
+
+
+def _recount_quiz_stats(quiz_ids: list[int]) -> None:
+    from apps.tasks.models import TaskQuiz
+
+    for start in range(0, len(quiz_ids), BATCH_SIZE):
+        Quiz.objects.filter(id__in=quiz_ids[start:start + BATCH_SIZE]).update(
+            stats_question_count=_aggregate_subquery(
+                QuizQuestion.objects, 'quiz_id', Count('id'), IntegerField(), 0,
+            ),
+            stats_total_score=_aggregate_subquery(
+                QuizQuestion.objects, 'quiz_id', Sum('question__score'),
+                Quiz._meta.get_field('stats_total_score'), Decimal('0'),
+            ),
+            stats_usage_count=_aggregate_subquery(
+                TaskQuiz.objects, 'source_quiz_id', Count('task_id', distinct=True), IntegerField(), 0,
+            ),
+        )
+
+
+def refresh_quiz_stats(quiz_ids: Iterable[int]) -> None:
+    """在当前事务提交后按题目与任务绑定重算这些试卷的统计列；无事务时立即执行。"""
+    quiz_ids = sorted({quiz_id for quiz_id in quiz_ids if quiz_id is not None})
+    if quiz_ids:
+        transaction.on_commit(lambda: _recount_quiz_stats(quiz_ids))
+
+
+def quiz_ids_for_questions(question_ids: Iterable[int]) -> list[int]:
+    return list(
+        QuizQuestion.objects.filter(question_id__in=list(question_ids))
+        .values_list('quiz_id', flat=True)
+        .distinct()
+    )
+
+
+def rebuild_quiz_stats(*, dry_run: bool = False) -> list[tuple[int, tuple, tuple]]:
+    """全量重算统计列，返回 (试卷 id, 库内值, 全量值) 列表；dry_run 时只核对不写入。"""
+    drift = []
+    last_id = 0
+    while True:
+        quizzes = list(
+            Quiz.objects.filter(id__gt=last_id).order_by('id').only('id', *STATS_FIELDS)[:BATCH_SIZE]
+        )
+        if not quizzes:
+            break
+        last_id = quizzes[-1].id
+        stats = _compute_stats([quiz.id for quiz in quizzes])
+        drift.extend(
+            (quiz.id, _stored_stats(quiz), stats[quiz.id])
+            for quiz in quizzes
+            if _stored_stats(quiz) != stats[quiz.id]
+        )
+        if not dry_run:
+            Quiz.objects.bulk_update(_apply_stats(quizzes, stats), STATS_FIELDS, batch_size=BATCH_SIZE)
+    return drift
+
+
+def _compute_question_usage(question_ids: list[int]) -> dict[int, int]:
+    usage_counts = dict(
+        QuizQuestion.objects.filter(question_id__in=question_ids)
+        .values('question_id')
+        .annotate(usage_count=Count('id'))
+        .values_list('question_id', 'usage_count')
+    )
+    return {question_id: usage_counts.get(question_id, 0) for question_id in question_ids}
+
+
+def _recount_question_usage(question_ids: list[int]) -> None:
+    for start in range(0, len(question_ids), BATCH_SIZE):
+        Question.objects.filter(id__in=question_ids[start:start + BATCH_SIZE]).update(
+            stats_usage_count=_aggregate_subquery(
+                QuizQuestion.objects, 'question_id', Count('id'), IntegerField(), 0,
+            ),
+        )
+
+
+def refresh_question_usage_counts(question_ids: Iterable[int]) -> None:
+    """在当前事务提交后按试卷题目关系重算这些题目的被引用次数；无事务时立即执行。"""
+    question_ids = sorted({question_id for question_id in question_ids if question_id is not None})
+    if question_ids:
+        transaction.on_commit(lambda: _recount_question_usage(question_ids))
+
+
+def question_ids_for_quizzes(quiz_ids: Iterable[int]) -> list[int]:
+    return list(
+        QuizQuestion.objects.filter(quiz_id__in=list(quiz_ids))
+        .values_list('question_id', flat=True)
+        .distinct()
+    )
+
+
+def rebuild_question_usage_counts(*, dry_run: bool = False) -> list[tuple[int, int, int]]:
+    """全量重算题目被引用次数，返回 (题目 id, 库内值, 全量值) 列表；dry_run 时只核对不写入。"""
+    drift = []
+    last_id = 0
+    while True:
+        questions = list(
+            Question.objects.filter(id__gt=last_id).order_by('id').only('id', 'stats_usage_count')[:BATCH_SIZE]
+        )
+        if not questions:
+            break
+        last_id = questions[-1].id
+        usage_counts = _compute_question_usage([question.id for question in questions])
+        changed = [
+            question for question in questions
+            if question.stats_usage_count != usage_counts[question.id]
+        ]
+        drift.extend((question.id, question.stats_usage_count, usage_counts[question.id]) for question in changed)
+        if not dry_run:
+            for question in changed:
+                question.stats_usage_count = usage_counts[question.id]
+            Question.objects.bulk_update(changed, ['stats_usage_count'], batch_size=BATCH_SIZE)
+    return drift
@@ -0,0 +1,294 @@
+"""考试作答草稿写缓冲（write-behind）。
+
+开启后 `SubmissionService.save_answer` 只校验并把草稿写入共享缓存，不写库；
+草稿在以下时机批量落到 `Answer` / `AnswerSelection`：
+- 定时：`python manage.py flush_answer_drafts --loop`
+- 交卷：`submit` 判分前
+- 恢复答卷：`start_or_resume_quiz` 返回进行中答卷前
+
+缓存键（以 submission 为粒度）：
+- `{prefix}:{submission_id}:q:{question_id}:{field}`：单题草稿的单个已规范化字段
+  （text_answer / option_ids / is_marked），每个字段单键写入，并发保存不同字段互不覆盖
+- `{prefix}:{submission_id}:seq`：写入序号（cache.incr，跨进程原子），每次写入续期
+- `{prefix}:{submission_id}:flushed`：最近一次落库时读到的序号
+
+落库先读 seq 再读草稿，写库后把 flushed 置为读到的 seq；只要 seq 与 flushed 不相等就视为有
+未落库草稿：落库期间新写的草稿序号更大，seq 键过期重建后的序号与 flushed 也不再相等，
+都会在下一轮落库，不会丢更新。seq 重建时以当前纳秒时间为起点，避免恰好追平旧的 flushed。
+落库按库内现状做差异写入，可重复执行。
+
+崩溃安全：草稿在 save_answer 返回前已写入共享缓存，应用进程崩溃或重启不丢数据；
+缓存本身丢失时最多丢失最近一个落库周期内的改动。草稿 TTL 需大于最长考试时长。
+因此必须使用多进程共享且可持久化的缓存（Redis/Memcached 等）；
+配置为进程内 LocMemCache 时自动退回同步写库，除非显式 ALLOW_LOCAL_CACHE。
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from apps.quizzes.answer_keys import get_revision_answer_keys
+
+from .models import Answer, AnswerSelection, Submission
+
+logger = logging.getLogger(__name__)
+
+_local_cache_warned = False
+
+
+def _config() -> dict:
+    return settings.SUBMISSION_DRAFT_BUFFER
+
+
+def _cache():
+    return caches[_config()['CACHE_ALIAS']]
+
+
+def draft_buffer_enabled() -> bool:
+    global _local_cache_warned
+
+    config = _config()
+    if not config['ENABLED']:
+        return False
+    if isinstance(_cache(), LocMemCache) and not config['ALLOW_LOCAL_CACHE']:
+        if not _local_cache_warned:
+            logger.warning('作答草稿写缓冲需要多进程共享缓存，当前为 LocMemCache，已退回同步写库')
+            _local_cache_warned = True
+        return False
+    return True
+
+
+def _prefix(submission_id: int) -> str:
+    return f"{_config()['KEY_PREFIX']}:{submission_id}"
+
+
+DRAFT_FIELDS = ('text_answer', 'option_ids', 'is_marked')
+
+
+def _field_key(submission_id: int, question_id: int, field: str) -> str:
+    return f'{_prefix(submission_id)}:q:{question_id}:{field}'
+
+
+def _question_keys(submission_id: int, question_ids: Iterable[int]) -> dict[str, tuple[int, str]]:
+    return {
+        _field_key(submission_id, question_id, field): (question_id, field)
+        for question_id in question_ids
+        for field in DRAFT_FIELDS
+    }
+
+
+def _seq_key(submission_id: int) -> str:
+    return f'{_prefix(submission_id)}:seq'
+
+
+def _flushed_key(submission_id: int) -> str:
+    return f'{_prefix(submission_id)}:flushed'
+
+
+def _next_seq(submission_id: int) -> int:
+    cache = _cache()
+    key = _seq_key(submission_id)
+    timeout = _config()['TTL_SECONDS']
+    # 新建或过期重建时从当前纳秒时间起步，与任何旧的 flushed 都不相等
+    cache.add(key, time.time_ns(), timeout=timeout)
+    try:
+        seq = cache.incr(key)
+    except ValueError:
+        # 键在 add 与 incr 之间过期
+        seq = time.time_ns()
+        cache.set(key, seq, timeout=timeout)
+        return seq
+    # incr 不续期：每次写入把序号与草稿一起续期，长时间答题时序号不会先于草稿过期
+    cache.touch(key, timeout=timeout)
+    return seq
+
+
+@dataclass(frozen=True)
+class DraftAnswer:
+    """缓冲模式下 save_answer 的返回值，字段与接口响应一致。"""
+
+    question_id: int
+    user_answer: Any
+    is_marked: bool
+
+
+def _load_drafts(submission_id: int, question_ids: Iterable[int]) -> dict[int, dict]:
+    keys = _question_keys(submission_id, question_ids)
+    drafts: dict[int, dict] = {}
+    for key, value in _cache().get_many(list(keys)).items():
+        question_id, field = keys[key]
+        drafts.setdefault(question_id, {})[field] = value
+    return drafts
+
+
+def get_answer_draft(submission_id: int, question_id: int) -> Optional[dict]:
+    return _load_drafts(submission_id, [question_id]).get(question_id)
+
+
+def put_answer_draft(submission_id: int, question_id: int, fields: dict) -> dict:
+    """写入单题草稿。fields 为规范化后的 text_answer / option_ids / is_marked，每个字段单键覆盖写。"""
+    _cache().set_many(
+        {_field_key(submission_id, question_id, field): value for field, value in fields.items()},
+        timeout=_config()['TTL_SECONDS'],
+    )
+    # 先写草稿再推进序号：读到新序号的落库方一定能读到这份草稿
+    _next_seq(submission_id)
+    return get_answer_draft(submission_id, question_id) or dict(fields)
+
+
+def _is_pending(seq: Optional[int], flushed: Optional[int]) -> bool:
+    return bool(seq) and seq != flushed
+
+
+def _pending_seq(submission_id: int) -> Optional[int]:
+    """有未落库草稿时返回当前序号，否则 None。"""
+    values = _cache().get_many([_seq_key(submission_id), _flushed_key(submission_id)])
+    seq = values.get(_seq_key(submission_id))
+    if not _is_pending(seq, values.get(_flushed_key(submission_id))):
+        return None
+    return seq
+
+
+def _load_answers(submission_id: int, question_ids: list[int]) -> list[Answer]:
+    return list(
+        Answer.objects.filter(submission_id=submission_id, question_id__in=question_ids)
+        .prefetch_related('answer_selections')
+    )
+
+
+def _apply_drafts(submission_id: int, drafts: dict[int, dict]) -> int:
+    """把草稿差异写入 Answer / AnswerSelection，返回发生变化的答案数。
+
+    首次落库的题目先按草稿字段补建 Answer，再回查拿到 id 写选项关联。
+    """
+    answers = _load_answers(submission_id, list(drafts))
+    created_question_ids = set(drafts) - {answer.question_id for answer in answers}
+    if created_question_ids:
+        Answer.objects.bulk_create([
+            Answer(
+                submission_id=submission_id,
+                question_id=question_id,
+                text_answer=drafts[question_id].get('text_answer', ''),
+                is_marked=drafts[question_id].get('is_marked', False),
+            )
+            for question_id in created_question_ids
+        ])
+        answers = _load_answers(submission_id, list(drafts))
+    changed_fields_answers = []
+    stale_selection_ids = []
+    new_selections = []
+    touched_question_ids = set(created_question_ids)
+    for answer in answers:
+        draft = drafts[answer.question_id]
+        fields_changed = False
+        if 'text_answer' in draft and answer.text_answer != draft['text_answer']:
+            answer.text_answer = draft['text_answer']
+            fields_changed = True
+        if 'is_marked' in draft and answer.is_marked != draft['is_marked']:
+            answer.is_marked = draft['is_marked']
+            fields_changed = True
+        if fields_changed:
+            changed_fields_answers.append(answer)
+            touched_question_ids.add(answer.question_id)
+        if 'option_ids' not in draft:
+            continue
+        desired_ids = set(draft['option_ids'])
+        existing = {selection.question_option_id: selection.id for selection in answer.answer_selections.all()}
+        if desired_ids == set(existing):
+            continue
+        touched_question_ids.add(answer.question_id)
+        stale_selection_ids.extend(
+            selection_id for option_id, selection_id in existing.items() if option_id not in desired_ids
+        )
+        new_selections.extend(
+            AnswerSelection(answer=answer, question_option_id=option_id)
+            for option_id in draft['option_ids']
+            if option_id not in existing
+        )
+
+    if changed_fields_answers:
+        Answer.objects.bulk_update(changed_fields_answers, ['text_answer', 'is_marked'])
+    if stale_selection_ids:
+        AnswerSelection.objects.filter(id__in=stale_selection_ids).delete()
+    if new_selections:
+        AnswerSelection.objects.bulk_create(new_selections)
+    return len(touched_question_ids)
+
+
+@transaction.atomic
+def flush_submission_drafts(submission: Submission) -> int:
+    """把一份答卷的未落库草稿写入数据库；无草稿时不访问数据库。
+
+    落库前锁住答卷行并确认仍在答题中：交卷在同一把锁内先落库再改状态，
+    定时落库拿到锁时若已交卷则直接放弃，不会把旧草稿写进已判分的答卷。
+    """
+    if not draft_buffer_enabled() or _pending_seq(submission.id) is None:
+        return 0
+    is_in_progress = Submission.objects.select_for_update().filter(
+        pk=submission.id,
+        status=Submission.STATUS_IN_PROGRESS,
+    ).exists()
+    if not is_in_progress:
+        return 0
+    seq = _pending_seq(submission.id)
+    if seq is None:
+        return 0
+    drafts = _load_drafts(submission.id, get_revision_answer_keys(submission.quiz_id))
+    changed = _apply_drafts(submission.id, drafts) if drafts else 0
+    # 提交成功后才推进已落库序号；外层事务回滚时草稿仍视为未落库
+    transaction.on_commit(
+        lambda: _cache().set(_flushed_key(submission.id), seq, timeout=_config()['TTL_SECONDS'])
+    )
+    return changed
+
+
+def discard_submission_drafts(submission: Submission) -> None:
+    """交卷事务提交后清理草稿；之后的保存会被状态校验拒绝。"""
+    if not draft_buffer_enabled():
+        return
+    keys = [
+        *_question_keys(submission.id, get_revision_answer_keys(submission.quiz_id)),
+        _seq_key(submission.id),
+        _flushed_key(submission.id),
+    ]
+    transaction.on_commit(lambda: _cache().delete_many(keys))
+
+
+def flush_pending_drafts(*, batch_size: Optional[int] = None) -> dict:
+    """定时落库：扫描进行中答卷，只处理序号领先于已落库序号的答卷。"""
+    if not draft_buffer_enabled():
+        return {'scanned': 0, 'flushed': 0, 'answers': 0}
+    batch_size = batch_size or _config()['FLUSH_BATCH_SIZE']
+    stats = {'scanned': 0, 'flushed': 0, 'answers': 0}
+    submissions = Submission.objects.filter(
+        status=Submission.STATUS_IN_PROGRESS,
+    ).only('id', 'quiz_id').order_by('id')
+    last_id = 0
+    while True:
+        batch = list(submissions.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        stats['scanned'] += len(batch)
+        cache_keys = []
+        for submission in batch:
+            cache_keys.extend([_seq_key(submission.id), _flushed_key(submission.id)])
+        values = _cache().get_many(cache_keys)
+        for submission in batch:
+            if not _is_pending(values.get(_seq_key(submission.id)), values.get(_flushed_key(submission.id))):
+                continue
+            try:
+                stats['answers'] += flush_submission_drafts(submission)
+                stats['flushed'] += 1
+            except Exception:
+                # 单份失败不影响其他答卷；草稿仍在缓存，下一轮重试
+                logger.exception('作答草稿落库失败 submission=%s', submission.id)
+    return stats
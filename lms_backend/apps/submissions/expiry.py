@@ -0,0 +1,110 @@
+"""超时考试答卷自动交卷。
+
+考试倒计时只是前端参考，学员中途离开时答卷会一直停在答题中。这里由定时任务
+（`python manage.py auto_submit_expired --loop`）扫描超过考试时长或任务截止时间的考试答卷，
+分批走与学员交卷相同的 `complete_submission`（整卷内存判分、补建未作答题目、刷新成绩和完成状态）。
+
+- 到期时间 = min(started_at + duration, task.deadline)，submitted_at 记为到期时间
+- 到期后留 GRACE_SECONDS 宽限，让客户端自己的交卷先到
+- 每批之间暂停 BATCH_PAUSE_SECONDS，把集中到期的交卷摊开，避免与在线交卷争抢
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from core.exceptions import BusinessError
+
+from .models import Submission
+from .workflows import complete_submission
+
+logger = logging.getLogger(__name__)
+
+
+def _config() -> dict:
+    return settings.SUBMISSION_EXPIRY_SWEEP
+
+
+def _in_progress_exams():
+    return Submission.objects.filter(
+        status=Submission.STATUS_IN_PROGRESS,
+        quiz__quiz_type='EXAM',
+    )
+
+
+def expired_submissions_filter(now, *, grace_seconds: int) -> Q:
+    """超时条件：任务已截止，或开考时间早于 now - 时长 - 宽限。
+
+    时长在快照上，按进行中考试涉及的 (revision, duration) 展开成 OR 条件，避免依赖数据库的时间运算。
+    """
+    cutoff = now - timedelta(seconds=grace_seconds)
+    condition = Q(task_assignment__task__deadline__lte=cutoff)
+    durations = (
+        _in_progress_exams()
+        .filter(quiz__duration__gt=0)
+        .values_list('quiz_id', 'quiz__duration')
+        .distinct()
+    )
+    for quiz_id, duration in durations:
+        condition |= Q(quiz_id=quiz_id, started_at__lte=cutoff - timedelta(minutes=duration))
+    return condition
+
+
+def expires_at(submission: Submission):
+    deadline = submission.task_assignment.task.deadline
+    if not submission.quiz.duration:
+        return deadline
+    return min(submission.started_at + timedelta(minutes=submission.quiz.duration), deadline)
+
+
+def auto_submit_expired(
+    *,
+    now=None,
+    batch_size: Optional[int] = None,
+    limit: Optional[int] = None,
+    pause_seconds: Optional[float] = None,
+    dry_run: bool = False,
+) -> dict:
+    """分批自动交卷超时考试答卷，返回扫描/交卷/跳过/失败数量。"""
+    config = _config()
+    now = now or timezone.now()
+    batch_size = batch_size or config['BATCH_SIZE']
+    pause_seconds = config['BATCH_PAUSE_SECONDS'] if pause_seconds is None else pause_seconds
+    stats = {'expired': 0, 'submitted': 0, 'skipped': 0, 'failed': 0}
+
+    queryset = (
+        _in_progress_exams()
+        .filter(expired_submissions_filter(now, grace_seconds=config['GRACE_SECONDS']))
+        .select_related('quiz', 'task_assignment__task')
+        .order_by('id')
+    )
+    last_id = 0
+    while limit is None or stats['expired'] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - stats['expired'])
+        batch = list(queryset.filter(id__gt=last_id)[:size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        stats['expired'] += len(batch)
+        if dry_run:
+            continue
+        for submission in batch:
+            try:
+                complete_submission(submission, submitted_at=min(expires_at(submission), now))
+                stats['submitted'] += 1
+            except BusinessError:
+                # 锁内发现学员已自行交卷
+                stats['skipped'] += 1
+            except Exception:
+                stats['failed'] += 1
+                logger.exception('超时答卷自动交卷失败 submission=%s', submission.id)
+        if pause_seconds and len(batch) == size:
+            time.sleep(pause_seconds)
+    return stats
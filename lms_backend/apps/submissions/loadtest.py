@@ -0,0 +1,405 @@
+"""考试链路压测。
+
+在本地库里造一批学员和一份考试快照，用线程池并发执行
+`start_or_resume_quiz` → N×`save_answer` → `submit`，再并发 `grade_subjective_answer`，
+按操作统计吞吐、p50/p95/p99 延迟、行锁等待和每次操作的 SQL 条数。
+
+- 行锁等待按 `SELECT ... FOR UPDATE` 语句的执行耗时统计，锁被其他事务持有时耗时落在这里
+- 每个工作线程使用独立的数据库连接，结束时关闭
+- 压测会真实写库，只应指向本地或压测专用库；`cleanup_exam_cohort` 删除本次造的数据
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.quizzes.models import QuizRevision
+from apps.quizzes.snapshots import purge_orphan_snapshots, write_revision_questions
+from apps.tasks.models import Task, TaskAssignment, TaskQuiz
+from apps.users.models import Department, User
+
+from .models import Answer, Submission
+from .services import SubmissionService
+from .workflows import grade_subjective_answer
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ('start', 'save_answer', 'submit', 'grade')
+
+_QUESTION_TYPES = ('SINGLE_CHOICE', 'MULTIPLE_CHOICE', 'TRUE_FALSE')
+_OPTION_FLAGS = {
+    'SINGLE_CHOICE': (True, False, False, False),
+    'MULTIPLE_CHOICE': (True, False, True, False),
+    'TRUE_FALSE': (True, False),
+}
+
+
+@dataclass
+class LoadTestConfig:
+    students: int = 50
+    questions: int = 50
+    #: 每名学员保存答案的次数；None 表示每题保存一次
+    saves_per_student: Optional[int] = None
+    #: 每隔几题出一道简答题；0 表示不出简答题
+    subjective_every: int = 5
+    workers: int = 8
+    grade: bool = True
+    seed: Optional[int] = None
+
+
+@dataclass
+class ExamCohort:
+    run_id: str
+    department: Department
+    grader: User
+    revision: QuizRevision
+    task: Task
+    task_quiz: TaskQuiz
+    assignments: list[TaskAssignment]
+    #: 快照题目 (id, question_type)，按题序排列
+    questions: list[tuple[int, str]]
+
+
+@dataclass(frozen=True)
+class OperationSample:
+    operation: str
+    seconds: float
+    queries: int
+    lock_wait_seconds: float
+    error: Optional[str] = None
+
+
+@dataclass
+class OperationStats:
+    operation: str
+    count: int
+    errors: int
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_queries: float
+    lock_wait_ms: float
+    lock_wait_p95_ms: float
+
+
+@dataclass
+class LoadTestReport:
+    config: LoadTestConfig
+    #: 阶段 → 墙钟耗时（秒）
+    phase_seconds: dict[str, float]
+    operations: list[OperationStats]
+    errors: list[str] = field(default_factory=list)
+
+    def get(self, operation: str) -> Optional[OperationStats]:
+        return next((stats for stats in self.operations if stats.operation == operation), None)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def format_table(self) -> str:
+        # 表头用 ASCII，中文宽字符会打乱列对齐
+        header = (
+            f"{'operation':<12}{'count':>8}{'errors':>7}{'ops/s':>10}{'p50ms':>10}{'p95ms':>10}"
+            f"{'p99ms':>10}{'sql/op':>9}{'lock_ms':>11}{'lock_p95':>10}"
+        )
+        lines = [header]
+        for stats in self.operations:
+            lines.append(
+                f'{stats.operation:<12}{stats.count:>8}{stats.errors:>7}{stats.throughput:>10.1f}'
+                f'{stats.p50_ms:>10.1f}{stats.p95_ms:>10.1f}{stats.p99_ms:>10.1f}'
+                f'{stats.mean_queries:>9.1f}{stats.lock_wait_ms:>11.1f}{stats.lock_wait_p95_ms:>10.1f}'
+            )
+        phases = '，'.join(f'{name} {seconds:.2f}s' for name, seconds in self.phase_seconds.items())
+        lines.append(f'阶段耗时：{phases}')
+        return '\n'.join(lines)
+
+
+class _OperationRecorder:
+    """挂在线程连接上的 execute wrapper，按操作记录 SQL 条数和 FOR UPDATE 耗时。"""
+
+    def __init__(self):
+        self.samples: list[OperationSample] = []
+        self._queries = 0
+        self._lock_wait = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self._queries += 1
+            if 'FOR UPDATE' in sql:
+                self._lock_wait += time.perf_counter() - started
+
+    def measure(self, operation: str, func: Callable, *args, **kwargs) -> Any:
+        self._queries = 0
+        self._lock_wait = 0.0
+        error = None
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception as exc:
+            error = f'{operation}: {type(exc).__name__}: {exc}'
+            raise
+        finally:
+            self.samples.append(OperationSample(
+                operation=operation,
+                seconds=time.perf_counter() - started,
+                queries=self._queries,
+                lock_wait_seconds=self._lock_wait,
+                error=error,
+            ))
+
+    def record_failure(self, operation: str, exc: Exception) -> None:
+        """记录 measure 之外抛出的异常；measure 内的异常已带 error 入样本，不重复计。"""
+        if self.samples and self.samples[-1].error is not None:
+            return
+        self.samples.append(OperationSample(
+            operation=operation,
+            seconds=0.0,
+            queries=0,
+            lock_wait_seconds=0.0,
+            error=f'{operation}: {type(exc).__name__}: {exc}',
+        ))
+
+
+def _build_question_type(index: int, subjective_every: int) -> str:
+    if subjective_every and (index + 1) % subjective_every == 0:
+        return 'SHORT_ANSWER'
+    return _QUESTION_TYPES[index % len(_QUESTION_TYPES)]
+
+
+@transaction.atomic
+def seed_exam_cohort(config: LoadTestConfig) -> ExamCohort:
+    """造一份考试快照、一个任务和 config.students 名已分配学员。"""
+    run_id = uuid.uuid4().hex[:8]
+    department = Department.objects.create(name=f'压测-{run_id}', code=f'LT{run_id}')
+    grader = User.objects.create(
+        employee_id=f'loadtest-{run_id}-grader',
+        username=f'压测阅卷人-{run_id}',
+        department=department,
+    )
+    User.objects.bulk_create([
+        User(
+            employee_id=f'loadtest-{run_id}-{index:05d}',
+            username=f'压测学员-{index}',
+            department=department,
+        )
+        for index in range(config.students)
+    ])
+    students = list(
+        User.objects.filter(employee_id__startswith=f'loadtest-{run_id}-')
+        .exclude(pk=grader.pk)
+        .order_by('employee_id')
+    )
+
+    revision = QuizRevision.objects.create(
+        title=f'压测考试-{run_id}',
+        quiz_type='EXAM',
+        duration=60,
+        structure_hash=run_id,
+        created_by=grader,
+    )
+    question_types = [_build_question_type(index, config.subjective_every) for index in range(config.questions)]
+    write_revision_questions(revision, [
+        {
+            'source_question_id': None,
+            'content': f'压测题目 {run_id}-{index + 1}',
+            'question_type': question_type,
+            'reference_answer': '参考答案',
+            'explanation': '',
+            'score': Decimal('2'),
+            'order': index + 1,
+            'space_tag_name': '',
+            'tags_json': [],
+            'options': [
+                {'sort_order': sort_order, 'content': f'选项 {sort_order}', 'is_correct': is_correct}
+                for sort_order, is_correct in enumerate(_OPTION_FLAGS.get(question_type, ()), start=1)
+            ],
+        }
+        for index, question_type in enumerate(question_types)
+    ])
+    questions = list(revision.quiz_questions.order_by('order').values_list('id', 'question_type'))
+
+    task = Task.objects.create(
+        title=f'压测任务-{run_id}',
+        deadline=timezone.now() + timedelta(days=1),
+        created_by=grader,
+    )
+    task_quiz = TaskQuiz.objects.create(task=task, quiz=revision, order=1)
+    TaskAssignment.objects.bulk_create([TaskAssignment(task=task, assignee=student) for student in students])
+    assignments = list(task.assignments.select_related('assignee').order_by('id'))
+    return ExamCohort(
+        run_id=run_id,
+        department=department,
+        grader=grader,
+        revision=revision,
+        task=task,
+        task_quiz=task_quiz,
+        assignments=assignments,
+        questions=questions,
+    )
+
+
+def cleanup_exam_cohort(cohort: ExamCohort) -> None:
+    """按外键保护顺序删除本次压测数据。"""
+    with transaction.atomic():
+        Submission.objects.filter(task_assignment__task=cohort.task).delete()
+        cohort.task.delete()
+        snapshot_ids = list(cohort.revision.quiz_questions.values_list('snapshot_id', flat=True))
+        cohort.revision.delete()
+        purge_orphan_snapshots(snapshot_ids)
+        User.objects.filter(department=cohort.department).delete()
+        cohort.department.delete()
+
+
+def _build_answer_plan(cohort: ExamCohort, config: LoadTestConfig, rng: random.Random) -> list[tuple[int, Any]]:
+    """随机生成一名学员的保存序列；超过题数的保存视为改答案。"""
+    save_count = config.saves_per_student
+    if save_count is None:
+        save_count = len(cohort.questions)
+    plan = []
+    for index in range(save_count):
+        question_id, question_type = cohort.questions[index % len(cohort.questions)]
+        if question_type == 'SHORT_ANSWER':
+            user_answer = f'压测作答 {rng.randint(1, 1000)}'
+        elif question_type == 'MULTIPLE_CHOICE':
+            user_answer = sorted(rng.sample(['A', 'B', 'C', 'D'], rng.randint(1, 3)))
+        elif question_type == 'TRUE_FALSE':
+            user_answer = rng.choice(['TRUE', 'FALSE'])
+        else:
+            user_answer = rng.choice(['A', 'B', 'C', 'D'])
+        plan.append((question_id, user_answer))
+    return plan
+
+
+def _run_session(assignment: TaskAssignment, cohort: ExamCohort, plan: list[tuple[int, Any]]):
+    recorder = _OperationRecorder()
+    student = assignment.assignee
+    service = SubmissionService(SimpleNamespace(user=student, META={}))
+    try:
+        with connection.execute_wrapper(recorder):
+            submission, _ = recorder.measure(
+                'start',
+                service.start_or_resume_quiz,
+                assignment.id,
+                cohort.task_quiz.id,
+                student,
+            )
+            for question_id, user_answer in plan:
+                recorder.measure('save_answer', service.save_answer, submission, question_id, user_answer=user_answer)
+            recorder.measure('submit', service.submit, submission)
+    except Exception:
+        # 失败已记入样本，单名学员出错不影响其他会话
+        pass
+    finally:
+        connection.close()
+    return recorder.samples
+
+
+def _run_grading(submission_id: int, grader: User, rng: random.Random):
+    recorder = _OperationRecorder()
+    try:
+        with connection.execute_wrapper(recorder):
+            answers = list(
+                Answer.objects.filter(
+                    submission_id=submission_id,
+                    question__question_type='SHORT_ANSWER',
+                ).select_related('question__snapshot', 'submission__quiz', 'submission__task_assignment')
+            )
+            for answer in answers:
+                score = Decimal(rng.randint(0, int(answer.max_score)))
+                recorder.measure('grade', grade_subjective_answer, answer, grader, score)
+    except Exception as exc:
+        logger.exception('压测阅卷失败 submission=%s', submission_id)
+        recorder.record_failure('grade', exc)
+    finally:
+        connection.close()
+    return recorder.samples
+
+
+def _percentile(sorted_values: list[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def _summarize(operation: str, samples: list[OperationSample], wall_seconds: float) -> OperationStats:
+    latencies = sorted(sample.seconds * 1000 for sample in samples)
+    lock_waits = sorted(sample.lock_wait_seconds * 1000 for sample in samples)
+    count = len(samples)
+    return OperationStats(
+        operation=operation,
+        count=count,
+        errors=sum(1 for sample in samples if sample.error),
+        throughput=round(count / wall_seconds, 2) if wall_seconds else 0.0,
+        p50_ms=round(_percentile(latencies, 50), 2),
+        p95_ms=round(_percentile(latencies, 95), 2),
+        p99_ms=round(_percentile(latencies, 99), 2),
+        mean_queries=round(sum(sample.queries for sample in samples) / count, 2) if count else 0.0,
+        lock_wait_ms=round(sum(lock_waits), 2),
+        lock_wait_p95_ms=round(_percentile(lock_waits, 95), 2),
+    )
+
+
+def run_exam_load(cohort: ExamCohort, config: LoadTestConfig) -> LoadTestReport:
+    """并发跑完整考试链路并汇总每类操作的指标。"""
+    rng = random.Random(config.seed)
+    plans = [_build_answer_plan(cohort, config, rng) for _ in cohort.assignments]
+    samples: list[OperationSample] = []
+    phase_seconds = {}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=config.workers) as executor:
+        for session_samples in executor.map(
+            lambda args: _run_session(args[0], cohort, args[1]),
+            zip(cohort.assignments, plans),
+        ):
+            samples.extend(session_samples)
+    phase_seconds['exam'] = time.perf_counter() - started
+
+    if config.grade:
+        submission_ids = list(
+            Submission.objects.filter(
+                task_assignment__task=cohort.task,
+                status=Submission.STATUS_GRADING,
+            ).values_list('id', flat=True)
+        )
+        grade_seeds = [rng.randrange(1 << 30) for _ in submission_ids]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=config.workers) as executor:
+            for grading_samples in executor.map(
+                lambda args: _run_grading(args[0], cohort.grader, random.Random(args[1])),
+                zip(submission_ids, grade_seeds),
+            ):
+                samples.extend(grading_samples)
+        phase_seconds['grade'] = time.perf_counter() - started
+
+    operations = []
+    for operation in OPERATIONS:
+        operation_samples = [sample for sample in samples if sample.operation == operation]
+        if not operation_samples:
+            continue
+        wall_seconds = phase_seconds['grade' if operation == 'grade' else 'exam']
+        operations.append(_summarize(operation, operation_samples, wall_seconds))
+    return LoadTestReport(
+        config=config,
+        phase_seconds={name: round(seconds, 3) for name, seconds in phase_seconds.items()},
+        operations=operations,
+        errors=[sample.error for sample in samples if sample.error],
+    )
@@ -0,0 +1,43 @@
+"""Auto-submit exam submissions past their duration or task deadline."""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.submissions.expiry import auto_submit_expired
+
+
+class Command(BaseCommand):
+    help = '扫描超过考试时长或任务截止时间的答题中考试答卷，分批自动交卷（--loop 按间隔常驻执行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='常驻进程，按间隔循环扫描')
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=settings.SUBMISSION_EXPIRY_SWEEP['INTERVAL_SECONDS'],
+            help='循环扫描间隔（秒）',
+        )
+        parser.add_argument('--batch-size', type=int, default=None, help='每批交卷数')
+        parser.add_argument('--limit', type=int, default=None, help='单轮最多处理的答卷数')
+        parser.add_argument('--pause', type=float, default=None, help='批间暂停秒数')
+        parser.add_argument('--dry-run', action='store_true', help='只统计超时答卷，不交卷')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            stats = auto_submit_expired(
+                batch_size=options['batch_size'],
+                limit=options['limit'],
+                pause_seconds=options['pause'],
+                dry_run=options['dry_run'],
+            )
+            self.stdout.write(
+                f"超时答卷 {stats['expired']} 份，自动交卷 {stats['submitted']} 份，"
+                f"已自行交卷 {stats['skipped']} 份，失败 {stats['failed']} 份，"
+                f"用时 {time.monotonic() - started:.2f}s"
+            )
+            if not options['loop']:
+                break
+            time.sleep(max(0.0, options['interval'] - (time.monotonic() - started)))
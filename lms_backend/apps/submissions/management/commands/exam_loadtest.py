@@ -0,0 +1,58 @@
+"""Seed an exam cohort and drive the exam hot path concurrently."""
+
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.submissions.loadtest import LoadTestConfig, cleanup_exam_cohort, run_exam_load, seed_exam_cohort
+
+
+class Command(BaseCommand):
+    help = '考试链路压测：造学员和考试快照，并发开卷→保存→交卷→阅卷，输出吞吐、延迟分位、锁等待和 SQL 条数'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=50, help='并发作答的学员数')
+        parser.add_argument('--questions', type=int, default=50, help='试卷题数')
+        parser.add_argument('--saves-per-student', type=int, default=None, help='每名学员保存次数，默认每题一次')
+        parser.add_argument('--subjective-every', type=int, default=5, help='每隔几题一道简答题，0 表示不出简答题')
+        parser.add_argument('--workers', type=int, default=8, help='并发线程数')
+        parser.add_argument('--no-grade', action='store_true', help='跳过主观题阅卷阶段')
+        parser.add_argument('--seed', type=int, default=None, help='随机作答种子，便于复现')
+        parser.add_argument('--keep', action='store_true', help='保留压测数据，默认结束后删除')
+        parser.add_argument('--json', action='store_true', help='以 JSON 输出报告')
+        parser.add_argument('--force', action='store_true', help='允许在非 DEBUG 环境运行')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('压测会写入大量数据，仅允许在 DEBUG 环境运行；确认目标是压测库时加 --force')
+        if options['students'] < 1 or options['questions'] < 1 or options['workers'] < 1:
+            raise CommandError('--students、--questions、--workers 必须大于 0')
+
+        config = LoadTestConfig(
+            students=options['students'],
+            questions=options['questions'],
+            saves_per_student=options['saves_per_student'],
+            subjective_every=options['subjective_every'],
+            workers=options['workers'],
+            grade=not options['no_grade'],
+            seed=options['seed'],
+        )
+        cohort = seed_exam_cohort(config)
+        self.stdout.write(f'已造数据 run_id={cohort.run_id}：{config.students} 名学员，{config.questions} 道题')
+        try:
+            report = run_exam_load(cohort, config)
+        finally:
+            if options['keep']:
+                self.stdout.write(f'保留压测数据，任务 id={cohort.task.id}')
+            else:
+                cleanup_exam_cohort(cohort)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report.as_dict(), ensure_ascii=False, indent=2))
+        else:
+            self.stdout.write(report.format_table())
+        for error in report.errors[:10]:
+            self.stdout.write(self.style.ERROR(error))
+        if report.errors:
+            self.stdout.write(self.style.WARNING(f'共 {len(report.errors)} 次操作失败'))
@@ -0,0 +1,37 @@
+"""Flush buffered exam answer drafts to the database."""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.submissions.drafts import draft_buffer_enabled, flush_pending_drafts
+
+
+class Command(BaseCommand):
+    help = '把作答草稿写缓冲中的未落库草稿批量写入数据库（--loop 按间隔常驻执行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='常驻进程，按间隔循环落库')
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=settings.SUBMISSION_DRAFT_BUFFER['FLUSH_INTERVAL_SECONDS'],
+            help='循环落库间隔（秒）',
+        )
+        parser.add_argument('--batch-size', type=int, default=None, help='每批扫描的进行中答卷数')
+
+    def handle(self, *args, **options):
+        if not draft_buffer_enabled():
+            self.stdout.write(self.style.WARNING('作答草稿写缓冲未启用，无需落库'))
+            return
+        while True:
+            started = time.monotonic()
+            stats = flush_pending_drafts(batch_size=options['batch_size'])
+            self.stdout.write(
+                f"扫描 {stats['scanned']} 份进行中答卷，落库 {stats['flushed']} 份，"
+                f"变更 {stats['answers']} 道题，用时 {time.monotonic() - started:.2f}s"
+            )
+            if not options['loop']:
+                break
+            time.sleep(max(0.0, options['interval'] - (time.monotonic() - started)))
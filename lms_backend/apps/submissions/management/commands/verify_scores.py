@@ -0,0 +1,31 @@
+"""Verify incrementally maintained submission and assignment scores."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.submissions.scoring import verify_scores
+
+
+class Command(BaseCommand):
+    help = '全量核对答卷总分与任务成绩（增量维护的结果），--repair 时按全量重算修正'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='修正不一致的分数')
+        parser.add_argument('--limit', type=int, default=20, help='每类最多打印多少条不一致记录')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            result = verify_scores(repair=options['repair'])
+
+        for submission_id, stored, expected in result['submissions'][:options['limit']]:
+            self.stdout.write(f'答卷 {submission_id}：总分 {stored}，答案合计 {expected}')
+        for assignment_id, stored, expected in result['assignments'][:options['limit']]:
+            self.stdout.write(f'任务分配 {assignment_id}：成绩 {stored}，计分答卷最高分 {expected}')
+
+        summary = f"答卷不一致 {len(result['submissions'])} 条，任务分配不一致 {len(result['assignments'])} 条"
+        if not result['submissions'] and not result['assignments']:
+            self.stdout.write(self.style.SUCCESS('分数一致'))
+        elif options['repair']:
+            self.stdout.write(self.style.SUCCESS(f'{summary}，已修正'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{summary}，加 --repair 修正'))
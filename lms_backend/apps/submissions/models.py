@@ -115,6 +115,24 @@ class Submission(TimestampMixin, models.Model):
     def has_subjective_questions(self):
         return self.quiz.has_subjective_questions
 
+    def get_answer_sheet(self) -> list:
+        """按试卷题目顺序返回整卷答案。
+
+        Answer 在首次保存或交卷时才落库，答题中未作答的题目补一条未落库的空 Answer，
+        调用方按“未作答”处理即可。
+        """
+        answers = {answer.question_id: answer for answer in self.answers.all()}
+        sheet = []
+        for question in self.quiz.quiz_questions.all():
+            answer = answers.get(question.id)
+            if answer is None:
+                answer = Answer(submission=self, question=question)
+                answer._prefetched_objects_cache = {'answer_selections': []}
+            else:
+                answer.question = question
+            sheet.append(answer)
+        return sheet
+
     @property
     def ungraded_subjective_count(self):
         return self.answers.filter(
@@ -230,6 +248,12 @@ class Answer(TimestampMixin, models.Model):
             )
         )
 
+    def _selected_option_ids(self) -> list[int]:
+        cached = getattr(self, '_prefetched_objects_cache', {})
+        if 'answer_selections' in cached:
+            return [selection.question_option_id for selection in cached['answer_selections']]
+        return list(self.answer_selections.values_list('question_option_id', flat=True))
+
     @property
     def is_objective(self):
         return self.question.is_objective
@@ -250,6 +274,10 @@ class Answer(TimestampMixin, models.Model):
             text = self.text_answer.strip()
             return text or None
 
+        answer_key = self.question.get_answer_key()
+        if answer_key is not None:
+            return answer_key.resolve_user_answer(self._selected_option_ids())
+
         option_id_key_map = self.question.get_option_id_key_map()
         selected_keys = [
             option_id_key_map[selection.question_option_id]
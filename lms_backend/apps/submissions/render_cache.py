@@ -0,0 +1,97 @@
+"""已定稿答卷详情的渲染缓存。
+
+答卷进入计分状态（GRADED，或无主观题的 SUBMITTED）后，详情内容只随“是否揭晓答案”变化，
+直到被改判。这里把序列化结果按 submission id、状态和揭晓状态缓存，结果页命中时不再预加载答案、
+选项和作答记录，也不再逐题计算 user_answer。
+
+- 键中带 VERSION，序列化结构变化时调大即可整体失效
+- 改判或修正分数后调用 `invalidate_submission_detail`
+- remaining_seconds 随时间变化，命中后按当前时间重算
+- 任务标题、学员用户名可被改名且不触发失效，不写入缓存，每次按当前 submission 填充
+- 失效要对所有进程生效，必须使用共享缓存；LocMemCache 下不启用，除非显式 ALLOW_LOCAL_CACHE
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from .models import Submission
+
+# 可变的展示字段：不进缓存，读取时按当前关联对象填充
+LIVE_FIELDS = ('user_name', 'task_title')
+
+logger = logging.getLogger(__name__)
+
+_local_cache_warned = False
+
+
+def _config() -> dict:
+    return settings.SUBMISSION_RENDER_CACHE
+
+
+def _cache():
+    return caches[_config()['CACHE_ALIAS']]
+
+
+def render_cache_enabled() -> bool:
+    global _local_cache_warned
+
+    config = _config()
+    if not config['ENABLED']:
+        return False
+    if isinstance(_cache(), LocMemCache) and not config['ALLOW_LOCAL_CACHE']:
+        if not _local_cache_warned:
+            logger.warning('答卷详情渲染缓存需要多进程共享缓存，当前为 LocMemCache，已停用')
+            _local_cache_warned = True
+        return False
+    return True
+
+
+def _detail_key(submission_id: int, status: str, reveal: bool) -> str:
+    config = _config()
+    return f"{config['KEY_PREFIX']}:v{config['VERSION']}:{submission_id}:{status}:{int(reveal)}"
+
+
+def is_detail_cacheable(submission: Submission) -> bool:
+    return submission.status in Submission.SCORED_STATUSES
+
+
+def _with_live_fields(submission: Submission, payload: dict) -> dict:
+    payload['user_name'] = submission.user.username
+    payload['task_title'] = submission.task.title
+    return payload
+
+
+def get_or_render_submission_detail(submission: Submission, render: Callable[[], dict]) -> dict:
+    """返回答卷详情；submission 只需加载 quiz、user 和 task_assignment__task，未命中时调用 render 构建。"""
+    if not render_cache_enabled() or not is_detail_cacheable(submission):
+        return render()
+    cache = _cache()
+    key = _detail_key(submission.id, submission.status, submission.should_reveal_answers())
+    payload = cache.get(key)
+    if payload is None:
+        payload = dict(render())
+        cache.set(
+            key,
+            {field: value for field, value in payload.items() if field not in LIVE_FIELDS},
+            timeout=_config()['TTL_SECONDS'],
+        )
+        return payload
+    payload['remaining_seconds'] = submission.get_reference_remaining_seconds()
+    return _with_live_fields(submission, payload)
+
+
+def invalidate_submission_detail(submission_ids: Iterable[int]) -> None:
+    if not render_cache_enabled():
+        return
+    _cache().delete_many([
+        _detail_key(submission_id, status, reveal)
+        for submission_id in submission_ids
+        for status in Submission.SCORED_STATUSES
+        for reveal in (False, True)
+    ])
@@ -1,9 +1,14 @@
 from decimal import Decimal
 from typing import Optional
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Prefetch, Q
+from django.db.models.functions import Coalesce
 
-from .models import Submission
+from apps.tasks.models import TaskAssignment
+
+from .models import Answer, AnswerSelection, Submission
+from .render_cache import invalidate_submission_detail
 
 
 def calculate_submission_score(submission) -> Decimal:
@@ -19,6 +24,77 @@ def refresh_submission_score(submission, *, save: bool = True) -> Decimal:
     return submission.obtained_score
 
 
+def apply_submission_score_delta(submission, delta: Decimal) -> Optional[Decimal]:
+    """把单题得分变化原子累加到答卷总分，返回库内最新总分。"""
+    if delta:
+        Submission.objects.filter(pk=submission.pk).update(
+            obtained_score=Coalesce(F('obtained_score'), Decimal('0')) + delta,
+        )
+        submission.refresh_from_db(fields=['obtained_score'])
+    return submission.obtained_score
+
+
+def grade_objective_answers(answers, answer_keys) -> list:
+    """按预编译答案键在内存中批量判分，只回写结果有变化的客观题。
+
+    `answers` 需预加载 `answer_selections`；主观题原样跳过。
+    返回本次写库的答案列表。
+    """
+    changed = []
+    for answer in answers:
+        answer_key = answer_keys.get(answer.question_id)
+        if answer_key is None or answer_key.is_subjective:
+            continue
+        user_answer = answer_key.resolve_user_answer(
+            selection.question_option_id for selection in answer.answer_selections.all()
+        )
+        is_correct, score = answer_key.check(user_answer)
+        if answer.is_correct == is_correct and answer.obtained_score == score:
+            continue
+        answer.is_correct = is_correct
+        answer.obtained_score = score
+        changed.append(answer)
+    if changed:
+        Answer.objects.bulk_update(changed, ['is_correct', 'obtained_score'])
+    return changed
+
+
+def list_answers_for_grading(submission_id: int) -> list[Answer]:
+    """交卷判分只需要选项 id，不联表题目/选项内容。"""
+    return list(
+        Answer.objects.filter(submission_id=submission_id).prefetch_related(
+            Prefetch(
+                'answer_selections',
+                queryset=AnswerSelection.objects.only('id', 'answer_id', 'question_option_id'),
+            ),
+        )
+    )
+
+
+def create_missing_answers(submission_id: int, answers, answer_keys) -> None:
+    """交卷时为未作答的题目批量补建 Answer，直接写入空答案的判分结果。"""
+    answered_ids = {answer.question_id for answer in answers}
+    missing = []
+    for question_id, answer_key in answer_keys.items():
+        if question_id in answered_ids:
+            continue
+        is_correct, score = answer_key.check(None)
+        missing.append(Answer(
+            submission_id=submission_id,
+            question_id=question_id,
+            is_correct=is_correct,
+            obtained_score=score,
+        ))
+    if missing:
+        # 与交卷同时到达的首存可能已建好同一行，冲突时以已有行为准
+        Answer.objects.bulk_create(missing, ignore_conflicts=True)
+
+
+def sum_answer_scores(answers) -> Decimal:
+    """用已加载的答案汇总得分，与 `calculate_submission_score` 结果一致。"""
+    return sum((answer.obtained_score for answer in answers), Decimal('0'))
+
+
 def calculate_assignment_score(assignment) -> Optional[Decimal]:
     return assignment.submissions.filter(
         status__in=Submission.SCORED_STATUSES,
@@ -33,3 +109,79 @@ def refresh_assignment_score(assignment, *, save: bool = True) -> Optional[Decim
     if save:
         assignment.save(update_fields=['score'])
     return assignment.score
+
+
+def raise_assignment_score(assignment, score: Optional[Decimal]) -> bool:
+    """条件更新最高分：仅当 score 高于当前成绩时写入，等价于 SET score = GREATEST(score, %s)。
+
+    判断放在 UPDATE 的 WHERE 里，并发交卷/评分不会互相覆盖成较低的分数。
+    """
+    if score is None:
+        return False
+    updated = TaskAssignment.objects.filter(
+        Q(score__isnull=True) | Q(score__lt=score),
+        pk=assignment.pk,
+    ).update(score=score)
+    if updated:
+        assignment.score = score
+    return bool(updated)
+
+
+def sync_assignment_score(assignment, *, previous: Optional[Decimal], current: Optional[Decimal]) -> None:
+    """计分答卷分数从 previous 变为 current 后维护任务最高分。
+
+    最高分无法按差值回退：只有分数下降且原分数恰是当前最高分时，才重算这一条任务分配。
+    """
+    if previous is None or current is None or current >= previous:
+        raise_assignment_score(assignment, current)
+        return
+    if TaskAssignment.objects.filter(pk=assignment.pk, score=previous).exists():
+        refresh_assignment_score(assignment)
+
+
+def verify_scores(*, repair: bool = False) -> dict:
+    """全量核对增量维护的分数：答卷总分 = 答案得分之和，任务成绩 = 计分答卷最高分。
+
+    返回 (id, 库内值, 全量值) 列表；repair=True 时按全量值修正，先修答卷再核对任务分配。
+    """
+    submission_drift = [
+        submission
+        for submission in Submission.objects.filter(
+            status__in=Submission.COMPLETED_STATUSES,
+        ).annotate(
+            answer_total=Coalesce(models.Sum('answers__obtained_score'), Decimal('0')),
+        ).only('id', 'obtained_score').iterator()
+        if submission.obtained_score != submission.answer_total
+    ]
+    result = {
+        'submissions': [
+            (submission.id, submission.obtained_score, submission.answer_total)
+            for submission in submission_drift
+        ],
+    }
+    if repair:
+        for submission in submission_drift:
+            submission.obtained_score = submission.answer_total
+        Submission.objects.bulk_update(submission_drift, ['obtained_score'], batch_size=500)
+        repaired_ids = [submission.id for submission in submission_drift]
+        transaction.on_commit(lambda: invalidate_submission_detail(repaired_ids))
+
+    assignment_drift = [
+        assignment
+        for assignment in TaskAssignment.objects.annotate(
+            best_score=models.Max(
+                'submissions__obtained_score',
+                filter=Q(submissions__status__in=Submission.SCORED_STATUSES),
+            ),
+        ).only('id', 'score').iterator()
+        if assignment.score != assignment.best_score
+    ]
+    result['assignments'] = [
+        (assignment.id, assignment.score, assignment.best_score)
+        for assignment in assignment_drift
+    ]
+    if repair:
+        for assignment in assignment_drift:
+            assignment.score = assignment.best_score
+        TaskAssignment.objects.bulk_update(assignment_drift, ['score'], batch_size=500)
+    return result
@@ -57,7 +57,7 @@ class SubmissionDetailSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.username', read_only=True)
     task_title = serializers.CharField(source='task.title', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
-    answers = AnswerSerializer(many=True, read_only=True)
+    answers = AnswerSerializer(source='get_answer_sheet', many=True, read_only=True)
     is_passed = serializers.ReadOnlyField()
     pass_score = serializers.ReadOnlyField()
     task_quiz_id = serializers.IntegerField(read_only=True)
@@ -1,19 +1,27 @@
 """Submission management services."""
 
-from typing import Any, List, Optional, Tuple
+from typing import Any, Optional, Tuple, Union
 
 from apps.activity_logs.decorators import log_operation
 from django.db import IntegrityError, transaction
 from django.db.models import Max, Prefetch, QuerySet
 from django.utils import timezone
 
+from apps.quizzes.answer_keys import QuestionAnswerKey, get_revision_answer_keys
+from apps.quizzes.models import QuizRevisionQuestion
 from apps.tasks.models import TaskAssignment, TaskQuiz
 from apps.users.models import User
 from core.base_service import BaseService
 from core.exceptions import BusinessError, ErrorCodes
 
+from .drafts import (
+    DraftAnswer,
+    draft_buffer_enabled,
+    flush_submission_drafts,
+    put_answer_draft,
+)
 from .models import Answer, AnswerSelection, Submission
-from .scoring import calculate_submission_score, refresh_assignment_score
+from .workflows import complete_submission
 
 # 区分“调用方未传字段”和“调用方传了空值”的哨兵对象。
 UNSET = object()
@@ -65,12 +73,13 @@ class SubmissionService(BaseService):
             'quiz',
             'user',
         ).prefetch_related(
-            'answers__question__question_options',
+            # 答卷按试卷题目展开（get_answer_sheet），未作答的题目没有 Answer 行
+            Prefetch('quiz__quiz_questions', queryset=QuizRevisionQuestion.objects.select_related('snapshot')),
+            'quiz__quiz_questions__snapshot__question_options',
             Prefetch(
                 'answers__answer_selections',
                 queryset=AnswerSelection.objects.select_related('question_option'),
             ),
-            'answers__question',
             'answers__graded_by',
         )
         if user:
@@ -113,70 +122,55 @@ class SubmissionService(BaseService):
         submission_id: int,
         question_id: int,
     ) -> Optional[Answer]:
-        return Answer.objects.select_related('question').prefetch_related(
-            'question__question_options',
-            Prefetch(
-                'answer_selections',
-                queryset=AnswerSelection.objects.select_related('question_option'),
-            ),
+        # 选项 key ↔ id 走快照答案键缓存，不再预加载题目选项
+        return Answer.objects.select_related('question__snapshot').prefetch_related(
+            'answer_selections',
         ).filter(
             submission_id=submission_id,
             question_id=question_id,
         ).first()
 
-    def _list_objective_answers(self, submission_id: int) -> QuerySet:
-        return Answer.objects.filter(
-            submission_id=submission_id,
-            question__question_type__in=['SINGLE_CHOICE', 'MULTIPLE_CHOICE', 'TRUE_FALSE'],
-        ).select_related('question').prefetch_related(
-            'question__question_options',
-            Prefetch(
-                'answer_selections',
-                queryset=AnswerSelection.objects.select_related('question_option'),
-            ),
-        )
-
-    def _create_with_answers(self, answers_data: List[dict], **submission_data) -> Submission:
-        submission = Submission.objects.create(**submission_data)
-        Answer.objects.bulk_create(
-            [Answer(submission=submission, question_id=answer_data['question_id']) for answer_data in answers_data]
-        )
-        return submission
+    def _get_or_create_answer(self, submission: Submission, question_id: int) -> Answer:
+        """首次保存时才创建 Answer；并发首存由 (submission, question) 唯一约束兜底。"""
+        answer = self._get_answer_by_submission_and_question(submission.id, question_id)
+        if answer is not None:
+            return answer
+        answer, _ = Answer.objects.get_or_create(submission_id=submission.id, question_id=question_id)
+        return answer
 
-    def _normalize_user_answer_input(self, answer: Answer, user_answer: Any) -> dict[str, Any]:
+    def _normalize_user_answer_input(self, answer_key: QuestionAnswerKey, user_answer: Any) -> dict[str, Any]:
         """把前端答案值转换为模型可写入的字段。
 
         客观题前端传选项 key，后端在试卷快照选项里解析成 option id。
         """
-        question = answer.question
-        if question.is_subjective:
+        if answer_key.is_subjective:
             if user_answer in (None, ''):
                 return {'text_answer': ''}
             if not isinstance(user_answer, str):
                 raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message='简答题答案必须是字符串')
             return {'text_answer': user_answer}
 
-        option_key_map = question.get_option_key_map()
-        if question.question_type == 'MULTIPLE_CHOICE':
+        option_key_ids = answer_key.option_key_ids
+        if answer_key.question_type == 'MULTIPLE_CHOICE':
             if user_answer in (None, ''):
                 return {'option_ids': []}
             if not isinstance(user_answer, list):
                 raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message='多选题答案必须是列表')
             normalized_keys: list[str] = []
             for item in user_answer:
-                if not isinstance(item, str) or item not in option_key_map:
+                if not isinstance(item, str) or item not in option_key_ids:
                     raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message='多选题答案包含无效选项')
                 if item not in normalized_keys:
                     normalized_keys.append(item)
-            return {'option_ids': [option_key_map[key]['id'] for key in normalized_keys]}
+            return {'option_ids': [option_key_ids[key] for key in normalized_keys]}
 
         if user_answer in (None, ''):
             return {'option_ids': []}
         if not isinstance(user_answer, str):
             raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message='客观题答案必须是字符串')
-        if user_answer not in option_key_map:
+        if user_answer not in option_key_ids:
             raise BusinessError(code=ErrorCodes.VALIDATION_ERROR, message='答案必须是有效的选项')
-        return {'option_ids': [option_key_map[user_answer]['id']]}
+        return {'option_ids': [option_key_ids[user_answer]]}
 
     def _sync_answer_option_ids(self, answer: Answer, option_ids: list[int]) -> None:
         """同步客观题选项关联，保留未变化的关联行。"""
@@ -199,6 +193,16 @@ class SubmissionService(BaseService):
         if prefetched_cache is not None:
             prefetched_cache.pop('answer_selections', None)
 
+    def get_result_submission(self, pk: int, user: User) -> Submission:
+        """结果页轻量加载：只带判断揭晓和渲染缓存键所需的关联。"""
+        submission = Submission.objects.select_related(
+            'quiz',
+            'user',
+            'task_assignment__task',
+        ).filter(pk=pk, user=user).first()
+        self.validate_not_none(submission, f'答题记录 {pk} 不存在')
+        return submission
+
     def get_submission_by_id(self, pk: int, user: User = None) -> Submission:
         submission = self._get_submission_by_id(pk=pk, user=user)
         self.validate_not_none(submission, f'答题记录 {pk} 不存在')
@@ -264,6 +268,7 @@ class SubmissionService(BaseService):
         else:
             in_progress = self.get_in_progress(task_assignment_id=assignment.id, quiz_id=quiz_id)
         if in_progress:
+            flush_submission_drafts(in_progress)
             return self.get_submission_by_id(in_progress.id, user=user), False
         try:
             # 内层 savepoint：唯一约束冲突时不污染外层事务，可回退为 resume
@@ -304,11 +309,8 @@ class SubmissionService(BaseService):
         quiz = task_quiz.quiz
         total_score = quiz.total_score
         attempt_number = 1 if is_exam else self._next_attempt_number(assignment.id, task_quiz.id)
-        questions = quiz.quiz_questions.order_by('order').values_list('id', flat=True)
-        # 每道快照题先生成空 Answer，后续保存答案只更新这批固定记录。
-        answers_data = [{'question_id': question_id} for question_id in questions]
-        submission = self._create_with_answers(
-            answers_data,
+        # 只写答卷一行；Answer 在首次保存或交卷时才创建
+        submission = Submission.objects.create(
             task_assignment=assignment,
             task_quiz=task_quiz,
             quiz=quiz,
@@ -325,16 +327,22 @@ class SubmissionService(BaseService):
         question_id: int,
         user_answer: Any = UNSET,
         is_marked: bool = UNSET,
-    ) -> Answer:
+    ) -> Union[Answer, DraftAnswer]:
         if submission.status != Submission.STATUS_IN_PROGRESS:
             raise BusinessError(code=ErrorCodes.INVALID_OPERATION, message='当前答卷不可继续作答')
-        answer = self._get_answer_by_submission_and_question(submission.id, question_id)
-        self.validate_not_none(answer, '题目不在此答卷中')
+        if draft_buffer_enabled():
+            return self._save_answer_draft(submission, question_id, user_answer, is_marked)
+        answer_key = get_revision_answer_keys(submission.quiz_id).get(question_id)
+        self.validate_not_none(answer_key, '题目不在此答卷中')
+        normalized = None
+        if user_answer is not UNSET:
+            # 先校验再建行，非法答案不会留下空 Answer
+            normalized = self._normalize_user_answer_input(answer_key, user_answer)
+        answer = self._get_or_create_answer(submission, question_id)
 
         update_fields = []
-        if user_answer is not UNSET:
-            normalized = self._normalize_user_answer_input(answer, user_answer)
-            if answer.is_subjective:
+        if normalized is not None:
+            if answer_key.is_subjective:
                 answer.text_answer = normalized['text_answer']
                 update_fields.append('text_answer')
             else:
@@ -346,6 +354,40 @@ class SubmissionService(BaseService):
             answer.save(update_fields=update_fields)
         return answer
 
+    def _save_answer_draft(
+        self,
+        submission: Submission,
+        question_id: int,
+        user_answer: Any,
+        is_marked: Any,
+    ) -> DraftAnswer:
+        """写缓冲模式：校验后只写草稿缓存，由 drafts 模块批量落库。"""
+        answer_key = get_revision_answer_keys(submission.quiz_id).get(question_id)
+        self.validate_not_none(answer_key, '题目不在此答卷中')
+        fields = {}
+        if user_answer is not UNSET:
+            fields.update(self._normalize_user_answer_input(answer_key, user_answer))
+        if is_marked is not UNSET:
+            fields['is_marked'] = is_marked
+        draft = put_answer_draft(submission.id, question_id, fields)
+
+        has_answer = 'text_answer' in draft or 'option_ids' in draft
+        stored = None
+        if not has_answer or 'is_marked' not in draft:
+            # 草稿里没有的字段以库内答案为准
+            stored = self._get_answer_by_submission_and_question(submission.id, question_id)
+        if not has_answer:
+            resolved_answer = stored.user_answer if stored else None
+        elif answer_key.is_subjective:
+            resolved_answer = draft['text_answer'].strip() or None
+        else:
+            resolved_answer = answer_key.resolve_user_answer(draft['option_ids'])
+        return DraftAnswer(
+            question_id=question_id,
+            user_answer=resolved_answer,
+            is_marked=draft['is_marked'] if 'is_marked' in draft else bool(stored and stored.is_marked),
+        )
+
     @transaction.atomic
     @log_operation(
         'submission',
@@ -367,22 +409,4 @@ class SubmissionService(BaseService):
         task = submission.task_assignment.task
         is_exam = submission.quiz.quiz_type == 'EXAM'
         submitted_at = min(now, task.deadline) if is_exam else now
-        status = (
-            Submission.STATUS_GRADING
-            if submission.has_subjective_questions
-            else Submission.STATUS_SUBMITTED
-        )
-
-        for answer in self._list_objective_answers(submission.id):
-            answer.auto_grade()
-
-        submission.status = status
-        submission.submitted_at = submitted_at
-        submission.obtained_score = calculate_submission_score(submission)
-        submission.save(update_fields=['status', 'submitted_at', 'obtained_score'])
-        refresh_assignment_score(submission.task_assignment)
-        if submission.status == Submission.STATUS_SUBMITTED:
-            from apps.tasks.progress import sync_assignment_completion_status
-
-            sync_assignment_completion_status(submission.task_assignment)
-        return submission
+        return complete_submission(submission, submitted_at=submitted_at)
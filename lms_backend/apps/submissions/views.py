@@ -10,6 +10,7 @@ from core.exceptions import BusinessError, ErrorCodes
 from core.responses import created_response, success_response
 
 from .models import Submission
+from .render_cache import get_or_render_submission_detail
 from .serializers import (
     SaveAnswerSerializer,
     StartQuizSerializer,
@@ -119,14 +120,19 @@ class ResultView(BaseAPIView):
     )
     def get(self, request, pk):
         enforce_student_workspace(request, error_message='只有学员角色可以进行答题和查看结果')
-        submission = self.service.get_submission_by_id(pk, user=request.user)
+        submission = self.service.get_result_submission(pk, user=request.user)
         if submission.status == Submission.STATUS_IN_PROGRESS:
             raise BusinessError(
                 code=ErrorCodes.INVALID_OPERATION,
                 message='答卷尚未提交',
             )
-        response_serializer = SubmissionDetailSerializer(submission)
-        return success_response(response_serializer.data)
+        data = get_or_render_submission_detail(
+            submission,
+            lambda: SubmissionDetailSerializer(
+                self.service.get_submission_by_id(pk, user=request.user)
+            ).data,
+        )
+        return success_response(data)
 
 
 class SaveAnswerView(BaseAPIView):
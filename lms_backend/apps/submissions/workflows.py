@@ -1,15 +1,67 @@
 """阅卷流程。
 
-`SubmissionService` 负责学员作答；这里负责人工评分后的状态收口和分数刷新。
+`SubmissionService` 负责学员作答；这里负责交卷、人工评分后的状态收口和分数刷新。
 """
 
 from decimal import Decimal
 
+from django.db import transaction
+
+from apps.quizzes.answer_keys import get_revision_answer_keys
 from apps.tasks.progress import sync_assignment_completion_status
 from core.exceptions import BusinessError, ErrorCodes
 
-from .models import Submission
-from .scoring import refresh_assignment_score, refresh_submission_score
+from .drafts import discard_submission_drafts, flush_submission_drafts
+from .models import Answer, Submission
+from .render_cache import invalidate_submission_detail
+from .scoring import (
+    apply_submission_score_delta,
+    create_missing_answers,
+    grade_objective_answers,
+    list_answers_for_grading,
+    raise_assignment_score,
+    sum_answer_scores,
+    sync_assignment_score,
+)
+
+
+@transaction.atomic
+def complete_submission(submission: Submission, *, submitted_at) -> Submission:
+    """交卷收口：落库草稿、整卷判分、补建未作答题目，写入状态和总分并刷新任务成绩与完成状态。
+
+    学员交卷和超时自动交卷共用。先锁住答卷行并确认仍在答题中，两边同时到达时只有一方生效。
+    """
+    is_in_progress = Submission.objects.select_for_update().filter(
+        pk=submission.pk,
+        status=Submission.STATUS_IN_PROGRESS,
+    ).exists()
+    if not is_in_progress:
+        raise BusinessError(code=ErrorCodes.INVALID_OPERATION, message='该答卷已提交')
+    status = (
+        Submission.STATUS_GRADING
+        if submission.has_subjective_questions
+        else Submission.STATUS_SUBMITTED
+    )
+
+    # 写缓冲模式下先把草稿落库，判分基于完整作答
+    flush_submission_drafts(submission)
+    # 整卷一次加载、内存判分、一次 bulk_update，避免逐题 auto_grade 写库
+    answer_keys = get_revision_answer_keys(submission.quiz_id)
+    answers = list_answers_for_grading(submission.id)
+    grade_objective_answers(answers, answer_keys)
+    # 未作答的题目得 0 分，不影响总分
+    create_missing_answers(submission.id, answers, answer_keys)
+
+    submission.status = status
+    submission.submitted_at = submitted_at
+    submission.obtained_score = sum_answer_scores(answers)
+    submission.save(update_fields=['status', 'submitted_at', 'obtained_score'])
+    discard_submission_drafts(submission)
+    if submission.status in Submission.SCORED_STATUSES:
+        raise_assignment_score(submission.task_assignment, submission.obtained_score)
+    if submission.status == Submission.STATUS_SUBMITTED:
+        sync_assignment_completion_status(submission.task_assignment)
+    return submission
 
 
 def finalize_submission_grading(submission: Submission) -> Submission:
@@ -28,16 +80,20 @@ def finalize_submission_grading(submission: Submission) -> Submission:
             message='还有未评分的主观题',
         )
 
-    refresh_submission_score(submission)
+    # 总分已随每次评分增量维护，这里只切换状态并把分数计入任务最高分
     submission.status = Submission.STATUS_GRADED
     submission.save(update_fields=['status'])
-    refresh_assignment_score(submission.task_assignment)
+    raise_assignment_score(submission.task_assignment, submission.obtained_score)
     sync_assignment_completion_status(submission.task_assignment)
     return submission
 
 
+@transaction.atomic
 def grade_subjective_answer(answer, grader, score, comment=''):
-    """给单道主观题评分，并在必要时自动完成整份答卷。"""
+    """给单道主观题评分，并在必要时自动完成整份答卷。
+
+    锁住答卷与答案行，以库内原得分和原总分计算增量，并发或重复评分不会把同一次改分累加两次。
+    """
     if answer.is_objective:
         raise BusinessError(
             code=ErrorCodes.VALIDATION_ERROR,
@@ -51,14 +107,24 @@ def grade_subjective_answer(answer, grader, score, comment=''):
             message=f'分数必须在 0 到 {answer.max_score} 之间',
         )
 
+    submission = answer.submission
+    # 先锁答卷再锁答案，与交卷路径加锁顺序一致；总分与状态以库内为准，内存中的答卷可能已过期
+    submission.obtained_score, submission.status = (
+        Submission.objects.select_for_update()
+        .values_list('obtained_score', 'status')
+        .get(pk=submission.pk)
+    )
+    previous_score = Answer.objects.select_for_update().values_list('obtained_score', flat=True).get(pk=answer.pk)
     answer.apply_manual_grade(grader=grader, score=score_decimal, comment=comment)
 
-    submission = answer.submission
+    # 改判已定稿答卷时详情缓存失效
+    transaction.on_commit(lambda: invalidate_submission_detail([submission.id]))
+    previous_total = submission.obtained_score
+    current_total = apply_submission_score_delta(submission, answer.obtained_score - previous_score)
     if submission.status == Submission.STATUS_GRADING:
         if submission.all_subjective_graded:
             finalize_submission_grading(submission)
     elif submission.status in (Submission.STATUS_SUBMITTED, Submission.STATUS_GRADED):
-        refresh_submission_score(submission)
-        refresh_assignment_score(submission.task_assignment)
+        sync_assignment_score(submission.task_assignment, previous=previous_total, current=current_total)
 
     return answer
@@ -41,6 +41,7 @@ def pop_resource_tag_payload(
     scope: TagScope,
     default_space_tag_id: Optional[int] = None,
     default_tag_ids: Optional[list[int]] = None,
+    valid_tag_ids: Optional[set[int]] = None,
 ) -> ResourceTagPayload:
     space_tag_provided = 'space_tag_id' in data
     tag_ids_provided = 'tag_ids' in data
@@ -56,7 +57,7 @@ def pop_resource_tag_payload(
     )
     return ResourceTagPayload(
         space_tag_id=space_tag_id,
-        tag_ids=_validate_tag_ids(raw_tag_ids or [], scope=scope),
+        tag_ids=_validate_tag_ids(raw_tag_ids or [], scope=scope, valid_tag_ids=valid_tag_ids),
         space_tag_provided=space_tag_provided,
         tag_ids_provided=tag_ids_provided,
     )
@@ -68,12 +69,14 @@ def build_resource_update_plan(
     *,
     scope: TagScope,
     current_tag_ids: list[int],
+    valid_tag_ids: Optional[set[int]] = None,
 ) -> ResourceUpdatePlan:
     payload = pop_resource_tag_payload(
         data,
         scope=scope,
         default_space_tag_id=resource.space_tag_id,
         default_tag_ids=current_tag_ids,
+        valid_tag_ids=valid_tag_ids,
     )
     changed_fields = {
         key: value
@@ -114,6 +117,33 @@ def apply_resource_tag_changes(
         resource.tags.set(tag_ids)
 
 
+def load_valid_tag_ids(tag_ids, *, scope: TagScope) -> set[int]:
+    """批量预取可用标签 id，供多次 pop_resource_tag_payload 复用。"""
+    tag_ids = list(tag_ids)
+    if not tag_ids:
+        return set()
+    applicable_field, _ = _TAG_SCOPE_CONFIG[scope]
+    return set(
+        Tag.objects.filter(
+            id__in=tag_ids,
+            tag_type='TAG',
+            **{applicable_field: True},
+        ).values_list('id', flat=True)
+    )
+
+
+def validate_space_tag_ids(space_tag_ids) -> None:
+    space_tag_ids = set(space_tag_ids)
+    if not space_tag_ids:
+        return
+    found = Tag.objects.filter(id__in=space_tag_ids, tag_type='SPACE').count()
+    if found != len(space_tag_ids):
+        raise BusinessError(
+            code=ErrorCodes.VALIDATION_ERROR,
+            message='无效的 space ID',
+        )
+
+
 def _validate_space_tag_id(space_tag_id: int) -> Tag:
     space_tag = Tag.objects.filter(
         id=space_tag_id,
@@ -127,18 +157,18 @@ def _validate_space_tag_id(space_tag_id: int) -> Tag:
     return space_tag
 
 
-def _validate_tag_ids(tag_ids: list[int], *, scope: TagScope) -> list[int]:
+def _validate_tag_ids(
+    tag_ids: list[int],
+    *,
+    scope: TagScope,
+    valid_tag_ids: Optional[set[int]] = None,
+) -> list[int]:
     if not tag_ids:
         return []
 
-    applicable_field, invalid_message = _TAG_SCOPE_CONFIG[scope]
-    valid_tag_ids = set(
-        Tag.objects.filter(
-            id__in=tag_ids,
-            tag_type='TAG',
-            **{applicable_field: True},
-        ).values_list('id', flat=True)
-    )
+    _, invalid_message = _TAG_SCOPE_CONFIG[scope]
+    if valid_tag_ids is None:
+        valid_tag_ids = load_valid_tag_ids(tag_ids, scope=scope)
     invalid_tag_ids = [tag_id for tag_id in tag_ids if tag_id not in valid_tag_ids]
     if invalid_tag_ids:
         raise BusinessError(
@@ -7,7 +7,10 @@ from django.db.models import Max
 
 from apps.activity_logs.decorators import log_content_action, log_operation
 from apps.knowledge.models import Knowledge
+from apps.knowledge.search import refresh_knowledge_search_terms, tagged_knowledge_ids
 from apps.questions.models import Question
+from apps.questions.search import refresh_question_search_terms
+from apps.quizzes.fingerprints import refresh_question_fingerprints, tagged_question_ids
 from core.base_service import BaseService
 from core.exceptions import BusinessError, ErrorCodes
 
@@ -132,6 +135,10 @@ class TagService(BaseService):
             self._apply_tag_fields(tag, data)
 
         original_tag_type = tag.tag_type
+        # 题目快照带有标签名称和类型，搜索索引带有标签名称，改名/改类型前记下受影响的题目和知识
+        label_changed = data.get('name', tag.name) != tag.name or next_tag_type != original_tag_type
+        affected_question_ids = tagged_question_ids([tag.id]) if label_changed else []
+        affected_knowledge_ids = tagged_knowledge_ids([tag.id]) if label_changed else []
         self._apply_update_fields(tag, data, next_tag_type)
 
         pending_relation_change = None
@@ -162,6 +169,9 @@ class TagService(BaseService):
         elif isinstance(pending_relation_change, tuple):
             _, knowledge_ids, question_ids = pending_relation_change
             self._apply_space_to_tag_relations(tag, knowledge_ids, question_ids)
+        refresh_question_fingerprints(affected_question_ids)
+        refresh_question_search_terms(affected_question_ids)
+        refresh_knowledge_search_terms(affected_knowledge_ids)
         return tag
 
     @transaction.atomic
@@ -249,6 +259,8 @@ class TagService(BaseService):
                 message='合并后的标签名称已存在',
             )
 
+        affected_question_ids = tagged_question_ids(normalized_source_ids)
+        affected_knowledge_ids = tagged_knowledge_ids(normalized_source_ids)
         target = next((tag for tag in ordered_tags if tag.name == merged_name), ordered_tags[0])
         source_tags = [tag for tag in ordered_tags if tag.id != target.id]
         source_ids = [tag.id for tag in source_tags]
@@ -277,6 +289,9 @@ class TagService(BaseService):
                 code=ErrorCodes.VALIDATION_ERROR,
                 message='合并后的标签名称已存在',
             )
+        refresh_question_fingerprints(affected_question_ids)
+        refresh_question_search_terms(affected_question_ids)
+        refresh_knowledge_search_terms(affected_knowledge_ids)
         return target
 
     @transaction.atomic
@@ -291,6 +306,8 @@ class TagService(BaseService):
         tag = Tag.objects.filter(pk=pk).first()
         self.validate_not_none(tag, f'标签 {pk} 不存在')
 
+        affected_question_ids = tagged_question_ids([tag.id])
+        affected_knowledge_ids = tagged_knowledge_ids([tag.id])
         if tag.tag_type == 'SPACE':
             Knowledge.objects.filter(space_tag_id=tag.id).update(space_tag=None)
             Question.objects.filter(space_tag_id=tag.id).update(space_tag=None)
@@ -299,6 +316,9 @@ class TagService(BaseService):
             tag.question_items.clear()
 
         tag.delete()
+        refresh_question_fingerprints(affected_question_ids)
+        refresh_question_search_terms(affected_question_ids)
+        refresh_knowledge_search_terms(affected_knowledge_ids)
         return tag
 
     def _normalize_tag_data(
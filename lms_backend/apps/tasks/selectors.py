@@ -2,7 +2,7 @@
 
 from typing import Optional, Set
 
-from django.db.models import Count, Q, QuerySet, Sum
+from django.db.models import Count, F, Q, QuerySet, Sum
 
 from apps.authorization.engine import scope_filter
 from apps.knowledge.selectors import get_knowledge_queryset
@@ -80,7 +80,7 @@ def task_knowledge_queryset(task_id: int) -> QuerySet:
         'knowledge',
         'source_knowledge',
         'task',
-    ).order_by('order')
+    ).defer('knowledge__content', 'source_knowledge__content').order_by('order')
 
 
 def task_quiz_queryset(task_id: int) -> QuerySet:
@@ -126,7 +126,7 @@ def quiz_resource_option_queryset(
         'quiz.view',
         request,
         base_queryset=Quiz.objects.all(),
-    ).annotate(question_count_value=Count('quiz_questions'))
+    ).annotate(question_count_value=F('stats_question_count'))
     if exclude_ids:
         queryset = queryset.exclude(id__in=exclude_ids)
     if quiz_type:
@@ -21,6 +21,7 @@ from apps.knowledge.models import Knowledge
 from apps.knowledge.services import ensure_knowledge_revision
 from apps.quizzes.models import Quiz
 from apps.quizzes.services import ensure_quiz_revision
+from apps.quizzes.stats import refresh_quiz_stats
 from apps.submissions.models import Submission
 from apps.users.models import User
 from core.base_service import BaseService
@@ -301,8 +302,12 @@ class TaskService(BaseService):
             return
 
         with transaction.atomic():
+            source_quiz_ids = list(
+                TaskQuiz.objects.filter(task_id__in=normalized_ids).values_list('source_quiz_id', flat=True)
+            )
             Submission.objects.filter(task_assignment__task_id__in=normalized_ids).delete()
             Task.objects.filter(id__in=normalized_ids).delete()
+            refresh_quiz_stats(source_quiz_ids)
 
     def _dedupe_ids(self, resource_ids: List[int]) -> List[int]:
         seen = set()
@@ -412,6 +417,7 @@ class TaskService(BaseService):
             )
         if associations:
             TaskQuiz.objects.bulk_create(associations, batch_size=500)
+            refresh_quiz_stats([quiz.id for quiz in quiz_objs])
 
     def _sync_task_knowledge(self, task: Task, knowledge_objs: List[Knowledge]) -> None:
         desired_ids = [item.id for item in knowledge_objs]
@@ -434,6 +440,7 @@ class TaskService(BaseService):
 
     def _sync_task_quizzes(self, task: Task, quiz_objs: List[Quiz]) -> None:
         desired_ids = [item.id for item in quiz_objs]
+        previous_ids = list(TaskQuiz.objects.filter(task_id=task.id).values_list('source_quiz_id', flat=True))
         TaskQuiz.objects.filter(task_id=task.id).exclude(
             source_quiz_id__in=desired_ids
         ).delete()
@@ -450,6 +457,7 @@ class TaskService(BaseService):
                 task, quiz_objs, source_id, order
             ),
         )
+        refresh_quiz_stats([*previous_ids, *desired_ids])
 
     def _build_knowledge_assoc(
         self,
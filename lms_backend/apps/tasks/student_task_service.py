@@ -26,8 +26,8 @@ STUDENT_TASK_LIST_STATUSES = set(TASK_EXECUTION_STATUS_LABELS) - {'COMPLETED_ABN
 
 
 def extract_knowledge_preview(knowledge, max_length: int = 160) -> str:
-    """任务侧纯文本预览。"""
-    text = ' '.join(strip_tags(getattr(knowledge, 'content', '') or '').split())
+    """任务侧纯文本预览，取自写入时生成的 content_preview（已截断的预览自带截断标记）。"""
+    text = ' '.join(strip_tags(getattr(knowledge, 'content_preview', '') or '').split())
     return f'{text[:max_length]}...' if len(text) > max_length else text
 
 
@@ -7,12 +7,12 @@ import factory
 from django.utils import timezone
 from factory.django import DjangoModelFactory
 
-from apps.knowledge.models import Knowledge, KnowledgeRevision
+from apps.knowledge.models import Knowledge, KnowledgeRevision, build_content_preview
 from apps.questions.models import Question, QuestionOption
 from apps.quizzes.models import (
+    QuestionSnapshot,
     Quiz,
     QuizQuestion,
-    QuizQuestionOption,
     QuizRevision,
     QuizRevisionQuestion,
     QuizRevisionQuestionOption,
@@ -56,6 +56,7 @@ class KnowledgeFactory(DjangoModelFactory):
 
     title = factory.Sequence(lambda n: f'Knowledge {n}')
     content = factory.Sequence(lambda n: f'步骤摘要 {n}')
+    content_preview = factory.LazyAttribute(lambda obj: build_content_preview(obj.content))
     external_doc_url = factory.Sequence(lambda n: f'https://example.com/doc-{n}')
     created_by = factory.SubFactory(UserFactory)
     updated_by = factory.SelfAttribute('created_by')
@@ -69,6 +70,7 @@ class KnowledgeRevisionFactory(DjangoModelFactory):
     revision_number = 1
     title = factory.LazyAttribute(lambda obj: obj.source_knowledge.title)
     content = factory.LazyAttribute(lambda obj: obj.source_knowledge.content)
+    content_preview = factory.LazyAttribute(lambda obj: obj.source_knowledge.content_preview)
     external_doc_url = factory.LazyAttribute(lambda obj: obj.source_knowledge.external_doc_url)
     related_links = factory.LazyAttribute(lambda obj: obj.source_knowledge.related_links)
     space_tag_name = ''
@@ -88,7 +90,6 @@ class QuestionFactory(DjangoModelFactory):
     score = 1
     created_by = factory.SubFactory(UserFactory)
     updated_by = factory.SelfAttribute('created_by')
-    created_from_quiz = None
 
     @factory.post_generation
     def with_default_options(self, create, extracted, **kwargs):
@@ -134,40 +135,7 @@ class QuizQuestionFactory(DjangoModelFactory):
 
     quiz = factory.SubFactory(QuizFactory)
     question = factory.SubFactory(QuestionFactory)
-    content = factory.LazyAttribute(lambda obj: obj.question.content)
-    question_type = factory.LazyAttribute(lambda obj: obj.question.question_type)
-    reference_answer = factory.LazyAttribute(lambda obj: obj.question.reference_answer)
-    explanation = factory.LazyAttribute(lambda obj: obj.question.explanation)
-    score = factory.LazyAttribute(lambda obj: obj.question.score)
     order = factory.Sequence(lambda n: n + 1)
-    space_tag_name = ''
-    tags_json = []
-
-    @factory.post_generation
-    def with_default_options(self, create, extracted, **kwargs):
-        if not create:
-            return
-        if extracted is False or self.question_type == 'SHORT_ANSWER':
-            return
-        if self.question_options.exists():
-            return
-        for option in self.question.question_options.order_by('sort_order', 'id'):
-            QuizQuestionOptionFactory(
-                question=self,
-                sort_order=option.sort_order,
-                content=option.content,
-                is_correct=option.is_correct,
-            )
-
-
-class QuizQuestionOptionFactory(DjangoModelFactory):
-    class Meta:
-        model = QuizQuestionOption
-
-    question = factory.SubFactory(QuizQuestionFactory, with_default_options=False)
-    sort_order = factory.Sequence(lambda n: n + 1)
-    content = factory.Sequence(lambda n: f'试卷选项 {n}')
-    is_correct = False
 
 
 class QuizRevisionFactory(DjangoModelFactory):
@@ -184,20 +152,33 @@ class QuizRevisionFactory(DjangoModelFactory):
     created_by = factory.LazyAttribute(lambda obj: obj.source_quiz.created_by)
 
 
+class QuestionSnapshotFactory(DjangoModelFactory):
+    class Meta:
+        model = QuestionSnapshot
+
+    content_hash = factory.Sequence(lambda n: _hash_value(f'question-snapshot:{n}'))
+    content = factory.Sequence(lambda n: f'快照题目 {n}')
+    reference_answer = ''
+    explanation = ''
+    space_tag_name = ''
+    tags_json = []
+
+
 class QuizRevisionQuestionFactory(DjangoModelFactory):
     class Meta:
         model = QuizRevisionQuestion
 
     quiz = factory.SubFactory(QuizRevisionFactory)
     question = factory.SubFactory(QuestionFactory)
-    content = factory.LazyAttribute(lambda obj: obj.question.content)
+    snapshot = factory.SubFactory(
+        QuestionSnapshotFactory,
+        content=factory.SelfAttribute('..question.content'),
+        reference_answer=factory.SelfAttribute('..question.reference_answer'),
+        explanation=factory.SelfAttribute('..question.explanation'),
+    )
     question_type = factory.LazyAttribute(lambda obj: obj.question.question_type)
-    reference_answer = factory.LazyAttribute(lambda obj: obj.question.reference_answer)
-    explanation = factory.LazyAttribute(lambda obj: obj.question.explanation)
     score = factory.LazyAttribute(lambda obj: obj.question.score)
     order = factory.Sequence(lambda n: n + 1)
-    space_tag_name = ''
-    tags_json = []
 
     @factory.post_generation
     def with_default_options(self, create, extracted, **kwargs):
@@ -205,11 +186,11 @@ class QuizRevisionQuestionFactory(DjangoModelFactory):
             return
         if extracted is False or self.question_type == 'SHORT_ANSWER':
             return
-        if self.question_options.exists():
+        if self.snapshot.question_options.exists():
             return
         for option in self.question.question_options.order_by('sort_order', 'id'):
             QuizRevisionQuestionOptionFactory(
-                question=self,
+                snapshot=self.snapshot,
                 sort_order=option.sort_order,
                 content=option.content,
                 is_correct=option.is_correct,
@@ -220,7 +201,7 @@ class QuizRevisionQuestionOptionFactory(DjangoModelFactory):
     class Meta:
         model = QuizRevisionQuestionOption
 
-    question = factory.SubFactory(QuizRevisionQuestionFactory, with_default_options=False)
+    snapshot = factory.SubFactory(QuestionSnapshotFactory)
     sort_order = factory.Sequence(lambda n: n + 1)
     content = factory.Sequence(lambda n: f'快照选项 {n}')
     is_correct = False
@@ -6,6 +6,7 @@ def delete_user_related_business_data(user_id: int) -> None:
     from apps.knowledge.models import Knowledge, KnowledgeRevision
     from apps.questions.models import Question
     from apps.quizzes.models import Quiz, QuizRevision
+    from apps.quizzes.stats import question_ids_for_quizzes, refresh_question_usage_counts, refresh_quiz_stats
     from apps.spot_checks.models import SpotCheck
     from apps.submissions.models import Submission
     from apps.tasks.models import Task, TaskAssignment, TaskKnowledge, TaskQuiz
@@ -21,13 +22,19 @@ def delete_user_related_business_data(user_id: int) -> None:
     Submission.objects.filter(user_id=user_id).delete()
 
     Submission.objects.filter(quiz__created_by_id=user_id).delete()
+    unbound_quiz_ids = list(
+        TaskQuiz.objects.filter(quiz__created_by_id=user_id).values_list('source_quiz_id', flat=True)
+    )
     TaskQuiz.objects.filter(quiz__created_by_id=user_id).delete()
     TaskKnowledge.objects.filter(knowledge__created_by_id=user_id).delete()
 
     if created_task_ids:
         TaskService.hard_delete_tasks(created_task_ids)
     if created_quiz_ids:
+        quiz_question_ids = question_ids_for_quizzes(created_quiz_ids)
         Quiz.objects.filter(id__in=created_quiz_ids).delete()
+        refresh_question_usage_counts(quiz_question_ids)
+    refresh_quiz_stats(unbound_quiz_ids)
     if created_knowledge_ids:
         Knowledge.objects.filter(id__in=created_knowledge_ids).delete()
     if created_question_ids:
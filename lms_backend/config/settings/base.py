@@ -263,6 +263,84 @@ CACHES = {
     }
 }
 
+# 试卷快照答案键进程内 LRU（快照不可变，按 revision id 缓存，见 apps/quizzes/answer_keys.py）
+QUIZ_ANSWER_KEY_CACHE = {
+    'MAX_ENTRIES': int(os.getenv('QUIZ_ANSWER_KEY_CACHE_MAX_ENTRIES', '512')),
+    'MAX_BYTES': int(os.getenv('QUIZ_ANSWER_KEY_CACHE_MAX_BYTES', str(64 * 1024 * 1024))),
+}
+
+# 考试作答草稿写缓冲（见 apps/submissions/drafts.py）：
+# 开启后保存答案只写缓存，由 flush_answer_drafts 定时落库，交卷/恢复答卷时同步落库。
+# CACHE_ALIAS 必须指向多进程共享且可持久化的缓存（如 Redis），LocMemCache 下自动退回同步写库。
+SUBMISSION_DRAFT_BUFFER = {
+    'ENABLED': os.getenv('SUBMISSION_DRAFT_BUFFER_ENABLED', 'false').lower() == 'true',
+    'CACHE_ALIAS': os.getenv('SUBMISSION_DRAFT_BUFFER_CACHE_ALIAS', 'default'),
+    'ALLOW_LOCAL_CACHE': os.getenv('SUBMISSION_DRAFT_BUFFER_ALLOW_LOCAL_CACHE', 'false').lower() == 'true',
+    'KEY_PREFIX': 'submission_draft',
+    'FLUSH_INTERVAL_SECONDS': int(os.getenv('SUBMISSION_DRAFT_BUFFER_FLUSH_INTERVAL_SECONDS', '30')),
+    'FLUSH_BATCH_SIZE': int(os.getenv('SUBMISSION_DRAFT_BUFFER_FLUSH_BATCH_SIZE', '200')),
+    # 需大于最长考试时长 + 落库周期，避免未落库草稿先过期
+    'TTL_SECONDS': int(os.getenv('SUBMISSION_DRAFT_BUFFER_TTL_SECONDS', str(24 * 3600))),
+}
+
+# 已定稿答卷详情渲染缓存（见 apps/submissions/render_cache.py）：
+# 改判时需跨进程失效，CACHE_ALIAS 须为共享缓存，LocMemCache 下不启用。
+SUBMISSION_RENDER_CACHE = {
+    'ENABLED': os.getenv('SUBMISSION_RENDER_CACHE_ENABLED', 'true').lower() == 'true',
+    'CACHE_ALIAS': os.getenv('SUBMISSION_RENDER_CACHE_ALIAS', 'default'),
+    'ALLOW_LOCAL_CACHE': os.getenv('SUBMISSION_RENDER_CACHE_ALLOW_LOCAL_CACHE', 'false').lower() == 'true',
+    'KEY_PREFIX': 'submission_detail',
+    # 详情序列化结构变化时调大，旧缓存整体失效
+    'VERSION': 1,
+    'TTL_SECONDS': int(os.getenv('SUBMISSION_RENDER_CACHE_TTL_SECONDS', str(7 * 24 * 3600))),
+}
+
+# 超时考试答卷自动交卷（见 apps/submissions/expiry.py，由 auto_submit_expired 定时执行）
+SUBMISSION_EXPIRY_SWEEP = {
+    # 到期后的宽限，让客户端交卷先到
+    'GRACE_SECONDS': int(os.getenv('SUBMISSION_EXPIRY_GRACE_SECONDS', '120')),
+    'INTERVAL_SECONDS': int(os.getenv('SUBMISSION_EXPIRY_INTERVAL_SECONDS', '60')),
+    'BATCH_SIZE': int(os.getenv('SUBMISSION_EXPIRY_BATCH_SIZE', '100')),
+    'BATCH_PAUSE_SECONDS': float(os.getenv('SUBMISSION_EXPIRY_BATCH_PAUSE_SECONDS', '0.5')),
+}
+
+# 知识文档异步解析（见 apps/knowledge/parse_jobs.py）
+KNOWLEDGE_DOCUMENT_PARSE = {
+    # 每个应用进程内的解析子进程数；0 为请求内同步解析
+    'MAX_WORKERS': int(os.getenv('KNOWLEDGE_PARSE_MAX_WORKERS', '2')),
+    # 每个应用进程排队加执行中的任务上限，超出拒绝新任务
+    'MAX_PENDING': int(os.getenv('KNOWLEDGE_PARSE_MAX_PENDING', '8')),
+    'TIMEOUT_SECONDS': int(os.getenv('KNOWLEDGE_PARSE_TIMEOUT_SECONDS', '60')),
+    # 子进程在 fork 时基础上可新增的地址空间；0 为不限制
+    'MEMORY_LIMIT_MB': int(os.getenv('KNOWLEDGE_PARSE_MEMORY_LIMIT_MB', '1024')),
+    # 上传时 preview_pages 的上限，预览在请求内解析
+    'PREVIEW_MAX_PAGES': int(os.getenv('KNOWLEDGE_PARSE_PREVIEW_MAX_PAGES', '5')),
+    'CACHE_ALIAS': os.getenv('KNOWLEDGE_PARSE_CACHE_ALIAS', 'default'),
+    'ALLOW_LOCAL_CACHE': os.getenv('KNOWLEDGE_PARSE_ALLOW_LOCAL_CACHE', 'false').lower() == 'true',
+    'KEY_PREFIX': 'knowledge_parse',
+    # 解析输出变化时调大，旧结果整体失效
+    'VERSION': 1,
+    'TTL_SECONDS': int(os.getenv('KNOWLEDGE_PARSE_TTL_SECONDS', str(24 * 3600))),
+}
+
+# 知识阅读次数合并写入（见 apps/knowledge/view_counts.py）：阅读先在进程内计数，
+# 由后台线程按间隔批量落库；FLUSH_INTERVAL_SECONDS 为 0 时每次阅读直接写库。
+KNOWLEDGE_VIEW_COUNT_BUFFER = {
+    'ENABLED': os.getenv('KNOWLEDGE_VIEW_COUNT_BUFFER_ENABLED', 'true').lower() == 'true',
+    'FLUSH_INTERVAL_SECONDS': int(os.getenv('KNOWLEDGE_VIEW_COUNT_FLUSH_INTERVAL_SECONDS', '10')),
+    # 单个进程未落库的阅读次数上限，达到后在当前请求内立即落库
+    'MAX_PENDING': int(os.getenv('KNOWLEDGE_VIEW_COUNT_MAX_PENDING', '1000')),
+    'FLUSH_BATCH_SIZE': int(os.getenv('KNOWLEDGE_VIEW_COUNT_FLUSH_BATCH_SIZE', '500')),
+}
+
+# 知识快照正文压缩存储（见 apps/knowledge/fields.py）；关闭后新写入为明文，已压缩的行照常读取
+KNOWLEDGE_CONTENT_COMPRESSION = {
+    'ENABLED': os.getenv('KNOWLEDGE_CONTENT_COMPRESSION_ENABLED', 'true').lower() == 'true',
+    # 正文短于该字节数时不压缩
+    'MIN_BYTES': int(os.getenv('KNOWLEDGE_CONTENT_COMPRESSION_MIN_BYTES', '1024')),
+    'LEVEL': int(os.getenv('KNOWLEDGE_CONTENT_COMPRESSION_LEVEL', '6')),
+}
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = False
 CORS_ALLOWED_ORIGINS = []
@@ -0,0 +1,36 @@
+"""搜索倒排索引共用的文本切分。
+
+题库与知识中心的倒排索引都按字符切分：中文按字、英文数字按字母，标点空白处断开。
+查询串与被索引文本必须走同一套折叠规则，否则索引会漏召回。
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+
+_SEPARATOR = re.compile(r'[\W_]+')
+
+
+def normalize_search_text(text: str) -> str:
+    """全半角、大小写、重音统一折叠，与 MySQL utf8mb4 默认排序规则的等价判断保持一致。"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if unicodedata.category(char) != 'Mn')
+    return unicodedata.normalize('NFKC', stripped).lower()
+
+
+def _runs(text: str) -> list[str]:
+    return [run for run in _SEPARATOR.split(normalize_search_text(text)) if run]
+
+
+def search_terms(text: str) -> set[str]:
+    """切出字符二元组；中文、英文、数字连续段内取相邻两字符，标点空白处断开。"""
+    terms = set()
+    for run in _runs(text):
+        terms.update(run[index:index + 2] for index in range(len(run) - 1))
+    return terms
+
+
+def search_chars(text: str) -> set[str]:
+    """切出单字（标点空白除外）。"""
+    return {char for run in _runs(text) for char in run}
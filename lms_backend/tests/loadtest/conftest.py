@@ -0,0 +1,16 @@
+import os
+
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'loadtest: 考试链路压测场景，设置 LMS_LOADTEST=1 时运行')
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.getenv('LMS_LOADTEST') == '1':
+        return
+    skip = pytest.mark.skip(reason='压测场景默认跳过，设置 LMS_LOADTEST=1 运行')
+    for item in items:
+        if 'loadtest' in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,57 @@
+"""考试链路并发压测场景。
+
+默认跳过；`LMS_LOADTEST=1 pytest tests/loadtest -s` 运行并打印报告。
+需要支持并发写入的数据库（MySQL），SQLite 下会出现库锁。
+"""
+
+import pytest
+
+from apps.submissions.loadtest import LoadTestConfig, cleanup_exam_cohort, run_exam_load, seed_exam_cohort
+from apps.submissions.models import Submission
+
+pytestmark = [pytest.mark.loadtest, pytest.mark.django_db(transaction=True)]
+
+
+def run_scenario(config):
+    cohort = seed_exam_cohort(config)
+    try:
+        report = run_exam_load(cohort, config)
+        statuses = list(
+            Submission.objects.filter(task_assignment__task=cohort.task).values_list('status', flat=True)
+        )
+    finally:
+        cleanup_exam_cohort(cohort)
+    print(f'\n{report.format_table()}')
+    return report, statuses
+
+
+def test_exam_session_with_subjective_grading():
+    config = LoadTestConfig(students=20, questions=20, subjective_every=5, workers=4, seed=1)
+    report, statuses = run_scenario(config)
+
+    assert report.errors == []
+    assert report.get('start').count == config.students
+    assert report.get('save_answer').count == config.students * config.questions
+    assert report.get('submit').count == config.students
+    assert report.get('grade').count == config.students * (config.questions // config.subjective_every)
+    assert statuses == [Submission.STATUS_GRADED] * config.students
+    for stats in report.operations:
+        assert stats.p50_ms <= stats.p95_ms <= stats.p99_ms
+
+
+def test_exam_session_objective_only_with_answer_changes():
+    config = LoadTestConfig(
+        students=20,
+        questions=10,
+        saves_per_student=30,
+        subjective_every=0,
+        workers=8,
+        grade=False,
+        seed=2,
+    )
+    report, statuses = run_scenario(config)
+
+    assert report.errors == []
+    assert report.get('save_answer').count == config.students * config.saves_per_student
+    assert report.get('grade') is None
+    assert statuses == [Submission.STATUS_SUBMITTED] * config.students
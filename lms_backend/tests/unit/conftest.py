@@ -0,0 +1,39 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from apps.quizzes.models import QuestionSnapshot, QuizRevision, QuizRevisionQuestion
+from apps.submissions.models import Submission
+from apps.tasks.models import Task, TaskAssignment, TaskQuiz
+from apps.users.models import Department, User
+
+
+@pytest.fixture
+def exam_submission():
+    """构造一份考试答卷：questions 个简答题，每题 5 分。"""
+
+    def build(*, questions=1, status=Submission.STATUS_IN_PROGRESS):
+        department = Department.objects.create(name='答卷测试部门', code='SUBMISSION_DEPT')
+        user = User.objects.create(username='submission_user', employee_id='SUB001', department=department)
+        revision = QuizRevision.objects.create(title='考试', quiz_type='EXAM', structure_hash='exam', created_by=user)
+        for index in range(questions):
+            QuizRevisionQuestion.objects.create(
+                quiz=revision,
+                snapshot=QuestionSnapshot.objects.create(content_hash=f'exam-q{index}', content=f'简答题{index}'),
+                question_type='SHORT_ANSWER',
+                score=Decimal('5'),
+                order=index + 1,
+            )
+        task = Task.objects.create(title='任务', deadline=timezone.now() + timedelta(days=1), created_by=user)
+        return Submission.objects.create(
+            task_assignment=TaskAssignment.objects.create(task=task, assignee=user),
+            task_quiz=TaskQuiz.objects.create(task=task, quiz=revision, order=1),
+            quiz=revision,
+            user=user,
+            status=status,
+            total_score=Decimal('5') * questions,
+        )
+
+    return build
@@ -0,0 +1,84 @@
+"""试卷快照答案键与 check_answer 一致性测试。"""
+
+from decimal import Decimal
+
+import pytest
+
+from apps.quizzes import answer_keys
+from apps.quizzes.answer_keys import AnswerKeyCache, compile_answer_key
+from apps.quizzes.models import QuestionSnapshot, QuizRevisionQuestion, QuizRevisionQuestionOption
+
+
+def build_question(question_type, correct_flags, *, score='2.50'):
+    snapshot = QuestionSnapshot(id=1)
+    snapshot._prefetched_objects_cache = {
+        'question_options': [
+            QuizRevisionQuestionOption(
+                id=10 + index,
+                sort_order=index + 1,
+                content=f'选项{index}',
+                is_correct=is_correct,
+            )
+            for index, is_correct in enumerate(correct_flags)
+        ],
+    }
+    return QuizRevisionQuestion(id=1, snapshot=snapshot, question_type=question_type, score=Decimal(score))
+
+
+@pytest.mark.parametrize(
+    ('question_type', 'correct_flags', 'selected_ids'),
+    [
+        ('SINGLE_CHOICE', [False, True, False], []),
+        ('SINGLE_CHOICE', [False, True, False], [11]),
+        ('SINGLE_CHOICE', [False, True, False], [12]),
+        ('SINGLE_CHOICE', [False, False], [10]),
+        ('TRUE_FALSE', [True, False], [10]),
+        ('TRUE_FALSE', [True, False], [11]),
+        ('MULTIPLE_CHOICE', [True, False, True], [12, 10]),
+        ('MULTIPLE_CHOICE', [True, False, True], [10]),
+        ('MULTIPLE_CHOICE', [True, False, True], []),
+        ('MULTIPLE_CHOICE', [False, False], []),
+    ],
+)
+def test_answer_key_matches_check_answer(question_type, correct_flags, selected_ids):
+    question = build_question(question_type, correct_flags)
+    answer_key = compile_answer_key(question)
+
+    user_answer = answer_key.resolve_user_answer(selected_ids)
+    option_id_key_map = question.get_option_id_key_map()
+    expected_keys = [option_id_key_map[option_id] for option_id in sorted(selected_ids)]
+    if not expected_keys:
+        assert user_answer is None
+    elif question_type == 'MULTIPLE_CHOICE':
+        assert user_answer == expected_keys
+    else:
+        assert user_answer == expected_keys[0]
+
+    assert answer_key.answer == question.answer
+    assert answer_key.check(user_answer) == question.check_answer(user_answer, full_score=question.score)
+
+
+def test_answer_key_cache_counts_hits_and_evicts_least_recently_used(monkeypatch):
+    loads = []
+
+    def fake_load(revision_id):
+        loads.append(revision_id)
+        return {revision_id: compile_answer_key(build_question('SINGLE_CHOICE', [True, False]))}
+
+    monkeypatch.setattr(answer_keys, 'load_revision_answer_keys', fake_load)
+    cache = AnswerKeyCache(max_entries=2, max_bytes=10 * 1024 * 1024)
+
+    cache.get(1)
+    cache.get(2)
+    cache.get(1)
+    cache.get(3)
+    cache.get(2)
+
+    assert loads == [1, 2, 3, 2]
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['hits'] == 1
+    assert stats['misses'] == 4
+    assert stats['evictions'] == 2
+    assert stats['hit_rate'] == 0.2
+    assert stats['bytes'] > 0
@@ -0,0 +1,27 @@
+"""知识正文压缩存储测试。"""
+
+from django.test import override_settings
+
+from apps.knowledge.fields import COMPRESSED_PREFIX, compress_text, decompress_text
+
+COMPRESSION = {'ENABLED': True, 'MIN_BYTES': 64, 'LEVEL': 6}
+
+
+@override_settings(KNOWLEDGE_CONTENT_COMPRESSION=COMPRESSION)
+def test_compress_text_round_trip():
+    body = '<strong>步骤</strong>' + '执行一次检查<br>' * 50
+    stored = compress_text(body)
+    assert stored.startswith(COMPRESSED_PREFIX)
+    assert len(stored) < len(body.encode('utf-8'))
+    assert decompress_text(stored) == body
+
+    assert compress_text('short') == 'short'
+    assert decompress_text('short') == 'short'
+
+
+@override_settings(KNOWLEDGE_CONTENT_COMPRESSION={**COMPRESSION, 'ENABLED': False})
+def test_compress_text_escapes_prefixed_plain_text():
+    body = '执行一次检查<br>' * 50
+    assert compress_text(body) == body
+    tricky = f'{COMPRESSED_PREFIX}abc'
+    assert decompress_text(compress_text(tricky)) == tricky
@@ -0,0 +1,21 @@
+"""知识列表预览截断测试。"""
+
+from apps.knowledge.models import PREVIEW_TRUNCATION_MARKER, build_content_preview
+
+
+def test_short_content_keeps_sanitized_html_without_marker():
+    assert build_content_preview('<p>第一步</p><p>第二步</p>') == '第一步<br>第二步'
+
+
+def test_long_content_is_stripped_before_truncation_and_marked():
+    content = '<div class="step"><span style="color: red">步骤</span></div>' * 100
+    preview = build_content_preview(content)
+    assert preview.endswith(PREVIEW_TRUNCATION_MARKER)
+    # 先洗掉标签再截断：500 字符里是正文而不是样式属性
+    assert preview.startswith('步骤<br>步骤<br>')
+
+
+
+def test_truncation_inside_tag_drops_partial_tag():
+    preview = build_content_preview('一二三<strong>四五</strong>', max_chars=5)
+    assert preview == '一二三' + PREVIEW_TRUNCATION_MARKER
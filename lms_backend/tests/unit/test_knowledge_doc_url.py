@@ -1,6 +1,6 @@
 """文档链接 ID 提取测试。"""
 
-from apps.knowledge.doc_url import extract_doc_id
+from apps.knowledge.doc_url import DOC_ID_MAX_LENGTH, doc_id_key, extract_doc_id
 
 
 def test_extract_doc_id():
@@ -8,3 +8,9 @@ def test_extract_doc_id():
     assert extract_doc_id('https://xx.feishu.cn/wiki/v?id=abc') == 'abc'
     assert extract_doc_id('') is None
     assert extract_doc_id('https://xx.feishu.cn/wiki/v') is None
+
+
+def test_doc_id_key():
+    assert doc_id_key('abc') == 'abc'
+    assert doc_id_key(None) == ''
+    assert doc_id_key('x' * (DOC_ID_MAX_LENGTH + 10)) == 'x' * DOC_ID_MAX_LENGTH
@@ -0,0 +1,28 @@
+"""文档解析 HTML 逐块写出测试。"""
+
+from apps.knowledge.document import _HtmlBlockWriter
+
+
+def _write(blocks):
+    writer = _HtmlBlockWriter()
+    writer.write_all(blocks)
+    return writer.getvalue()
+
+
+def test_adjacent_lists_of_same_type_are_merged_while_writing():
+    html = _write([
+        '<ul><li>a</li></ul>',
+        '<ul><li>b</li></ul>',
+        '<ol><li>1</li></ol>',
+        '<ol><li>2</li><li>3</li></ol>',
+    ])
+    assert html == '<ul><li>a</li><li>b</li></ul>\n<ol><li>1</li><li>2</li><li>3</li></ol>'
+
+
+def test_other_blocks_break_lists_and_are_newline_separated():
+    html = _write(['<h2>第 1 页</h2>', '<ol><li>a</li></ol>', '<p><br></p>', '<ol><li>b</li></ol>'])
+    assert html == '<h2>第 1 页</h2>\n<ol><li>a</li></ol>\n<p><br></p>\n<ol><li>b</li></ol>'
+
+
+def test_empty_writer_returns_empty_string():
+    assert _write([]) == ''
@@ -0,0 +1,200 @@
+"""知识表格导入测试：openpyxl 现场生成小表格。"""
+
+import io
+import zipfile
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from openpyxl import Workbook
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.knowledge.import_sync import match_doc_row
+from apps.knowledge.importer import HEADER_HINT, UNREADABLE_FILE_MESSAGE, import_knowledge, iter_knowledge_rows
+from apps.knowledge.models import Knowledge
+from apps.knowledge.views import KnowledgeFileImportView
+from apps.tags.models import Tag
+from apps.users.models import Department, User
+from core.exceptions import BusinessError, ErrorCodes
+
+HEADERS = ['标题', '文档链接', 'space', '标签', '简洁执行步骤', '相关链接']
+DOC_URL = 'https://docs.example.com/doc?id={}'
+
+
+def build_xlsx(rows, headers=HEADERS, name='知识导入.xlsx'):
+    workbook = Workbook()
+    sheet = workbook.active
+    if headers is not None:
+        sheet.append(headers)
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def read_rows(upload):
+    return list(iter_knowledge_rows(upload, upload.name))
+
+
+def doc_row(doc_id, title, *, space='运维', tags='', content='第一步'):
+    return [title, DOC_URL.format(doc_id), space, tags, content, '']
+
+
+@pytest.fixture
+def actor(db):
+    department = Department.objects.create(name='导入测试部门', code='IMPORT_DEPT')
+    return User.objects.create(username='import_user', employee_id='IMP001', department=department, is_superuser=True)
+
+
+@pytest.fixture
+def tags(db):
+    return {
+        'space': Tag.objects.create(name='运维', tag_type='SPACE'),
+        'tag': Tag.objects.create(name='变更', tag_type='TAG', allow_knowledge=True),
+    }
+
+
+class TestReadRows:
+    def test_rows_are_mapped_by_header_and_blank_rows_skipped(self):
+        upload = build_xlsx([doc_row('a1', '文档一'), [None] * 6, ['文档二', DOC_URL.format('a2'), '', '', 12.0, '']])
+
+        assert read_rows(upload) == [
+            (2, {'title': '文档一', 'url': DOC_URL.format('a1'), 'space': '运维', 'tags': '', 'content': '第一步', 'related_links': ''}),
+            (4, {'title': '文档二', 'url': DOC_URL.format('a2'), 'space': '', 'tags': '', 'content': '12', 'related_links': ''}),
+        ]
+
+    @pytest.mark.parametrize(
+        ('headers', 'message'),
+        [
+            (['标题', '链接'], f'未知表头「链接」。{HEADER_HINT}'),
+            ([None, ''], HEADER_HINT),
+        ],
+    )
+    def test_header_errors(self, headers, message):
+        with pytest.raises(BusinessError) as exc_info:
+            read_rows(build_xlsx([['x', 'y']], headers=headers))
+        assert exc_info.value.code == ErrorCodes.VALIDATION_ERROR
+        assert exc_info.value.message == message
+
+    def test_empty_sheet(self):
+        with pytest.raises(BusinessError, match='表格为空'):
+            read_rows(build_xlsx([], headers=None))
+
+    def test_unsupported_extension(self):
+        with pytest.raises(BusinessError, match='仅支持 .xlsx'):
+            read_rows(SimpleUploadedFile('知识.csv', b'a,b'))
+
+    def test_corrupt_files_are_validation_errors(self):
+        broken_sheet = io.BytesIO()
+        with zipfile.ZipFile(io.BytesIO(build_xlsx([doc_row('a1', '文档')]).read())) as source, \
+                zipfile.ZipFile(broken_sheet, 'w') as target:
+            for item in source.infolist():
+                data = source.read(item)
+                target.writestr(item, b'<worksheet><sheetData><row>' if item.filename.endswith('sheet1.xml') else data)
+
+        for upload in (
+            SimpleUploadedFile('损坏.xlsx', b'not a zip file'),
+            SimpleUploadedFile('损坏.xlsx', broken_sheet.getvalue()),
+        ):
+            with pytest.raises(BusinessError) as exc_info:
+                read_rows(upload)
+            assert exc_info.value.code == ErrorCodes.VALIDATION_ERROR
+            assert exc_info.value.message == UNREADABLE_FILE_MESSAGE
+
+
+def test_match_doc_row():
+    seen = {}
+    index = {'k1': [(7, '已有')], 'k2': [(8, '甲'), (9, '')]}
+
+    def match(row_number, url, *, require_match=False, title='文档'):
+        return match_doc_row(
+            row_number=row_number, title=title, url=url, doc_index=index, seen=seen, require_match=require_match,
+        )
+
+    assert match(2, DOC_URL.format('k1')) == (7, 'k1', None)
+    assert match(3, DOC_URL.format('new')) == (None, 'new', None)
+    assert match(4, 'https://docs.example.com/doc') == (None, None, None)
+    assert match(5, 'https://docs.example.com/doc', require_match=True)[2] == {
+        'row_number': 5, 'reason': '《文档》文档链接缺少 id 参数',
+    }
+    assert match(6, DOC_URL.format('k1'), title='副本')[2] == {
+        'row_number': 6, 'reason': '表格内《副本》文档id「k1」与第 2 行《文档》文档id「k1」重复',
+    }
+    assert match(7, DOC_URL.format('k2'))[2]['reason'] == '《文档》文档id「k2」在库中对应多条知识：《甲》、#9'
+    assert match(8, DOC_URL.format('gone'), require_match=True)[2]['reason'] == '未找到《文档》文档id「gone」'
+
+
+@pytest.mark.django_db
+class TestImportKnowledge:
+    def test_unknown_space_or_tag_fails_only_that_row(self, actor, tags):
+        report = import_knowledge(
+            read_rows(build_xlsx([
+                doc_row('a1', '文档一', tags='变更'),
+                doc_row('a2', '文档二', space='不存在的空间'),
+                doc_row('a3', '文档三', tags='变更，不存在的标签'),
+            ])),
+            actor=actor,
+        )
+
+        assert report['created'] == 1
+        assert report['failures'] == [
+            {'row_number': 3, 'reason': 'space「不存在的空间」不存在'},
+            {'row_number': 4, 'reason': '标签「不存在的标签」不存在'},
+        ]
+        knowledge = Knowledge.objects.get()
+        assert (knowledge.title, knowledge.space_tag_id) == ('文档一', tags['space'].id)
+        assert list(knowledge.tags.values_list('id', flat=True)) == [tags['tag'].id]
+
+    def test_duplicate_doc_id_across_chunks(self, actor, tags):
+        report = import_knowledge(
+            read_rows(build_xlsx([
+                doc_row('a1', '文档一'),
+                doc_row('a2', '文档二'),
+                doc_row('a3', '文档三'),
+                doc_row('a1', '文档一副本'),
+            ])),
+            actor=actor,
+            chunk_size=2,
+        )
+
+        assert (report['total'], report['created'], report['failed']) == (4, 3, 1)
+        assert report['failures'][0]['row_number'] == 5
+        assert '与第 2 行' in report['failures'][0]['reason']
+        assert Knowledge.objects.count() == 3
+
+    def test_created_updated_unchanged_counts(self, actor, tags):
+        rows = [doc_row('a1', '文档一'), doc_row('a2', '文档二'), doc_row('a3', '文档三')]
+        first = import_knowledge(read_rows(build_xlsx(rows)), actor=actor, chunk_size=2)
+        rows[1] = doc_row('a2', '文档二', content='改过的步骤')
+        rows.append(doc_row('a4', '文档四'))
+        second = import_knowledge(read_rows(build_xlsx(rows)), actor=actor, chunk_size=2)
+
+        assert {key: first[key] for key in ('total', 'created', 'updated', 'unchanged', 'failed')} == {
+            'total': 3, 'created': 3, 'updated': 0, 'unchanged': 0, 'failed': 0,
+        }
+        assert {key: second[key] for key in ('total', 'created', 'updated', 'unchanged', 'failed')} == {
+            'total': 4, 'created': 1, 'updated': 1, 'unchanged': 2, 'failed': 0,
+        }
+        assert Knowledge.objects.get(external_doc_id='a2').content == '改过的步骤'
+
+
+@pytest.mark.django_db
+class TestFileImportView:
+    def _post(self, actor, upload):
+        request = APIRequestFactory().post('/api/knowledge/import-file/', {'file': upload}, format='multipart')
+        force_authenticate(request, user=actor)
+        return KnowledgeFileImportView.as_view()(request)
+
+    def test_import_file_returns_report(self, actor, tags):
+        response = self._post(actor, build_xlsx([doc_row('a1', '文档一'), doc_row('a2', '文档二', tags='未知')]))
+
+        assert response.status_code == 200
+        assert response.data['data']['created'] == 1
+        assert response.data['data']['failures'] == [{'row_number': 3, 'reason': '标签「未知」不存在'}]
+
+    def test_corrupt_file_is_bad_request(self, actor):
+        response = self._post(actor, SimpleUploadedFile('损坏.xlsx', b'not a zip file'))
+
+        assert response.status_code == 400
+        assert response.data['message'] == UNREADABLE_FILE_MESSAGE
+        assert not Knowledge.objects.exists()
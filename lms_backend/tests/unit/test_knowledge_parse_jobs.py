@@ -0,0 +1,75 @@
+"""文档解析任务测试：不启动进程池，手动完成任务。"""
+
+import os
+from concurrent.futures import Future
+
+import pytest
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from apps.knowledge import parse_jobs
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    """替换进程池提交，记录 (job_id, path, future)。"""
+    jobs = []
+
+    def fake_submit(job_id, path, ext):
+        future = Future()
+        jobs.append((job_id, path, future))
+        return None, future
+
+    cache.clear()
+    monkeypatch.setattr(parse_jobs, '_submit', fake_submit)
+    monkeypatch.setattr(parse_jobs, '_pending_count', 0)
+    yield jobs
+    for _, path, _ in jobs:
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def _upload(name, data=b'%PDF-1.4 same content'):
+    return SimpleUploadedFile(name, data)
+
+
+def test_same_content_follows_running_job_with_own_filename(submitted):
+    first = parse_jobs.submit_parse_job(_upload('第一份.pdf'), '.pdf')
+    second = parse_jobs.submit_parse_job(_upload('第二份.pdf'), '.pdf')
+
+    assert len(submitted) == 1
+    assert first['job_id'] != second['job_id']
+    assert parse_jobs.get_parse_job(second['job_id'])['status'] == parse_jobs.PENDING
+
+    job_id, path, future = submitted[0]
+    future.set_result((parse_jobs.DONE, {'title': None, 'content': '<p>正文</p>'}))
+    parse_jobs._finish_job(job_id, f'{parse_jobs.file_digest(_upload("x.pdf"))}.pdf', path, None, future)
+
+    assert parse_jobs.get_parse_job(first['job_id'])['suggested_title'] == '第一份'
+    assert parse_jobs.get_parse_job(second['job_id'])['suggested_title'] == '第二份'
+    assert parse_jobs.submit_parse_job(_upload('第三份.pdf'), '.pdf')['suggested_title'] == '第三份'
+
+
+def test_follower_reports_failure_of_running_job(submitted):
+    parse_jobs.submit_parse_job(_upload('第一份.pdf'), '.pdf')
+    follower = parse_jobs.submit_parse_job(_upload('第二份.pdf'), '.pdf')
+
+    job_id, path, future = submitted[0]
+    future.set_result((parse_jobs.FAILED, '文档解析超时'))
+    parse_jobs._finish_job(job_id, f'{parse_jobs.file_digest(_upload("x.pdf"))}.pdf', path, None, future)
+
+    assert parse_jobs.get_parse_job(follower['job_id']) == {
+        'status': parse_jobs.FAILED,
+        'job_id': follower['job_id'],
+        'message': '文档解析超时',
+    }
+
+
+def test_docx_preview_is_not_parsed_in_request(submitted, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('DOCX 不应在请求内解析')
+
+    monkeypatch.setattr('apps.knowledge.document.DocumentParserService.parse_preview', fail)
+    payload = parse_jobs.submit_parse_job(_upload('说明.docx', b'PK docx'), '.docx', preview_pages=2)
+
+    assert payload == {'status': parse_jobs.PENDING, 'job_id': submitted[0][0]}
@@ -0,0 +1,81 @@
+"""知识中心倒排索引检索测试：经 get_knowledge_queryset(search=...) 走完整列表查询。"""
+
+import pytest
+
+from apps.knowledge.models import Knowledge
+from apps.knowledge.search import refresh_knowledge_search_terms
+from apps.knowledge.selectors import get_knowledge_queryset
+from apps.tags.models import Tag
+from apps.users.models import Department, User
+
+
+@pytest.fixture
+def knowledge():
+    user = User.objects.create(
+        username='knowledge_search_user',
+        employee_id='KSEARCH001',
+        department=Department.objects.create(name='知识搜索', code='KSEARCH_DEPT'),
+    )
+
+    def create(title, content='', *, space=None, tags=()):
+        item = Knowledge.objects.create(
+            title=title,
+            content=content,
+            space_tag=Tag.objects.create(name=space, tag_type='SPACE', allow_knowledge=True) if space else None,
+            created_by=user,
+        )
+        for name in tags:
+            item.tags.add(Tag.objects.create(name=name, tag_type='TAG', allow_knowledge=True))
+        return item
+
+    created = {
+        'restart': create('服务器重启流程', '<p>先通知再操作</p>'),
+        'scattered': create('服务端重新启动'),
+        'reversed': create('重要服务'),
+        'html': create('安全规范', '<p><strong class="mark">安全</strong></p>'),
+        'tagged': create('备份', space='运维', tags=['数据库']),
+        'punctuation': create('注意！！重要'),
+        'body': create('日常检查', '<p>巡检记录</p>'),
+        'title': create('巡检'),
+    }
+    refresh_knowledge_search_terms(item.id for item in created.values())
+    return created
+
+
+def search_ids(search):
+    return {item.id for item in get_knowledge_queryset(search=search)}
+
+
+@pytest.mark.django_db
+def test_multiple_terms_must_all_match(knowledge):
+    assert search_ids('服务器 流程') == {knowledge['restart'].id}
+    assert search_ids('运维，数据库') == {knowledge['tagged'].id}
+    assert search_ids('服务器 备份') == set()
+
+
+@pytest.mark.django_db
+def test_ordered_fuzzy_match_keeps_char_order(knowledge):
+    # 两条都按“服…重”的顺序包含；“重要服务”单字齐全但顺序相反，候选核对时排除
+    assert search_ids('服重') == {knowledge['restart'].id, knowledge['scattered'].id}
+
+
+@pytest.mark.django_db
+def test_html_markup_in_content_does_not_match(knowledge):
+    assert search_ids('strong') == set()
+    assert search_ids('mark') == set()
+    assert search_ids('安全') == {knowledge['html'].id}
+
+
+@pytest.mark.django_db
+def test_punctuation_only_term_falls_back_to_icontains(knowledge):
+    results = list(get_knowledge_queryset(search='！！'))
+
+    assert [item.id for item in results] == [knowledge['punctuation'].id]
+    assert results[0].search_rank == 0
+
+
+@pytest.mark.django_db
+def test_title_hit_ranks_above_content_hit(knowledge):
+    ranked = [item.id for item in get_knowledge_queryset(search='巡检')]
+
+    assert ranked == [knowledge['title'].id, knowledge['body'].id]
@@ -0,0 +1,18 @@
+"""知识搜索索引切分测试。"""
+
+from apps.knowledge.search import _weighted_terms, html_to_text
+from core.text_search import search_chars
+
+
+def test_html_to_text_drops_markup_and_unescapes_entities():
+    text = html_to_text('<p>安全<strong class="x">生产</strong></p><script>alert(1)</script>A&amp;B')
+    assert 'strong' not in text and 'alert' not in text
+    assert search_chars(text) == {'安', '全', '生', '产', 'a', 'b'}
+
+
+def test_weighted_terms_index_chars_and_bigrams_with_title_boost():
+    weights = _weighted_terms('消防', '<p>消防演练</p>', ['应急'])
+    assert weights['消防'] == 5 + 1
+    assert weights['演'] == weights['演练'] == 1
+    assert weights['应急'] == 3
+    assert 'p' not in weights
@@ -0,0 +1,127 @@
+"""知识阅读次数合并写入测试：不启动后台线程，直接调用 flush_view_counts。"""
+
+import os
+from collections import Counter
+
+import pytest
+
+from apps.dashboard.serializers import KnowledgeCardSerializer
+from apps.knowledge import view_counts
+from apps.knowledge.models import Knowledge
+from apps.knowledge.view_counts import flush_view_counts, pending_views, record_view
+from apps.users.models import Department, User
+
+
+class _IdleThread:
+    started = 0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def start(self):
+        _IdleThread.started += 1
+
+
+@pytest.fixture
+def buffer(settings, monkeypatch):
+    settings.KNOWLEDGE_VIEW_COUNT_BUFFER = {
+        'ENABLED': True,
+        'FLUSH_INTERVAL_SECONDS': 60,
+        'MAX_PENDING': 5,
+        'FLUSH_BATCH_SIZE': 2,
+    }
+    _IdleThread.started = 0
+    monkeypatch.setattr(view_counts.threading, 'Thread', _IdleThread)
+    monkeypatch.setattr(view_counts, '_pending', Counter())
+    monkeypatch.setattr(view_counts, '_pending_total', 0)
+    monkeypatch.setattr(view_counts, '_owner_pid', None)
+    monkeypatch.setattr(view_counts, '_flush_thread', None)
+
+
+@pytest.fixture
+def knowledge_ids(db):
+    user = User.objects.create(
+        username='view_count_user',
+        employee_id='VIEW001',
+        department=Department.objects.create(name='阅读测试部门', code='VIEW_DEPT'),
+    )
+    return [Knowledge.objects.create(title=f'知识{index}', created_by=user).id for index in range(3)]
+
+
+def _stored(knowledge_ids):
+    return dict(Knowledge.objects.filter(id__in=knowledge_ids).values_list('id', 'view_count'))
+
+
+@pytest.mark.django_db
+def test_views_are_buffered_then_flushed_in_batches(buffer, knowledge_ids):
+    first, second, third = knowledge_ids
+
+    assert [record_view(first), record_view(first), record_view(second), record_view(third)] == [1, 2, 1, 1]
+    assert _IdleThread.started == 1
+    assert pending_views(first) == 2
+    assert _stored(knowledge_ids) == {first: 0, second: 0, third: 0}
+    assert KnowledgeCardSerializer(Knowledge.objects.get(pk=first)).data['view_count'] == 2
+
+    assert flush_view_counts() == 4
+    assert _stored(knowledge_ids) == {first: 2, second: 1, third: 1}
+    assert pending_views(first) == 0
+    assert flush_view_counts() == 0
+
+
+@pytest.mark.django_db
+def test_reaching_max_pending_flushes_in_request(buffer, knowledge_ids):
+    first = knowledge_ids[0]
+
+    assert [record_view(first) for _ in range(4)] == [1, 2, 3, 4]
+    assert record_view(first) is None
+    assert _stored([first]) == {first: 5}
+    assert view_counts._pending_total == 0
+
+
+@pytest.mark.django_db
+def test_failed_flush_restores_pending(buffer, knowledge_ids, monkeypatch):
+    first, second, _ = knowledge_ids
+    record_view(first)
+    record_view(second)
+
+    apply_increments = view_counts._apply_increments
+
+    def fail(increments):
+        raise RuntimeError('db down')
+
+    monkeypatch.setattr(view_counts, '_apply_increments', fail)
+    with pytest.raises(RuntimeError):
+        flush_view_counts()
+    assert (pending_views(first), pending_views(second), view_counts._pending_total) == (1, 1, 2)
+
+    monkeypatch.setattr(view_counts, '_apply_increments', apply_increments)
+    assert flush_view_counts() == 2
+    assert _stored([first, second]) == {first: 1, second: 1}
+
+
+@pytest.mark.django_db
+def test_forked_process_drops_inherited_pending(buffer, knowledge_ids, monkeypatch):
+    first, second, _ = knowledge_ids
+    record_view(first)
+    record_view(first)
+
+    # 模拟 fork：继承来的缓冲属于父进程
+    monkeypatch.setattr(view_counts, '_owner_pid', os.getpid() + 1)
+    assert pending_views(first) == 0
+    assert flush_view_counts() == 0
+
+    assert record_view(second) == 1
+    assert _IdleThread.started == 2
+    assert (pending_views(first), pending_views(second)) == (0, 1)
+    assert flush_view_counts() == 1
+    assert _stored([first, second]) == {first: 0, second: 1}
+
+
+@pytest.mark.django_db
+def test_disabled_buffer_writes_directly(buffer, knowledge_ids, settings):
+    settings.KNOWLEDGE_VIEW_COUNT_BUFFER = {**settings.KNOWLEDGE_VIEW_COUNT_BUFFER, 'ENABLED': False}
+    first = knowledge_ids[0]
+
+    assert record_view(first) is None
+    assert _stored([first]) == {first: 1}
+    assert _IdleThread.started == 0
@@ -0,0 +1,27 @@
+import pytest
+
+from apps.submissions.loadtest import _OperationRecorder
+
+
+def _fail():
+    raise RuntimeError('boom')
+
+
+def test_record_failure_keeps_errors_raised_outside_measure():
+    recorder = _OperationRecorder()
+
+    recorder.record_failure('grade', RuntimeError('db down'))
+
+    assert [(sample.operation, sample.error) for sample in recorder.samples] == [
+        ('grade', 'grade: RuntimeError: db down'),
+    ]
+
+
+def test_record_failure_does_not_double_count_measured_error():
+    recorder = _OperationRecorder()
+
+    with pytest.raises(RuntimeError) as exc_info:
+        recorder.measure('grade', _fail)
+    recorder.record_failure('grade', exc_info.value)
+
+    assert [sample.error for sample in recorder.samples] == ['grade: RuntimeError: boom']
@@ -0,0 +1,33 @@
+"""题库导入行解析测试。"""
+
+import pytest
+
+from apps.questions.importer import build_question_row_payload
+from core.exceptions import BusinessError
+
+
+def test_build_question_row_payload_parses_options_and_answers():
+    single = build_question_row_payload({'question_type': '单选题', 'content': '题目', 'options': 'a\nb|c', 'answer': 'b'})
+    assert single['options'] == [
+        {'key': 'A', 'value': 'a'},
+        {'key': 'B', 'value': 'b'},
+        {'key': 'C', 'value': 'c'},
+    ]
+    assert single['answer'] == 'B'
+    assert 'score' not in single
+
+    multiple = build_question_row_payload({'question_type': '多选', 'content': '题目', 'options': 'a|b|c', 'answer': 'AC'})
+    assert multiple['answer'] == ['A', 'C']
+    assert build_question_row_payload(
+        {'question_type': 'MULTIPLE_CHOICE', 'content': '题目', 'options': 'a|b', 'answer': 'a，b'},
+    )['answer'] == ['A', 'B']
+
+    true_false = build_question_row_payload({'question_type': '判断题', 'content': '题目', 'answer': '错', 'score': '2'})
+    assert true_false['options'] == []
+    assert true_false['answer'] == 'FALSE'
+    assert true_false['score'] == '2'
+
+
+def test_build_question_row_payload_rejects_unknown_type():
+    with pytest.raises(BusinessError):
+        build_question_row_payload({'question_type': '填空', 'content': '题目'})
@@ -0,0 +1,107 @@
+"""题库倒排索引检索测试：结果须与原 icontains 搜索一致。"""
+
+from decimal import Decimal
+
+import pytest
+
+from apps.questions.models import Question, QuestionSearchTerm
+from apps.questions.search import apply_question_search, icontains_search_filter, refresh_question_search_terms
+from apps.tags.models import Tag
+from apps.users.models import Department, User
+from core.text_search import search_terms
+
+
+@pytest.fixture
+def questions():
+    user = User.objects.create(
+        username='search_user',
+        employee_id='SEARCH001',
+        department=Department.objects.create(name='题库搜索', code='SEARCH_DEPT'),
+    )
+
+    def create(content, *, reference_answer='', tag_names=()):
+        question = Question.objects.create(
+            content=content,
+            question_type='SHORT_ANSWER',
+            reference_answer=reference_answer,
+            score=Decimal('1'),
+            created_by=user,
+        )
+        for name in tag_names:
+            question.tags.add(Tag.objects.create(name=name, tag_type='TAG', allow_question=True))
+        return question
+
+    created = {
+        'content': create('服务器重启后检查日志'),
+        'reordered': create('重启服务器的步骤'),
+        'scattered': create('器重要，先备份服务器，再重启'),
+        'answer': create('Linux 运维', reference_answer='先执行服务器重启'),
+        'tag': create('无关题干', tag_names=['服务器重启专项']),
+        'other': create('数据库备份'),
+    }
+    refresh_question_search_terms(question.id for question in created.values())
+    return created
+
+
+def search_ids(search):
+    return set(apply_question_search(Question.objects.all(), search).values_list('id', flat=True))
+
+
+def icontains_ids(search):
+    return set(Question.objects.filter(icontains_search_filter(search)).values_list('id', flat=True))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('search', ['服务器重启', '重启', '服务器', 'LINUX', '备份', '日志', '服', 'x', '不存在'])
+def test_index_search_matches_icontains(questions, search):
+    assert search_ids(search) == icontains_ids(search)
+
+
+@pytest.mark.django_db
+def test_candidates_need_every_bigram_and_are_rechecked(questions):
+    terms = search_terms('服务器重启')
+    indexed = set(
+        QuestionSearchTerm.objects.filter(question=questions['scattered'], term__in=terms).values_list('term', flat=True)
+    )
+    # 散落各处的题目包含全部二元组，只能靠 icontains 核对排除；缺 '器重' 的题目在求交集时已排除
+    assert indexed == terms
+    assert not QuestionSearchTerm.objects.filter(question=questions['reordered'], term='器重').exists()
+
+    assert search_ids('服务器重启') == {
+        questions['content'].id,
+        questions['answer'].id,
+        questions['tag'].id,
+    }
+
+
+@pytest.mark.django_db
+def test_single_character_search_falls_back_to_icontains(questions):
+    results = apply_question_search(Question.objects.all(), '启')
+
+    assert {question.id for question in results} == icontains_ids('启')
+    assert {question.search_rank for question in results} == {0}
+
+
+@pytest.mark.django_db
+def test_rank_prefers_content_over_tag_over_reference_answer(questions):
+    ranked = list(
+        apply_question_search(Question.objects.all(), '服务器重启')
+        .order_by('-search_rank', 'id')
+        .values_list('id', flat=True)
+    )
+
+    assert ranked == [questions['content'].id, questions['tag'].id, questions['answer'].id]
+
+
+@pytest.mark.django_db
+def test_tag_and_reference_answer_hits(questions):
+    assert search_ids('专项') == {questions['tag'].id}
+    assert search_ids('先执行') == {questions['answer'].id}
+
+    tag = questions['tag'].tags.get()
+    tag.name = '网络专项'
+    tag.save(update_fields=['name'])
+    refresh_question_search_terms([questions['tag'].id])
+
+    assert search_ids('服务器重启专项') == set()
+    assert search_ids('网络专项') == {questions['tag'].id}
@@ -0,0 +1,16 @@
+"""题库搜索二元组切分测试。"""
+
+from core.text_search import search_terms
+
+
+def test_search_terms_split_cjk_and_latin_runs_into_bigrams():
+    assert search_terms('安全生产') == {'安全', '全生', '生产'}
+    assert search_terms('Python，SQL') == {'py', 'yt', 'th', 'ho', 'on', 'sq', 'ql'}
+    assert search_terms('第1题') == {'第1', '1题'}
+
+
+def test_search_terms_fold_width_case_and_accents():
+    assert search_terms('ＡＢ') == search_terms('ab') == {'ab'}
+    assert search_terms('café') == search_terms('CAFE')
+    assert search_terms('安') == set()
+    assert search_terms('a b') == set()
@@ -0,0 +1,67 @@
+"""题库近似重复题 SimHash 测试。"""
+
+import random
+from decimal import Decimal
+
+import pytest
+
+from apps.questions import similarity
+from apps.questions.models import Question
+from apps.questions.similarity import (
+    BAND_WIDTHS,
+    DEFAULT_MAX_DISTANCE,
+    _bands,
+    compute_simhash,
+    hamming_distance,
+    iter_duplicate_groups,
+    refresh_question_simhash,
+)
+from apps.users.models import Department, User
+
+CONTENT = '企业安全生产责任制应当明确各岗位的责任人员、责任范围和考核标准，以下说法正确的是'
+OPTIONS = ['主要负责人对本单位安全生产工作全面负责', '安全生产只是安全部门的职责', '考核标准可以不公开', '以上都不对']
+
+
+def test_simhash_ignores_option_order_width_and_punctuation():
+    value = compute_simhash(CONTENT, OPTIONS)
+    assert compute_simhash(CONTENT, list(reversed(OPTIONS))) == value
+    assert compute_simhash(CONTENT.replace('，', ','), OPTIONS) == value
+
+
+def test_near_duplicate_within_distance_shares_a_band():
+    value = compute_simhash(CONTENT, OPTIONS)
+    edited = compute_simhash(CONTENT.replace('考核', '审核'), OPTIONS)
+    unrelated = compute_simhash('灭火器压力表指针处于红色区域时表示什么', ['压力不足', '压力正常'])
+    assert hamming_distance(value, edited) <= DEFAULT_MAX_DISTANCE
+    assert hamming_distance(value, unrelated) > DEFAULT_MAX_DISTANCE
+    assert any(left == right for left, right in zip(_bands(value), _bands(edited)))
+    assert compute_simhash('', []) == 0
+
+
+def test_bands_cover_hash_and_guarantee_recall_within_max_distance():
+    assert sum(BAND_WIDTHS) == 64
+    rng = random.Random(41)
+    for _ in range(200):
+        value = rng.getrandbits(64)
+        flipped = value
+        for bit in rng.sample(range(64), DEFAULT_MAX_DISTANCE):
+            flipped ^= 1 << bit
+        assert any(left == right for left, right in zip(_bands(value), _bands(flipped)))
+
+
+@pytest.mark.django_db
+def test_duplicate_groups_skip_oversized_buckets(monkeypatch):
+    user = User.objects.create(
+        username='similarity_user',
+        employee_id='SIM001',
+        department=Department.objects.create(name='查重测试部门', code='SIM_DEPT'),
+    )
+    question_ids = [
+        Question.objects.create(content=content, question_type='SHORT_ANSWER', score=Decimal('1'), created_by=user).id
+        for content in (CONTENT, CONTENT.replace('考核', '审核'), '灭火器压力表指针处于红色区域时表示什么')
+    ]
+    refresh_question_simhash(question_ids)
+
+    assert list(iter_duplicate_groups()) == [question_ids[:2]]
+    monkeypatch.setattr(similarity, 'MAX_BUCKET_SIZE', 1)
+    assert list(iter_duplicate_groups()) == []
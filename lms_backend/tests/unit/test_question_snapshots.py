@@ -0,0 +1,17 @@
+import pytest
+
+from apps.quizzes.models import QuestionSnapshot, QuizRevisionQuestionOption
+from apps.quizzes.snapshots import purge_orphan_snapshots
+
+
+@pytest.mark.django_db
+def test_purge_orphan_snapshots_keeps_referenced(exam_submission):
+    submission = exam_submission()
+    referenced = submission.quiz.quiz_questions.get().snapshot_id
+    orphan = QuestionSnapshot.objects.create(content_hash='orphan', content='孤立快照')
+    QuizRevisionQuestionOption.objects.create(snapshot=orphan, sort_order=1, content='A', is_correct=True)
+
+    assert purge_orphan_snapshots([referenced, orphan.id]) == 1
+    assert list(QuestionSnapshot.objects.values_list('id', flat=True)) == [referenced]
+    assert not QuizRevisionQuestionOption.objects.exists()
+
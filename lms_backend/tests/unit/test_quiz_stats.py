@@ -0,0 +1,43 @@
+from decimal import Decimal
+
+import pytest
+from django.db import transaction
+
+from apps.questions.models import Question
+from apps.quizzes.models import Quiz, QuizQuestion
+from apps.quizzes.stats import refresh_question_usage_counts, refresh_quiz_stats
+from apps.users.models import Department, User
+
+
+@pytest.mark.django_db
+def test_stats_recounted_after_commit(django_capture_on_commit_callbacks):
+    department = Department.objects.create(name='统计测试部门', code='STATS_DEPT')
+    user = User.objects.create(username='stats_user', employee_id='STATS001', department=department)
+    quiz = Quiz.objects.create(title='试卷', created_by=user)
+    questions = [
+        Question.objects.create(content=f'题目{index}', question_type='SHORT_ANSWER', score=Decimal('2.5'), created_by=user)
+        for index in range(2)
+    ]
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        with transaction.atomic():
+            for order, question in enumerate(questions, start=1):
+                QuizQuestion.objects.create(quiz=quiz, question=question, order=order)
+            refresh_quiz_stats([quiz.id])
+            refresh_question_usage_counts(question.id for question in questions)
+            quiz.refresh_from_db()
+            assert quiz.stats_question_count == 0
+
+    assert len(callbacks) == 2
+    quiz.refresh_from_db()
+    assert (quiz.stats_question_count, quiz.stats_total_score, quiz.stats_usage_count) == (2, Decimal('5'), 0)
+    assert set(Question.objects.values_list('stats_usage_count', flat=True)) == {1}
+
+    QuizQuestion.objects.filter(question=questions[0]).delete()
+    with django_capture_on_commit_callbacks(execute=True):
+        refresh_quiz_stats([quiz.id])
+        refresh_question_usage_counts([questions[0].id])
+    quiz.refresh_from_db()
+    questions[0].refresh_from_db()
+    assert (quiz.stats_question_count, quiz.stats_total_score) == (1, Decimal('2.5'))
+    assert questions[0].stats_usage_count == 0
@@ -0,0 +1,58 @@
+"""作答草稿写缓冲测试。"""
+
+import pytest
+from django.core.cache import caches
+from django.test import override_settings
+
+from apps.submissions import drafts
+from apps.submissions.models import Answer
+
+DRAFT_BUFFER = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'ALLOW_LOCAL_CACHE': True,
+    'KEY_PREFIX': 'test_submission_draft',
+    'FLUSH_INTERVAL_SECONDS': 30,
+    'FLUSH_BATCH_SIZE': 200,
+    'TTL_SECONDS': 3600,
+}
+
+
+@pytest.fixture
+def submission(exam_submission):
+    caches['default'].clear()
+    submission = exam_submission()
+    submission.question_id = submission.quiz.quiz_questions.get().id
+    return submission
+
+
+def flushed_text(submission):
+    return list(Answer.objects.filter(submission=submission).values_list('text_answer', flat=True))
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(SUBMISSION_DRAFT_BUFFER=DRAFT_BUFFER)
+def test_draft_fields_are_stored_independently(submission):
+    question_id = submission.question_id
+    drafts.put_answer_draft(submission.id, question_id, {'text_answer': '答案'})
+    draft = drafts.put_answer_draft(submission.id, question_id, {'is_marked': True})
+
+    assert draft == {'text_answer': '答案', 'is_marked': True}
+    assert drafts.flush_submission_drafts(submission) == 1
+    assert flushed_text(submission) == ['答案']
+    assert drafts.flush_submission_drafts(submission) == 0
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(SUBMISSION_DRAFT_BUFFER=DRAFT_BUFFER)
+def test_draft_after_seq_expiry_is_still_flushed(submission):
+    question_id = submission.question_id
+    drafts.put_answer_draft(submission.id, question_id, {'text_answer': '第一版'})
+    drafts.flush_submission_drafts(submission)
+
+    # 模拟长时间答题后写入序号过期，flushed 仍保留较大的旧序号
+    caches['default'].delete(drafts._seq_key(submission.id))
+    drafts.put_answer_draft(submission.id, question_id, {'text_answer': '第二版'})
+
+    assert drafts.flush_pending_drafts()['flushed'] == 1
+    assert flushed_text(submission) == ['第二版']
@@ -0,0 +1,124 @@
+"""超时考试答卷自动交卷测试。"""
+
+from datetime import timedelta
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+from apps.submissions import expiry
+from apps.submissions.expiry import auto_submit_expired, expired_submissions_filter
+from apps.submissions.models import Submission
+
+EXPIRY_SWEEP = {
+    'GRACE_SECONDS': 120,
+    'INTERVAL_SECONDS': 60,
+    'BATCH_SIZE': 100,
+    'BATCH_PAUSE_SECONDS': 0,
+}
+
+
+def _expiring_exam(exam_submission, *, duration=30, started_minutes_ago=0, deadline=None):
+    submission = exam_submission()
+    now = timezone.now()
+    quiz = submission.quiz
+    quiz.duration = duration
+    quiz.save(update_fields=['duration'])
+    # started_at 是 auto_now_add，只能绕过 save 改
+    Submission.objects.filter(pk=submission.pk).update(started_at=now - timedelta(minutes=started_minutes_ago))
+    if deadline is not None:
+        task = submission.task_assignment.task
+        task.deadline = deadline
+        task.save(update_fields=['deadline'])
+    submission.refresh_from_db()
+    return submission, now
+
+
+def _is_expired(submission, now):
+    return Submission.objects.filter(
+        expired_submissions_filter(now, grace_seconds=EXPIRY_SWEEP['GRACE_SECONDS']),
+        pk=submission.pk,
+    ).exists()
+
+
+@override_settings(SUBMISSION_EXPIRY_SWEEP=EXPIRY_SWEEP)
+@pytest.mark.django_db
+def test_auto_submits_exam_after_duration_runs_out(exam_submission):
+    submission, now = _expiring_exam(exam_submission, duration=30, started_minutes_ago=40)
+
+    stats = auto_submit_expired(now=now)
+
+    submission.refresh_from_db()
+    assert stats == {'expired': 1, 'submitted': 1, 'skipped': 0, 'failed': 0}
+    # 简答题需人工评分，交卷后进入待评分
+    assert submission.status == Submission.STATUS_GRADING
+    assert submission.submitted_at == submission.started_at + timedelta(minutes=30)
+    assert submission.answers.count() == 1
+
+
+@override_settings(SUBMISSION_EXPIRY_SWEEP=EXPIRY_SWEEP)
+@pytest.mark.django_db
+def test_task_deadline_cuts_exam_short(exam_submission):
+    deadline = timezone.now() - timedelta(minutes=5)
+    submission, now = _expiring_exam(exam_submission, duration=60, started_minutes_ago=10, deadline=deadline)
+
+    stats = auto_submit_expired(now=now)
+
+    submission.refresh_from_db()
+    assert stats['submitted'] == 1
+    assert submission.submitted_at == deadline
+
+
+@override_settings(SUBMISSION_EXPIRY_SWEEP=EXPIRY_SWEEP)
+@pytest.mark.django_db
+def test_grace_window_delays_auto_submit(exam_submission):
+    # 开考 31 分钟，30 分钟时长已到，但仍在 120 秒宽限内
+    submission, now = _expiring_exam(exam_submission, duration=30, started_minutes_ago=31)
+
+    assert not _is_expired(submission, now)
+    assert auto_submit_expired(now=now)['expired'] == 0
+    submission.refresh_from_db()
+    assert submission.status == Submission.STATUS_IN_PROGRESS
+
+    later = now + timedelta(minutes=2)
+    assert _is_expired(submission, later)
+    assert auto_submit_expired(now=later)['submitted'] == 1
+    submission.refresh_from_db()
+    assert submission.submitted_at == submission.started_at + timedelta(minutes=30)
+
+
+@override_settings(SUBMISSION_EXPIRY_SWEEP=EXPIRY_SWEEP)
+@pytest.mark.django_db
+def test_dry_run_only_counts_expired(exam_submission):
+    submission, now = _expiring_exam(exam_submission, duration=30, started_minutes_ago=40)
+
+    stats = auto_submit_expired(now=now, dry_run=True)
+
+    submission.refresh_from_db()
+    assert stats == {'expired': 1, 'submitted': 0, 'skipped': 0, 'failed': 0}
+    assert submission.status == Submission.STATUS_IN_PROGRESS
+    assert submission.submitted_at is None
+
+
+@override_settings(SUBMISSION_EXPIRY_SWEEP=EXPIRY_SWEEP)
+@pytest.mark.django_db
+def test_submission_finished_by_student_during_sweep_is_skipped(exam_submission, monkeypatch):
+    submission, now = _expiring_exam(exam_submission, duration=30, started_minutes_ago=40)
+    student_submitted_at = now - timedelta(minutes=15)
+    complete_submission = expiry.complete_submission
+
+    def student_submits_first(target, *, submitted_at):
+        # 批次读出后、加锁前，学员自己的交卷先落库
+        Submission.objects.filter(pk=target.pk).update(
+            status=Submission.STATUS_SUBMITTED,
+            submitted_at=student_submitted_at,
+        )
+        return complete_submission(target, submitted_at=submitted_at)
+
+    monkeypatch.setattr(expiry, 'complete_submission', student_submits_first)
+
+    stats = auto_submit_expired(now=now)
+
+    submission.refresh_from_db()
+    assert stats == {'expired': 1, 'submitted': 0, 'skipped': 1, 'failed': 0}
+    assert submission.submitted_at == student_submitted_at
@@ -0,0 +1,61 @@
+"""主观题人工评分与答卷总分增量测试。"""
+
+from decimal import Decimal
+
+import pytest
+
+from apps.submissions.models import Answer, Submission
+from apps.submissions.workflows import grade_subjective_answer
+
+
+@pytest.mark.django_db
+def test_regrading_with_stale_answer_applies_delta_once(exam_submission):
+    submission = exam_submission(questions=2, status=Submission.STATUS_GRADING)
+    first, second = [
+        Answer.objects.create(submission=submission, question=question, text_answer='作答')
+        for question in submission.quiz.quiz_questions.order_by('order')
+    ]
+    grader = submission.user
+    # 两个请求各自读到同一份旧得分
+    stale = Answer.objects.get(pk=first.pk)
+
+    grade_subjective_answer(first, grader, '3')
+    grade_subjective_answer(stale, grader, '4')
+    grade_subjective_answer(Answer.objects.get(pk=first.pk), grader, '4')
+
+    submission.refresh_from_db()
+    assert submission.obtained_score == Decimal('4')
+    assert submission.status == Submission.STATUS_GRADING
+
+    grade_subjective_answer(second, grader, '5')
+    grade_subjective_answer(Answer.objects.get(pk=second.pk), grader, '2')
+
+    submission.refresh_from_db()
+    assert submission.status == Submission.STATUS_GRADED
+    assert submission.obtained_score == Decimal('6')
+    assert submission.obtained_score == sum(answer.obtained_score for answer in submission.answers.all())
+
+
+@pytest.mark.django_db
+def test_regrading_with_stale_submission_uses_locked_total(exam_submission):
+    submission = exam_submission(questions=2, status=Submission.STATUS_GRADING)
+    first, second = [
+        Answer.objects.create(submission=submission, question=question, text_answer='作答')
+        for question in submission.quiz.quiz_questions.order_by('order')
+    ]
+    grader = submission.user
+    grade_subjective_answer(first, grader, '5')
+    grade_subjective_answer(second, grader, '5')
+    assignment = submission.task_assignment
+    assignment.refresh_from_db()
+    assert assignment.score == Decimal('10')
+
+    # 请求 A 先读到总分 10 的答卷，期间请求 B 把第二题改成 0
+    stale = Answer.objects.select_related('submission').get(pk=first.pk)
+    grade_subjective_answer(Answer.objects.get(pk=second.pk), grader, '0')
+    grade_subjective_answer(stale, grader, '3')
+
+    submission.refresh_from_db()
+    assignment.refresh_from_db()
+    assert submission.obtained_score == Decimal('3')
+    assert assignment.score == Decimal('3')
@@ -0,0 +1,33 @@
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+
+from apps.submissions.models import Submission
+from apps.submissions.render_cache import get_or_render_submission_detail
+
+
+@override_settings(SUBMISSION_RENDER_CACHE={**settings.SUBMISSION_RENDER_CACHE, 'ALLOW_LOCAL_CACHE': True})
+@pytest.mark.django_db
+def test_cached_detail_reflects_renamed_task_and_user(exam_submission):
+    submission = exam_submission(status=Submission.STATUS_GRADED)
+    cache.clear()
+
+    def render():
+        return {'id': submission.id, 'user_name': submission.user.username, 'task_title': submission.task.title}
+
+    first = get_or_render_submission_detail(submission, render)
+    assert first['task_title'] == '任务'
+
+    submission.task.title = '改名后的任务'
+    submission.task.save(update_fields=['title'])
+    submission.user.username = 'renamed_user'
+    submission.user.save(update_fields=['username'])
+    reloaded = Submission.objects.select_related('quiz', 'user', 'task_assignment__task').get(pk=submission.pk)
+
+    def fail():
+        raise AssertionError('应命中缓存')
+
+    second = get_or_render_submission_detail(reloaded, fail)
+    assert second['task_title'] == '改名后的任务'
+    assert second['user_name'] == 'renamed_user'
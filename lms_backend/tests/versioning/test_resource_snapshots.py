@@ -1,21 +1,32 @@
 from types import SimpleNamespace
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
+from apps.authorization.models import Permission, UserPermission
+from apps.authorization.services import AuthorizationService
 from apps.knowledge.models import Knowledge, KnowledgeRevision
 from apps.knowledge.services import KnowledgeService, ensure_knowledge_revision
 from apps.questions.models import Question
-from apps.quizzes.models import QuizQuestion, QuizRevision
+from apps.quizzes.fingerprints import refresh_question_fingerprints, verify_content_fingerprints
+from apps.quizzes.models import QuestionSnapshot, QuizQuestion, QuizRevision, QuizRevisionQuestionOption
 from apps.quizzes.services import QuizService, ensure_quiz_revision
 from apps.tasks.tests.factories import TaskFactory, TaskKnowledgeFactory, UserFactory
 from apps.users.models import Role, UserRole
 
 
 def build_request(user):
-    role, _ = Role.objects.get_or_create(code='ADMIN', defaults={'name': '管理员'})
+    role, _ = Role.objects.get_or_create(code='GLOBAL', defaults={'name': '全局'})
     UserRole.objects.get_or_create(user=user, role=role)
+    # 权限按用户直接授予，这里授予全部目录权限，只验证版本化行为
+    AuthorizationService.sync_permission_catalog()
+    UserPermission.objects.bulk_create(
+        [UserPermission(user=user, permission=permission) for permission in Permission.objects.all()],
+        ignore_conflicts=True,
+    )
     user.__dict__.pop('role_codes', None)
-    user.current_role = 'ADMIN'
+    user.current_role = 'GLOBAL'
     return SimpleNamespace(user=user, META={})
 
 
@@ -153,9 +164,8 @@ def test_quiz_save_inline_question_creates_bank_question_and_current_copy():
     assert Question.objects.count() == 1
     assert QuizQuestion.objects.count() == 1
     assert bank_question is not None
-    assert bank_question.created_from_quiz_id == quiz.id
     assert bank_question.content == '试卷里新建的题目'
-    assert relation.content == '试卷里新建的题目'
+    assert bank_question.created_by_id == user.id
 
 
 @pytest.mark.django_db
@@ -173,18 +183,24 @@ def test_quiz_editing_bank_derived_copy_does_not_mutate_bank_question():
     )
     bank_question.question_options.create(sort_order=1, content='选项A', is_correct=True)
     bank_question.question_options.create(sort_order=2, content='选项B', is_correct=False)
+    # 题库题已被其他试卷引用，改动时写时复制
+    other_quiz = quiz_service.create(
+        {'title': '试卷 B', 'quiz_type': 'PRACTICE'},
+        questions=[build_choice_payload(content='题库原题', explanation='题库解析', score='2', source_question_id=bank_question.id)],
+    )
 
     quiz = quiz_service.create(
         {'title': '试卷 A', 'quiz_type': 'PRACTICE'},
         questions=[build_choice_payload(content='试卷副本题目', explanation='试卷解析', source_question_id=bank_question.id)],
     )
 
-    relation = quiz.quiz_questions.get()
+    relation = quiz.quiz_questions.select_related('question').get()
     bank_question.refresh_from_db()
 
-    assert relation.question_id == bank_question.id
-    assert relation.content == '试卷副本题目'
-    assert relation.explanation == '试卷解析'
+    assert relation.question_id != bank_question.id
+    assert relation.question.content == '试卷副本题目'
+    assert relation.question.explanation == '试卷解析'
+    assert other_quiz.quiz_questions.get().question_id == bank_question.id
     assert bank_question.content == '题库原题'
     assert bank_question.explanation == '题库解析'
 
@@ -225,7 +241,102 @@ def test_ensure_quiz_revision_reuses_same_snapshot_and_increments_after_copy_cha
 
 
 @pytest.mark.django_db
-def test_delete_quiz_removes_inline_bank_question_when_no_execution_snapshot_is_used():
+def test_ensure_quiz_revision_uses_fingerprint_and_tracks_bank_question_changes():
+    user = UserFactory()
+    service = QuizService(build_request(user))
+    quiz = service.create(
+        {'title': '试卷 A', 'quiz_type': 'PRACTICE'},
+        questions=[build_choice_payload(content='题目 V1')],
+    )
+    question = quiz.quiz_questions.get().question
+
+    revision_1 = ensure_quiz_revision(quiz, actor=user)
+    assert quiz.content_fingerprint
+    assert revision_1.source_fingerprint == quiz.content_fingerprint
+
+    question.content = '绕过服务直接修改'
+    question.save(update_fields=['content'])
+    # 指纹未变时直接复用最新快照，不再重建 payload
+    assert ensure_quiz_revision(quiz, actor=user).id == revision_1.id
+
+    refresh_question_fingerprints([question.id])
+    revision_2 = ensure_quiz_revision(quiz, actor=user)
+    assert revision_2.revision_number == 2
+    assert revision_2.quiz_questions.get().content == '绕过服务直接修改'
+    assert verify_content_fingerprints() == {'questions': [], 'quizzes': []}
+
+
+@pytest.mark.django_db
+def test_quiz_revisions_share_snapshot_content_for_unchanged_questions():
+    user = UserFactory()
+    service = QuizService(build_request(user))
+    quiz = service.create(
+        {'title': '试卷 A', 'quiz_type': 'PRACTICE'},
+        questions=[build_choice_payload(content='不变的题目'), build_choice_payload(content='题目 V1')],
+    )
+    relations = list(quiz.quiz_questions.order_by('order'))
+    revision_1 = ensure_quiz_revision(quiz, actor=user)
+
+    service.update(
+        quiz.id,
+        {'title': '试卷 A'},
+        questions=[
+            build_choice_payload(
+                content='不变的题目',
+                source_question_id=relations[0].question_id,
+                relation_id=relations[0].id,
+            ),
+            build_choice_payload(
+                content='题目 V2',
+                source_question_id=relations[1].question_id,
+                relation_id=relations[1].id,
+            ),
+        ],
+    )
+    quiz.refresh_from_db()
+    revision_2 = ensure_quiz_revision(quiz, actor=user)
+
+    first_1, second_1 = revision_1.quiz_questions.order_by('order')
+    first_2, second_2 = revision_2.quiz_questions.order_by('order')
+    assert first_1.id != first_2.id
+    assert first_1.snapshot_id == first_2.snapshot_id
+    assert second_1.snapshot_id != second_2.snapshot_id
+    assert second_2.content == '题目 V2'
+    assert QuestionSnapshot.objects.count() == 3
+    # 选项挂在快照上，共用快照时不重复写选项
+    assert QuizRevisionQuestionOption.objects.count() == 6
+    assert [option.content for option in first_2.snapshot.ordered_options()] == ['选项A', '选项B']
+
+
+@pytest.mark.django_db
+def test_quiz_revision_reuses_snapshot_when_only_score_changes():
+    user = UserFactory()
+    service = QuizService(build_request(user))
+    quiz = service.create(
+        {'title': '试卷 A', 'quiz_type': 'PRACTICE'},
+        questions=[build_choice_payload(content='题目', score='1')],
+    )
+    relation = quiz.quiz_questions.get()
+    revision_1 = ensure_quiz_revision(quiz, actor=user)
+
+    service.update(
+        quiz.id,
+        {'title': '试卷 A'},
+        questions=[build_choice_payload(content='题目', score='3', relation_id=relation.id)],
+    )
+    quiz.refresh_from_db()
+    revision_2 = ensure_quiz_revision(quiz, actor=user)
+
+    question_1 = revision_1.quiz_questions.get()
+    question_2 = revision_2.quiz_questions.get()
+    assert revision_2.id != revision_1.id
+    assert question_2.snapshot_id == question_1.snapshot_id
+    assert (question_1.score, question_2.score) == (1, 3)
+    assert QuestionSnapshot.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_delete_quiz_keeps_bank_question_and_removes_unused_revisions():
     user = UserFactory()
     service = QuizService(build_request(user))
     quiz = service.create(
@@ -237,5 +348,65 @@ def test_delete_quiz_removes_inline_bank_question_when_no_execution_snapshot_is_
 
     service.delete(quiz.id)
 
-    assert not Question.objects.filter(id=created_question_id).exists()
+    assert Question.objects.filter(id=created_question_id).exists()
     assert not QuizRevision.objects.filter(source_quiz_id=quiz.id).exists()
+    assert not QuestionSnapshot.objects.exists()
+
+
+@pytest.mark.django_db
+def test_quiz_save_reorders_and_copies_only_questions_shared_with_other_quizzes():
+    user = UserFactory()
+    service = QuizService(build_request(user))
+    quiz = service.create(
+        {'title': '试卷 A', 'quiz_type': 'PRACTICE'},
+        questions=[build_choice_payload(content=f'题目 {index}') for index in range(3)],
+    )
+    first, second, third = quiz.quiz_questions.order_by('order')
+    other_quiz = service.create(
+        {'title': '试卷 B', 'quiz_type': 'PRACTICE'},
+        questions=[build_choice_payload(content='题目 0', source_question_id=first.question_id)],
+    )
+
+    service.update(
+        quiz.id,
+        {},
+        questions=[
+            build_choice_payload(content='题目 2 改', relation_id=third.id),
+            build_choice_payload(content='题目 0 改', relation_id=first.id),
+            build_choice_payload(content='新题'),
+        ],
+    )
+
+    relations = list(quiz.quiz_questions.select_related('question').order_by('order'))
+    assert [relation.id for relation in relations[:2]] == [third.id, first.id]
+    assert relations[0].question_id == third.question_id
+    assert relations[1].question_id != first.question_id
+    assert [relation.question.content for relation in relations] == ['题目 2 改', '题目 0 改', '新题']
+    assert other_quiz.quiz_questions.get().question.content == '题目 0'
+    assert not QuizQuestion.objects.filter(id=second.id).exists()
+    assert verify_content_fingerprints() == {'questions': [], 'quizzes': []}
+
+
+def _count_update_queries(service, size):
+    quiz = service.create(
+        {'title': f'试卷 {size}', 'quiz_type': 'PRACTICE'},
+        questions=[build_choice_payload(content=f'题目 {size}-{index}') for index in range(size)],
+    )
+    relations = list(quiz.quiz_questions.order_by('order'))
+    payloads = [
+        build_choice_payload(content=f'题目 {size}-{index} 改', relation_id=relation.id)
+        for index, relation in reversed(list(enumerate(relations[1:], start=1)))
+    ]
+    payloads.append(build_choice_payload(content=f'新题 {size}'))
+    with CaptureQueriesContext(connection) as context:
+        service.update(quiz.id, {}, questions=payloads)
+    assert quiz.quiz_questions.count() == size
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+def test_quiz_save_query_count_does_not_grow_with_question_count():
+    user = UserFactory()
+    service = QuizService(build_request(user))
+
+    assert _count_update_queries(service, 3) == _count_update_queries(service, 12)